@@ -6,14 +6,13 @@ import os
 from django.conf import settings
 from django.db import models
 from django.utils.translation import gettext_lazy as _
-from thumbnails.fields import ImageField
 
 from plana.apps.institutions.models.institution import Institution
 from plana.apps.institutions.models.institution_component import InstitutionComponent
-from plana.storages import DynamicThumbnailImageField
+from plana.storages import DynamicThumbnailImageField, LocalDynamicThumbnailImageField
 
 if settings.USE_S3 is False:
-    DynamicThumbnailImageField = ImageField
+    DynamicThumbnailImageField = LocalDynamicThumbnailImageField
 
 
 def get_logo_path(instance, filename):
@@ -2,12 +2,14 @@
 
 import re
 
-from django.conf import settings
 from rest_framework import serializers
 
 from plana.apps.associations.models.activity_field import ActivityField
 from plana.apps.associations.models.association import Association
-from plana.apps.associations.serializers.fields import ThumbnailField
+from plana.apps.associations.serializers.fields import (
+    ThumbnailField,
+    ThumbnailListSerializer,
+)
 from plana.apps.institutions.models.institution import Institution
 from plana.apps.institutions.models.institution_component import InstitutionComponent
 from plana.apps.users.models.user import AssociationUser
@@ -88,20 +90,11 @@ class AssociationPartialDataSerializer(serializers.ModelSerializer):
     institution = serializers.PrimaryKeyRelatedField(queryset=Institution.objects.all())
     institution_component = serializers.PrimaryKeyRelatedField(queryset=InstitutionComponent.objects.all())
     activity_field = serializers.PrimaryKeyRelatedField(queryset=ActivityField.objects.all())
-    # path_logo = ThumbnailField(sizes=["list"])
-    path_logo = serializers.SerializerMethodField("cached_logo_url")
-
-    def cached_logo_url(self, association) -> dict[str, str]:
-        """Return cached logo URL instead of calculated one which is slower."""
-        if association.path_logo.name != '':
-            logo_name = f"{association.path_logo.name.split('.')[0]}_list.{association.path_logo.name.split('.')[1]}"
-            return {
-                "list": f"{settings.AWS_S3_ENDPOINT_URL}/{settings.AWS_STORAGE_BUCKET_NAME}/thumbnails/{logo_name}"
-            }
-        return None
+    path_logo = ThumbnailField(sizes=["list"], allow_null=True)
 
     class Meta:
         model = Association
+        list_serializer_class = ThumbnailListSerializer
         fields = [
             "id",
             "institution",
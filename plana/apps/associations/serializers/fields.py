@@ -4,12 +4,35 @@ Storage field from octant.
 https://git.unistra.fr/di/cesar/octant/back/-/blob/develop/octant/apps/api/serializers/fields.py
 """
 
+from collections import defaultdict
+
 from django.conf import settings
+from django.db import models
 from django.utils.translation import gettext_lazy as _
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
+from thumbnails.backends.metadata import DatabaseBackend, ImageMeta
 from thumbnails.files import ThumbnailedImageFile
+from thumbnails.images import Thumbnail
+from thumbnails.models import ThumbnailMeta
+
+
+def prefetch_thumbnails(images):
+    """Load thumbnails metadata of many images with a single query, instead of one query for each image."""
+    images = [image for image in images if image and isinstance(image.metadata_backend, DatabaseBackend)]
+    if not images:
+        return
+    thumbnails_names = defaultdict(dict)
+    for source_name, size, name in ThumbnailMeta.objects.filter(
+        source__name__in={image.name for image in images}
+    ).values_list("source__name", "size", "name"):
+        thumbnails_names[source_name][size] = name
+    for image in images:
+        image.thumbnails._thumbnails = {
+            size: Thumbnail(metadata=ImageMeta(image.name, name, size), storage=image.thumbnails.storage)
+            for size, name in thumbnails_names[image.name].items()
+        }
 
 
 @extend_schema_field(OpenApiTypes.OBJECT)
@@ -27,5 +50,18 @@ class ThumbnailField(serializers.ReadOnlyField):
 
     def to_representation(self, value: ThumbnailedImageFile):
         if not value:
-            return {}
-        return {size: value.thumbnails.get(size).url for size in self.sizes}
+            return None if self.allow_null else {}
+        # Thumbnails being generated in the background, the original image is used until they are ready.
+        thumbnails = value.thumbnails.all()
+        return {size: thumbnails[size].url if size in thumbnails else value.url for size in self.sizes}
+
+
+class ThumbnailListSerializer(serializers.ListSerializer):
+    """List serializer prefetching thumbnails metadata of the ThumbnailFields of all serialized objects."""
+
+    def to_representation(self, data):
+        instances = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        for field in self.child.fields.values():
+            if isinstance(field, ThumbnailField):
+                prefetch_thumbnails([field.get_attribute(instance) for instance in instances])
+        return super().to_representation(instances)
@@ -4,9 +4,12 @@ import json
 
 from django.core import mail
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
+from thumbnails.backends.metadata import DatabaseBackend
 
 from plana.apps.associations.models.activity_field import ActivityField
 from plana.apps.associations.models.association import Association
@@ -122,6 +125,85 @@ class AssociationsViewsTests(TestCase):
         self.assertTrue(association_1.get("name"))
         self.assertFalse(association_1.get("current_projects"))
 
+    def test_get_associations_list_paginated(self):
+        """
+        GET /associations/ .
+
+        - Associations are paginated with cursors if page_size is given.
+        - Walking through all pages returns the same associations as the unpaginated list.
+        """
+        response = self.client.get("/associations/")
+        associations_names = [association["name"] for association in response.data]
+
+        paginated_names = []
+        url = "/associations/?page_size=2"
+        while url is not None:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data["results"]), 2)
+            paginated_names += [association["name"] for association in response.data["results"]]
+            url = response.data["next"]
+        self.assertEqual(paginated_names, associations_names)
+
+    def test_get_associations_list_logos_queries(self):
+        """
+        GET /associations/ .
+
+        - Logos thumbnails URLs are returned, the original logo URL being used until thumbnails are ready.
+        - Associations without a logo get a null logo.
+        - The amount of queries doesn't depend on the amount of associations with a logo.
+        """
+        metadata_backend = DatabaseBackend()
+
+        def add_logos(associations, with_thumbnails=True):
+            for association in associations:
+                association.path_logo = f"associations_logos/logo_{association.id}.png"
+                if with_thumbnails:
+                    metadata_backend.add_thumbnail(
+                        association.path_logo.name, "list", f"thumbnails/logo_{association.id}_list.png"
+                    )
+            Association.objects.bulk_update(associations, ["path_logo"])
+
+        associations = list(Association.objects.filter(is_site=True, is_public=True).order_by("id"))
+        add_logos(associations[1:])
+        add_logos(associations[:1], with_thumbnails=False)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/associations/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        queries_cnt = len(queries.captured_queries)
+        logos = {association["id"]: association["path_logo"] for association in response.data}
+        storage = Association.objects.get(id=associations[0].id).path_logo.storage
+        self.assertEqual(logos[associations[0].id], {"list": storage.url(associations[0].path_logo.name)})
+        self.assertEqual(
+            logos[associations[1].id], {"list": storage.url(f"thumbnails/logo_{associations[1].id}_list.png")}
+        )
+
+        fields = {
+            field.attname: getattr(associations[0], field.attname)
+            for field in Association._meta.concrete_fields
+            if not field.primary_key
+        }
+        new_associations = Association.objects.bulk_create(
+            [
+                Association(
+                    **{
+                        **fields,
+                        "name": f"Association {index}",
+                        "email": f"association-{index}@mail.tld",
+                        "path_logo": "",
+                    }
+                )
+                for index in range(50)
+            ]
+        )
+        add_logos(new_associations[1:])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/associations/")
+        self.assertEqual(len(response.data), len(associations) + 50)
+        self.assertEqual(len(queries.captured_queries), queries_cnt)
+        logos = {association["id"]: association["path_logo"] for association in response.data}
+        self.assertIsNone(logos[new_associations[0].id])
+
     def test_get_associations_list_filter_name(self):
         """
         GET /associations/ .
@@ -3,8 +3,11 @@
 import csv
 import io
 
-from django.test import Client, TestCase
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from openpyxl import load_workbook
 from rest_framework import status
 
 from plana.apps.associations.models.association import Association
@@ -151,7 +154,7 @@ class AssociationExportsViewsTests(TestCase):
         response = self.general_client.get("/associations/export")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        content = response.content.decode('utf-8')
+        content = b"".join(response.streaming_content).decode('utf-8')
         csv_reader = csv.reader(io.StringIO(content))
         total = Association.objects.all().count()
         # -1 because of CSV header
@@ -167,7 +170,7 @@ class AssociationExportsViewsTests(TestCase):
         response = self.institution_client.get("/associations/export")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        content = response.content.decode('utf-8')
+        content = b"".join(response.streaming_content).decode('utf-8')
         csv_reader = csv.reader(io.StringIO(content))
         total = Association.objects.filter(
             institution_id__in=GroupInstitutionFundUser.objects.filter(
@@ -187,8 +190,70 @@ class AssociationExportsViewsTests(TestCase):
         response = self.general_client.get("/associations/export?associations=1,2,3")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        content = response.content.decode('utf-8')
+        content = b"".join(response.streaming_content).decode('utf-8')
         csv_reader = csv.reader(io.StringIO(content))
         total = Association.objects.filter(id__in=[1, 2, 3]).count()
         # -1 because of CSV header
         self.assertEqual(len(list(csv_reader)) - 1, total)
+
+    def test_get_csv_export_associations_streamed(self):
+        """
+        GET /associations/export .
+
+        - The CSV is streamed, starting with its header.
+        - The amount of queries doesn't depend on the amount of associations exported.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.general_client.get("/associations/export")
+            self.assertTrue(response.streaming)
+            content = b"".join(response.streaming_content).decode('utf-8')
+        queries_cnt = len(queries.captured_queries)
+        self.assertEqual(content.split("\r\n")[0].count(";"), 7)
+
+        association = Association.objects.first()
+        fields = {
+            field.attname: getattr(association, field.attname)
+            for field in Association._meta.concrete_fields
+            if not field.primary_key
+        }
+        Association.objects.bulk_create(
+            [
+                Association(**{**fields, "name": f"Association {index}", "email": f"association-{index}@mail.tld"})
+                for index in range(200)
+            ]
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.general_client.get("/associations/export")
+            content = b"".join(response.streaming_content).decode('utf-8')
+        self.assertEqual(len(queries.captured_queries), queries_cnt)
+        self.assertEqual(len(list(csv.reader(io.StringIO(content)))) - 1, Association.objects.count())
+
+    @override_settings(EXPORTS_XLSX_MAX_MEMORY_SIZE=1024)
+    def test_get_xlsx_export_associations_spooled(self):
+        """
+        GET /associations/export .
+
+        - The XLSX file is sent as a file response, even once written to disk.
+        - All associations from db are returned in the XLSX.
+        """
+        association = Association.objects.first()
+        fields = {
+            field.attname: getattr(association, field.attname)
+            for field in Association._meta.concrete_fields
+            if not field.primary_key
+        }
+        Association.objects.bulk_create(
+            [
+                Association(**{**fields, "name": f"Association {index}", "email": f"association-{index}@mail.tld"})
+                for index in range(200)
+            ]
+        )
+        response = self.general_client.get("/associations/export?mode=xlsx")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+
+        workbook = load_workbook(io.BytesIO(b"".join(response.streaming_content)), read_only=True)
+        rows = list(workbook.active.iter_rows(values_only=True))
+        self.assertEqual(len(rows[0]), 8)
+        # -1 because of XLSX header
+        self.assertEqual(len(rows) - 1, Association.objects.count())
@@ -30,12 +30,15 @@ from plana.apps.history.models.history import History
 from plana.apps.institutions.models.institution import Institution
 from plana.apps.users.models.user import AssociationUser
 from plana.libs.mail_template.models import MailTemplate
+from plana.pagination import OptionalCursorPagination
 from plana.utils import send_mail, to_bool
 
 
 class AssociationListCreate(generics.ListCreateAPIView):
     """/associations/ route."""
 
+    pagination_class = OptionalCursorPagination
+    pagination_ordering = ("name", "id")
     filter_backends = [filters.SearchFilter]
     queryset = Association.objects.all().order_by("name")
     search_fields = [
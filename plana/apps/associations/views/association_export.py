@@ -1,15 +1,11 @@
 """Views directly linked to association exports."""
 
-import csv
-from tempfile import NamedTemporaryFile
-
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.db.models import Q
-from django.http import HttpResponse
 from django.utils.translation import gettext_lazy as _
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, extend_schema
-from openpyxl import Workbook
 from rest_framework import generics, response, status
 from rest_framework.permissions import DjangoModelPermissions, IsAuthenticated
 
@@ -22,7 +18,11 @@ from plana.apps.documents.models.document import Document
 from plana.apps.documents.models.document_upload import DocumentUpload
 from plana.apps.institutions.models import Institution, InstitutionComponent
 from plana.apps.users.models import GroupInstitutionFundUser
-from plana.utils import generate_pdf_response
+from plana.utils import (
+    generate_csv_response,
+    generate_pdf_response,
+    generate_xlsx_response,
+)
 
 
 class AssociationListExport(generics.RetrieveAPIView):
@@ -84,62 +84,26 @@ class AssociationListExport(generics.RetrieveAPIView):
             str(_("Email")),
         ]
 
-        http_response = None
-        writer = None
-        workbook = None
-        worksheet = None
-        filename = "associations_export"
-
-        if mode is None or mode == "csv":
-            http_response = HttpResponse(content_type="application/csv")
-            http_response["Content-Disposition"] = f"Content-Disposition: attachment; filename={filename}.csv"
-            writer = csv.writer(http_response, delimiter=";")
-            writer.writerow([field for field in fields])
-        elif mode == "xlsx":
-            workbook = Workbook()
-            worksheet = workbook.active
-            for index_field, field in enumerate(fields):
-                worksheet.cell(row=1, column=index_field + 1).value = field
-
-        # Write CSV file content
-        for index_association, association in enumerate(queryset):
-            institution_component = (
-                None
-                if association.institution_component_id is None
-                else InstitutionComponent.objects.get(id=association.institution_component_id).name
-            )
-
-            fields = [
-                association.name,
-                association.acronym,
-                Institution.objects.get(id=association.institution_id).name,
-                str(association.activity_field),
-                institution_component,
-                association.charter_date,
-                association.last_goa_date,
-                association.email,
-            ]
-
-            if mode is None or mode == "csv":
-                # Write CSV file content
-                writer.writerow([field for field in fields])
-            elif mode == "xlsx":
-                for index_field, field in enumerate(fields):
-                    worksheet.cell(row=index_association + 2, column=index_field + 1).value = field
+        def get_rows():
+            for association in queryset.select_related(
+                "activity_field", "institution", "institution_component"
+            ).iterator(chunk_size=settings.EXPORTS_CHUNK_SIZE):
+                yield [
+                    association.name,
+                    association.acronym,
+                    association.institution.name,
+                    str(association.activity_field),
+                    None if association.institution_component is None else association.institution_component.name,
+                    association.charter_date,
+                    association.last_goa_date,
+                    association.email,
+                ]
 
+        filename = "associations_export"
         if mode is None or mode == "csv":
-            return http_response
+            return generate_csv_response(filename, fields, get_rows())
         if mode == "xlsx":
-            with NamedTemporaryFile() as tmp:
-                workbook.save(tmp.name)
-                tmp.seek(0)
-                stream = tmp.read()
-            http_response = HttpResponse(
-                content=stream,
-                content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            )
-            http_response["Content-Disposition"] = f"Content-Disposition: attachment; filename={filename}.xlsx"
-            return http_response
+            return generate_xlsx_response(filename, fields, get_rows())
 
 
 class AssociationRetrieveExport(generics.RetrieveAPIView):
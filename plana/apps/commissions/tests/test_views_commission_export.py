@@ -3,13 +3,20 @@
 import csv
 import io
 
+from django.conf import settings
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import translation
+from django.utils.translation import gettext_lazy as _
 from rest_framework import status
 
 from plana.apps.commissions.models.commission_fund import CommissionFund
+from plana.apps.commissions.models.fund import Fund
 from plana.apps.commissions.views.commission import ProjectCommissionFund
 from plana.apps.projects.models.project import Project
+from plana.apps.projects.models.project_category import ProjectCategory
 
 
 class CommissionExportsViewsTests(TestCase):
@@ -28,7 +35,9 @@ class CommissionExportsViewsTests(TestCase):
         "contents_setting.json",
         "institutions_institution.json",
         "institutions_institutioncomponent.json",
+        "projects_category.json",
         "projects_project.json",
+        "projects_projectcategory.json",
         "projects_projectcommissionfund.json",
         "users_associationuser.json",
         "users_groupinstitutionfunduser.json",
@@ -103,7 +112,7 @@ class CommissionExportsViewsTests(TestCase):
         response = self.student_client.get(f"/commissions/{commission_id}/export")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        content = response.content.decode('utf-8')
+        content = b"".join(response.streaming_content).decode('utf-8')
         csv_reader = csv.reader(io.StringIO(content))
 
         total = Project.visible_objects.filter(
@@ -128,7 +137,7 @@ class CommissionExportsViewsTests(TestCase):
         response = self.institution_client.get(f"/commissions/{commission_id}/export")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        content = response.content.decode('utf-8')
+        content = b"".join(response.streaming_content).decode('utf-8')
         csv_reader = csv.reader(io.StringIO(content))
 
         total = Project.visible_objects.filter(
@@ -142,7 +151,7 @@ class CommissionExportsViewsTests(TestCase):
         response = self.general_client.get(f"/commissions/{commission_id}/export?project_ids=4,10")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
-        content = response.content.decode('utf-8')
+        content = b"".join(response.streaming_content).decode('utf-8')
         csv_reader = csv.reader(io.StringIO(content))
 
         total = Project.visible_objects.filter(
@@ -153,3 +162,70 @@ class CommissionExportsViewsTests(TestCase):
         total = total.filter(id__in=[4, 10]).count()
         # -1 because of CSV header
         self.assertEqual(len(list(csv_reader)) - 1, total)
+
+    def get_expected_rows(self, commission_id):
+        """Build export rows project by project, as done before amounts were aggregated."""
+        rows = []
+        projects = Project.visible_objects.filter(
+            id__in=ProjectCommissionFund.objects.filter(commission_fund__commission_id=commission_id).values(
+                "project_id"
+            )
+        ).order_by("id")
+        for project in projects:
+            project_commission_funds = ProjectCommissionFund.objects.filter(project_id=project.id)
+            row = [
+                project.manual_identifier,
+                project.name,
+                None if project.association is None else project.association.name,
+                None if project.user is None else f"{project.user.last_name} {project.user.first_name}",
+                project.planned_start_date.date(),
+                project.planned_end_date.date(),
+                str(_("No")) if project_commission_funds.filter(is_first_edition=False).exists() else str(_("Yes")),
+                ', '.join(
+                    ProjectCategory.objects.filter(project_id=project.id)
+                    .order_by("category_id")
+                    .values_list("category__name", flat=True)
+                ),
+            ]
+            for fund in Fund.objects.all().order_by("acronym"):
+                pcf = project_commission_funds.filter(
+                    commission_fund__commission_id=commission_id, commission_fund__fund_id=fund.id
+                ).first()
+                row += [0, 0] if pcf is None else [pcf.amount_asked, pcf.amount_earned]
+            rows.append(["" if field is None else str(field) for field in row])
+        return rows
+
+    def test_commission_projects_export_content(self):
+        """
+        GET /commissions/{id}/export .
+
+        - Exported rows match projects details, categories and amounts asked and earned for each fund.
+        - The amount of queries doesn't depend on the amount of projects and funds.
+        """
+        commission_id = 1
+        ProjectCategory.objects.create(project_id=2, category_id=2)
+        ProjectCommissionFund.objects.filter(project_id=2).update(amount_asked=150, amount_earned=None)
+
+        with translation.override(settings.LANGUAGE_CODE):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.general_client.get(f"/commissions/{commission_id}/export")
+                content = b"".join(response.streaming_content).decode('utf-8')
+            rows = list(csv.reader(io.StringIO(content), delimiter=";"))
+            self.assertEqual(rows[1:], self.get_expected_rows(commission_id))
+        queries_cnt = len(queries.captured_queries)
+
+        fund = Fund.objects.create(name="Fonds", acronym="F", institution_id=1)
+        commission_fund = CommissionFund.objects.create(commission_id=commission_id, fund=fund)
+        for project in Project.visible_objects.all():
+            ProjectCommissionFund.objects.create(
+                project=project, commission_fund=commission_fund, amount_asked=10, is_first_edition=False
+            )
+            ProjectCategory.objects.create(project=project, category_id=3)
+
+        with translation.override(settings.LANGUAGE_CODE):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.general_client.get(f"/commissions/{commission_id}/export")
+                content = b"".join(response.streaming_content).decode('utf-8')
+            rows = list(csv.reader(io.StringIO(content), delimiter=";"))
+            self.assertEqual(rows[1:], self.get_expected_rows(commission_id))
+        self.assertEqual(len(queries.captured_queries), queries_cnt)
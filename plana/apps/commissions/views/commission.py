@@ -21,12 +21,16 @@ from plana.apps.commissions.serializers.commission import (
 )
 from plana.apps.projects.models.project import Project
 from plana.apps.projects.models.project_commission_fund import ProjectCommissionFund
+from plana.apps.users.access_scope import UserAccessScope
+from plana.pagination import OptionalCursorPagination
 from plana.utils import to_bool, valid_date_format
 
 
 class CommissionListCreate(generics.ListCreateAPIView):
     """/commissions/ route."""
 
+    pagination_class = OptionalCursorPagination
+    pagination_ordering = ("submission_date", "id")
     queryset = Commission.objects.all().order_by("submission_date")
     serializer_class = CommissionSerializer
 
@@ -167,40 +171,26 @@ class CommissionListCreate(generics.ListCreateAPIView):
                 )
 
         if managed_projects is not None and managed_projects != "" and not request.user.is_anonymous:
-            if to_bool(managed_projects) is True:
-                self.queryset = self.queryset.filter(
-                    models.Q(
-                        id__in=CommissionFund.objects.filter(
-                            fund_id__in=ProjectCommissionFund.objects.filter(
-                                project_id__in=Project.visible_objects.filter(
-                                    association_id__in=request.user.get_user_managed_associations()
-                                ).values_list("id")
-                            ).values_list("commission_fund_id")
-                        ).values_list('commission_id')
-                    )
-                    | models.Q(
-                        id__in=CommissionFund.objects.filter(
-                            fund_id__in=request.user.get_user_managed_funds()
-                        ).values_list('commission_id')
-                    )
+            access_scope = UserAccessScope(request.user)
+            managed_projects_filter = models.Q(
+                id__in=CommissionFund.objects.filter(
+                    fund_id__in=ProjectCommissionFund.objects.filter(
+                        project_id__in=Project.visible_objects.filter(
+                            association_id__in=access_scope.get_institutions_associations(
+                                access_scope.managed_institutions_ids
+                            ).values("id")
+                        ).values_list("id")
+                    ).values_list("commission_fund_id")
+                ).values_list("commission_id")
+            ) | models.Q(
+                id__in=CommissionFund.objects.filter(fund_id__in=access_scope.managed_funds_ids).values_list(
+                    "commission_id"
                 )
+            )
+            if to_bool(managed_projects) is True:
+                self.queryset = self.queryset.filter(managed_projects_filter)
             else:
-                self.queryset = self.queryset.exclude(
-                    models.Q(
-                        id__in=CommissionFund.objects.filter(
-                            fund_id__in=ProjectCommissionFund.objects.filter(
-                                project_id__in=Project.visible_objects.filter(
-                                    association_id__in=request.user.get_user_managed_associations()
-                                ).values_list("id")
-                            ).values_list("commission_fund_id")
-                        ).values_list('commission_id')
-                    )
-                    | models.Q(
-                        id__in=CommissionFund.objects.filter(
-                            fund_id__in=request.user.get_user_managed_funds()
-                        ).values_list('commission_id')
-                    )
-                )
+                self.queryset = self.queryset.exclude(managed_projects_filter)
 
         return self.list(request, *args, **kwargs)
 
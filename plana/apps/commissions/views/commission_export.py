@@ -1,39 +1,41 @@
 """Views directly linked to commission exports."""
 
-import csv
-from tempfile import NamedTemporaryFile
-
+from django.conf import settings
+from django.contrib.postgres.aggregates import ArrayAgg
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
-from django.http import HttpResponse
 from django.utils.translation import gettext_lazy as _
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, extend_schema
-from openpyxl import Workbook
 from rest_framework import generics, response, status
 from rest_framework.permissions import IsAuthenticated
 
-from plana.apps.associations.models import Association
 from plana.apps.commissions.models import Commission, CommissionFund, Fund
-from plana.apps.institutions.models.institution import Institution
-from plana.apps.projects.models import (
-    Category,
-    Project,
-    ProjectCategory,
-    ProjectCommissionFund,
-)
+from plana.apps.exports.views.export_job import ExportJobCreateMixin
+from plana.apps.projects.models import Project, ProjectCommissionFund
 from plana.apps.projects.serializers.project import ProjectSerializer
-from plana.apps.users.models import User
-from plana.utils import generate_pdf_response
+from plana.apps.users.access_scope import UserAccessScope
+from plana.utils import (
+    generate_csv_response,
+    generate_pdf_response,
+    generate_xlsx_response,
+)
 
 
-class CommissionExport(generics.RetrieveAPIView):
+class CommissionExport(ExportJobCreateMixin, generics.RetrieveAPIView):
     """/commissions/{id}/export route."""
 
     permission_classes = [IsAuthenticated]
     queryset = Project.visible_objects.all()
     serializer_class = ProjectSerializer
 
+    def get_export_edition_date(self, **kwargs):
+        return self.queryset.filter(
+            id__in=ProjectCommissionFund.objects.filter(commission_fund__commission_id=kwargs["pk"]).values(
+                "project_id"
+            )
+        ).aggregate(models.Max("edition_date"))["edition_date__max"]
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -71,45 +73,13 @@ class CommissionExport(generics.RetrieveAPIView):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        if not request.user.has_perm("projects.view_project_any_fund"):
-            managed_funds = request.user.get_user_managed_funds()
-            if managed_funds.count() > 0:
-                user_funds_ids = managed_funds
-            else:
-                user_funds_ids = request.user.get_user_funds()
-        else:
-            user_funds_ids = Fund.objects.all().values_list("id")
-
-        if not request.user.has_perm("projects.view_project_any_institution"):
-            user_institutions_ids = request.user.get_user_managed_institutions()
-        else:
-            user_institutions_ids = Institution.objects.all().values_list("id")
-
-        if not request.user.has_perm("projects.view_project_any_fund") or not request.user.has_perm(
-            "projects.view_project_any_institution"
-        ):
-            user_associations_ids = request.user.get_user_associations()
-            user_projects_ids = Project.visible_objects.filter(
-                models.Q(user_id=request.user.pk) | models.Q(association_id__in=user_associations_ids)
-            ).values_list("id")
-
-            queryset = queryset.filter(
-                models.Q(id__in=user_projects_ids)
-                | models.Q(
-                    id__in=(
-                        ProjectCommissionFund.objects.filter(
-                            commission_fund_id__in=CommissionFund.objects.filter(
-                                fund_id__in=user_funds_ids
-                            ).values_list("id")
-                        ).values_list("project_id")
-                    )
-                )
-                | models.Q(
-                    association_id__in=Association.objects.filter(
-                        institution_id__in=user_institutions_ids
-                    ).values_list("id")
-                )
+        access_scope = UserAccessScope(request.user)
+        queryset = queryset.filter(
+            access_scope.get_projects_filter(
+                "projects.view_project_any_fund",
+                "projects.view_project_any_institution",
             )
+        )
 
         fields = [
             str(_("Identifier")),
@@ -137,97 +107,65 @@ class CommissionExport(generics.RetrieveAPIView):
         if project_ids is not None and project_ids != "":
             projects = projects.filter(id__in=project_ids.split(","))
 
-        data = {"projects": []}
-        http_response = None
-        writer = None
-        workbook = None
-        worksheet = None
-        filename = f"commission_{commission_id}_export"
-        if mode is None or mode == "csv":
-            http_response = HttpResponse(content_type="application/csv")
-            http_response["Content-Disposition"] = f"Content-Disposition: attachment; filename={filename}.csv"
-            writer = csv.writer(http_response, delimiter=";")
-            writer.writerow([field for field in fields])
-        elif mode == "xlsx":
-            workbook = Workbook()
-            worksheet = workbook.active
-            for index_field, field in enumerate(fields):
-                worksheet.cell(row=1, column=index_field + 1).value = field
-        elif mode == "pdf":
-            data["name"] = commission.name
-            data["fields"] = fields
-
-        for index_project, project in enumerate(projects):
-            association = (
-                None if project.association_id is None else Association.objects.get(id=project.association_id).name
-            )
-
-            if project.user_id is None:
-                user = None
-            else:
-                user = User.objects.get(id=project.user_id)
-                user = f"{user.last_name} {user.first_name}"
-
-            categories = list(
-                Category.objects.filter(
-                    id__in=ProjectCategory.objects.filter(project_id=project.id).values_list("category_id")
-                ).values_list("name", flat=True)
+        amounts_aggregates = {}
+        for fund in funds:
+            fund_filter = models.Q(commission_fund__fund_id=fund.id)
+            amounts_aggregates[f"linked_{fund.id}"] = models.Count("id", filter=fund_filter)
+            amounts_aggregates[f"asked_{fund.id}"] = models.Max("amount_asked", filter=fund_filter)
+            amounts_aggregates[f"earned_{fund.id}"] = models.Max("amount_earned", filter=fund_filter)
+        projects_amounts = {
+            project_amounts["project_id"]: project_amounts
+            for project_amounts in ProjectCommissionFund.objects.filter(
+                project_id__in=projects.values("id"), commission_fund__commission_id=commission_id
             )
-            categories = ', '.join(categories)
-
-            project_commission_funds = ProjectCommissionFund.objects.filter(project_id=project.id)
-
-            is_first_edition = str(_("Yes"))
-            for edition in project_commission_funds:
-                if not edition.is_first_edition:
-                    is_first_edition = str(_("No"))
-                    break
-
-            fields = [
-                project.manual_identifier,
-                project.name,
-                association,
-                user,
-                project.planned_start_date.date(),
-                project.planned_end_date.date(),
-                is_first_edition,
-                categories,
-            ]
-            for fund in funds:
-                try:
-                    pcf = ProjectCommissionFund.objects.get(
-                        project_id=project.id,
-                        commission_fund_id=CommissionFund.objects.get(commission_id=commission_id, fund_id=fund.id).id,
-                    )
-                    fields.append(pcf.amount_asked)
-                    fields.append(pcf.amount_earned)
-                except ObjectDoesNotExist:
-                    fields.append(0)
-                    fields.append(0)
-
-            if mode is None or mode == "csv":
-                # Write CSV file content
-                writer.writerow([field for field in fields])
-            elif mode == "xlsx":
-                for index_field, field in enumerate(fields):
-                    worksheet.cell(row=index_project + 2, column=index_field + 1).value = field
-            elif mode == "pdf":
-                data["projects"].append(fields)
+            .order_by()
+            .values("project_id")
+            .annotate(**amounts_aggregates)
+        }
+
+        projects = projects.select_related("association", "user").annotate(
+            categories_names=ArrayAgg(
+                "projectcategory__category__name",
+                filter=models.Q(projectcategory__category__isnull=False),
+                ordering="projectcategory__category_id",
+                default=[],
+            ),
+            has_next_edition=models.Exists(
+                ProjectCommissionFund.objects.filter(project_id=models.OuterRef("id"), is_first_edition=False)
+            ),
+        )
+
+        first_edition_labels = {False: str(_("Yes")), True: str(_("No"))}
+
+        def get_rows():
+            for project in projects.iterator(chunk_size=settings.EXPORTS_CHUNK_SIZE):
+                row = [
+                    project.manual_identifier,
+                    project.name,
+                    None if project.association is None else project.association.name,
+                    None if project.user is None else f"{project.user.last_name} {project.user.first_name}",
+                    project.planned_start_date.date(),
+                    project.planned_end_date.date(),
+                    first_edition_labels[project.has_next_edition],
+                    ', '.join(project.categories_names),
+                ]
+                project_amounts = projects_amounts.get(project.id, {})
+                for fund in funds:
+                    if project_amounts.get(f"linked_{fund.id}", 0) > 0:
+                        row.append(project_amounts[f"asked_{fund.id}"])
+                        row.append(project_amounts[f"earned_{fund.id}"])
+                    else:
+                        row.append(0)
+                        row.append(0)
+                yield row
 
+        filename = f"commission_{commission_id}_export"
         if mode is None or mode == "csv":
-            return http_response
+            return generate_csv_response(filename, fields, get_rows())
         if mode == "xlsx":
-            with NamedTemporaryFile() as tmp:
-                workbook.save(tmp.name)
-                tmp.seek(0)
-                stream = tmp.read()
-            http_response = HttpResponse(
-                content=stream,
-                content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            )
-            http_response["Content-Disposition"] = f"Content-Disposition: attachment; filename={filename}.xlsx"
-            return http_response
+            return generate_xlsx_response(filename, fields, get_rows())
         if mode == "pdf":
+            data = {"name": commission.name, "fields": fields, "projects": list(get_rows())}
             return generate_pdf_response(
                 data["name"],
                 data,
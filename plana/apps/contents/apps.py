@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ContentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'plana.apps.contents'
+
+    def ready(self):
+        """Clear cached settings when they are changed."""
+        from plana.apps.contents import signals  # noqa: F401
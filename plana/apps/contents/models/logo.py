@@ -7,10 +7,10 @@ from django.conf import settings
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
-from plana.storages import DynamicStorageFileField
+from plana.storages import DynamicStorageFileField, LocalDynamicStorageFileField
 
 if settings.USE_S3 is False:
-    DynamicStorageFileField = models.FileField
+    DynamicStorageFileField = LocalDynamicStorageFileField
 
 
 def get_logo_path(instance, filename):
@@ -1,7 +1,10 @@
 """Models describing editable settings by superadmin."""
 
+import logging
 from os.path import dirname, join
 
+from django.conf import settings
+from django.core.cache import caches
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
@@ -29,6 +32,29 @@ class Setting(models.Model):
                 _("General setting '%s' is missing or incorrect. Please check your settings.") % name
             ) from e
 
+    @classmethod
+    def get_cached_setting(cls, name: str):
+        """Get setting, reading it from the cache shared between workers if it has already been loaded."""
+        cache = caches[settings.SETTINGS_CACHE_ALIAS]
+        cache_key = cls.get_cache_key(name)
+        try:
+            value = cache.get(cache_key)
+        except Exception as error:
+            logging.getLogger(__name__).exception(error)
+            return cls.get_setting(name)
+        if value is None:
+            value = cls.get_setting(name)
+            try:
+                cache.set(cache_key, value, settings.SETTINGS_CACHE_TIMEOUT)
+            except Exception as error:
+                logging.getLogger(__name__).exception(error)
+        return value
+
+    @staticmethod
+    def get_cache_key(name: str) -> str:
+        """Get the cache key storing a setting value."""
+        return f"contents_setting_{name.upper()}"
+
     def __str__(self) -> str:
         return str(self.setting)
 
@@ -0,0 +1,19 @@
+"""Signals keeping cached settings in sync with the database."""
+
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from plana.apps.contents.models.setting import Setting
+
+
+@receiver([post_save, post_delete], sender=Setting)
+def clear_cached_setting(sender, instance, **kwargs):
+    """Remove a setting from cache when it is updated or deleted (kept until SETTINGS_CACHE_TIMEOUT if it fails)."""
+    try:
+        caches[settings.SETTINGS_CACHE_ALIAS].delete(Setting.get_cache_key(instance.setting))
+    except Exception as error:
+        logging.getLogger(__name__).exception(error)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class DocumentsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "plana.apps.documents"
+
+    def ready(self):
+        """Delete files of document uploads with their last reference."""
+        from plana.apps.documents import signals  # noqa: F401
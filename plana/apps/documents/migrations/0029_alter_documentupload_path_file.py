@@ -0,0 +1,24 @@
+# Generated by Django 4.2.16 on 2026-10-17 13:04
+
+from django.db import migrations
+import plana.apps.documents.models.document_upload
+import plana.storages
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0028_alter_documentupload_options'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='documentupload',
+            name='path_file',
+            field=plana.storages.DynamicStorageFileField(
+                db_index=True,
+                upload_to=plana.apps.documents.models.document_upload.get_file_path,
+                verbose_name='Uploaded file',
+            ),
+        ),
+    ]
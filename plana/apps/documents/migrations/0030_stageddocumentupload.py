@@ -0,0 +1,107 @@
+# Generated by Django 4.2.16 on 2026-10-17 13:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('associations', '0045_alter_association_website'),
+        ('projects', '0048_alter_project_edition_date'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('documents', '0029_alter_documentupload_path_file'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StagedDocumentUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('key', models.CharField(max_length=250, verbose_name='Staged file key')),
+                ('name', models.CharField(max_length=250, verbose_name='Name')),
+                ('content_type', models.CharField(max_length=250, verbose_name='Content type')),
+                ('size', models.BigIntegerField(verbose_name='Size')),
+                ('validated_date', models.DateField(null=True, verbose_name='Validated date')),
+                (
+                    'staging_status',
+                    models.CharField(
+                        choices=[
+                            ('STAGING_PENDING', 'Staging Pending'),
+                            ('STAGING_RUNNING', 'Staging Running'),
+                            ('STAGING_DONE', 'Staging Done'),
+                            ('STAGING_FAILED', 'Staging Failed'),
+                        ],
+                        db_index=True,
+                        default='STAGING_PENDING',
+                        max_length=32,
+                        verbose_name='Staging Status',
+                    ),
+                ),
+                ('error', models.TextField(default='', verbose_name='Error')),
+                ('creation_date', models.DateTimeField(auto_now_add=True, verbose_name='Creation date')),
+                ('start_date', models.DateTimeField(null=True, verbose_name='Start date')),
+                ('end_date', models.DateTimeField(null=True, verbose_name='End date')),
+                (
+                    'association',
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to='associations.association',
+                        verbose_name='Association',
+                    ),
+                ),
+                (
+                    'document',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to='documents.document',
+                        verbose_name='Document',
+                    ),
+                ),
+                (
+                    'document_upload',
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to='documents.documentupload',
+                        verbose_name='Document upload',
+                    ),
+                ),
+                (
+                    'project',
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to='projects.project',
+                        verbose_name='Project',
+                    ),
+                ),
+                (
+                    'requester',
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name='+',
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name='Requester',
+                    ),
+                ),
+                (
+                    'user',
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name='User',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Staged document upload',
+                'verbose_name_plural': 'Staged document uploads',
+            },
+        ),
+    ]
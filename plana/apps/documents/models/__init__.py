@@ -1,2 +1,3 @@
 from .document import Document
 from .document_upload import DocumentUpload
+from .staged_document_upload import StagedDocumentUpload
@@ -10,10 +10,10 @@ from django.utils.translation import gettext_lazy as _
 
 from plana.apps.commissions.models.fund import Fund
 from plana.apps.institutions.models.institution import Institution
-from plana.storages import DynamicStorageFileField
+from plana.storages import DynamicStorageFileField, LocalDynamicStorageFileField
 
 if settings.USE_S3 is False:
-    DynamicStorageFileField = models.FileField
+    DynamicStorageFileField = LocalDynamicStorageFileField
 
 
 def get_template_path(instance, filename):
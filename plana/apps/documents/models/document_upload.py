@@ -6,14 +6,15 @@ import os
 from django.conf import settings
 from django.db import models
 from django.utils.translation import gettext_lazy as _
+from django_cleanup import cleanup
 
 from plana.apps.associations.models.association import Association
 from plana.apps.projects.models.project import Project
 from plana.apps.users.models.user import User
-from plana.storages import DynamicStorageFileField
+from plana.storages import DynamicStorageFileField, LocalDynamicStorageFileField
 
 if settings.USE_S3 is False:
-    DynamicStorageFileField = models.FileField
+    DynamicStorageFileField = LocalDynamicStorageFileField
 
 
 def get_file_path(instance, filename):
@@ -31,6 +32,7 @@ def get_file_path(instance, filename):
     )
 
 
+@cleanup.ignore
 class DocumentUpload(models.Model):
     """Main model."""
 
@@ -62,6 +64,7 @@ class DocumentUpload(models.Model):
     path_file = DynamicStorageFileField(
         _("Uploaded file"),
         upload_to=get_file_path,
+        db_index=True,
     )
     validated_date = models.DateField(_("Validated date"), null=True)
     comment = models.TextField(_("Comment"), null=True)
@@ -0,0 +1,83 @@
+"""Models describing files uploaded directly to S3, waiting to be stored as document uploads."""
+
+import uuid
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from plana.apps.associations.models.association import Association
+from plana.apps.projects.models.project import Project
+from plana.apps.users.models.user import User
+
+
+class StagedDocumentUpload(models.Model):
+    """Main model."""
+
+    class StagingStatus(models.TextChoices):
+        """List of statuses a staged document upload can have."""
+
+        STAGING_PENDING = "STAGING_PENDING", _("Staging Pending")
+        STAGING_RUNNING = "STAGING_RUNNING", _("Staging Running")
+        STAGING_DONE = "STAGING_DONE", _("Staging Done")
+        STAGING_FAILED = "STAGING_FAILED", _("Staging Failed")
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    key = models.CharField(_("Staged file key"), max_length=250)
+    name = models.CharField(_("Name"), max_length=250)
+    content_type = models.CharField(_("Content type"), max_length=250)
+    size = models.BigIntegerField(_("Size"))
+    document = models.ForeignKey(
+        "Document",
+        verbose_name=_("Document"),
+        on_delete=models.CASCADE,
+    )
+    user = models.ForeignKey(
+        User,
+        verbose_name=_("User"),
+        on_delete=models.CASCADE,
+        null=True,
+    )
+    association = models.ForeignKey(
+        Association,
+        verbose_name=_("Association"),
+        on_delete=models.CASCADE,
+        null=True,
+    )
+    project = models.ForeignKey(
+        Project,
+        verbose_name=_("Project"),
+        on_delete=models.CASCADE,
+        null=True,
+    )
+    validated_date = models.DateField(_("Validated date"), null=True)
+    requester = models.ForeignKey(
+        User,
+        verbose_name=_("Requester"),
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="+",
+    )
+    staging_status = models.CharField(
+        _("Staging Status"),
+        max_length=32,
+        choices=StagingStatus.choices,
+        default="STAGING_PENDING",
+        db_index=True,
+    )
+    error = models.TextField(_("Error"), default="")
+    document_upload = models.ForeignKey(
+        "DocumentUpload",
+        verbose_name=_("Document upload"),
+        on_delete=models.SET_NULL,
+        null=True,
+    )
+    creation_date = models.DateTimeField(_("Creation date"), auto_now_add=True)
+    start_date = models.DateTimeField(_("Start date"), null=True)
+    end_date = models.DateTimeField(_("End date"), null=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.staging_status})"
+
+    class Meta:
+        verbose_name = _("Staged document upload")
+        verbose_name_plural = _("Staged document uploads")
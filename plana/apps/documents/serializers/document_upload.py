@@ -8,6 +8,7 @@ from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
 from plana.apps.documents.models.document_upload import DocumentUpload
+from plana.apps.documents.models.staged_document_upload import StagedDocumentUpload
 from plana.apps.users.models.user import User
 
 
@@ -116,3 +117,45 @@ class DocumentUploadFileSerializer(serializers.ModelSerializer):
     class Meta:
         model = DocumentUpload
         fields = ["path_file", "name"]
+
+
+class DocumentUploadInitiateSerializer(serializers.Serializer):
+    """Serializer to start a direct upload of a file to S3."""
+
+    name = serializers.CharField(max_length=250)
+    document = serializers.IntegerField()
+    user = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+    association = serializers.IntegerField(required=False, allow_null=True)
+    project = serializers.IntegerField(required=False, allow_null=True)
+    validated_date = serializers.DateField(required=False)
+    content_type = serializers.CharField()
+    size = serializers.IntegerField(min_value=1)
+
+
+class DocumentUploadPartSerializer(serializers.Serializer):
+    """Serializer describing a part of a file uploaded directly to S3."""
+
+    part_number = serializers.IntegerField(min_value=1)
+    etag = serializers.CharField()
+
+
+class DocumentUploadCompleteSerializer(serializers.Serializer):
+    """Serializer to finalize a direct upload of a file to S3."""
+
+    upload_token = serializers.CharField()
+    parts = DocumentUploadPartSerializer(many=True)
+
+
+class StagedDocumentUploadSerializer(serializers.ModelSerializer):
+    """Serializer describing a file uploaded directly to S3, waiting to be stored as a document upload."""
+
+    class Meta:
+        model = StagedDocumentUpload
+        fields = [
+            "id",
+            "staging_status",
+            "error",
+            "document_upload",
+            "creation_date",
+            "end_date",
+        ]
@@ -0,0 +1,21 @@
+"""Signals deleting files of uploaded documents."""
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from plana.apps.documents.models.document_upload import DocumentUpload
+from plana.storages import delete_unreferenced_files
+
+
+@receiver(post_delete, sender=DocumentUpload)
+def delete_document_upload_file(sender, instance, using, **kwargs):
+    """
+    Delete the file of a deleted document upload once committed, unless other uploads share it.
+
+    A deferred file means it was already deleted with the document upload, by delete_with_files.
+    """
+    if "path_file" not in instance.get_deferred_fields() and instance.path_file:
+        transaction.on_commit(partial(delete_unreferenced_files, [instance], "path_file"), using=using)
@@ -3,8 +3,9 @@
 import json
 from unittest.mock import Mock
 
+from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
 from django.urls import reverse
 from rest_framework import status
@@ -226,6 +227,31 @@ class DocumentsViewsTests(TestCase):
         document = content
         self.assertEqual(document["name"], doc_test.name)
 
+    def test_get_document_file_by_id(self):
+        """
+        GET /documents/{id}/file .
+
+        - The route returns a 404 if the document has no template file.
+        - An anonymous user can download the template file, streamed by the API.
+        - The template file is redirected to its storage URL if the storage download mode is "redirect".
+        """
+        document = Document.objects.get(id=1)
+        document.path_template = None
+        document.save()
+        response = self.client.get("/documents/1/file")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        document.path_template.save("template.pdf", ContentFile(b"%PDF"))
+        response = self.client.get("/documents/1/file")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b"".join(response.streaming_content), b"%PDF")
+
+        storage_class_name = document.path_template.storage.__class__.__name__
+        with override_settings(STORAGES_DOWNLOAD_MODES={storage_class_name: "redirect"}):
+            response = self.client.get("/documents/1/file")
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        self.assertEqual(response["Location"], document.path_template.url)
+
     def test_put_document_by_id_405(self):
         """
         PUT /documents/{id} .
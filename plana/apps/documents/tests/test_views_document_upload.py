@@ -1,18 +1,27 @@
 """List of tests done on documents views."""
 
+import io
 import json
-from unittest.mock import Mock
+import zipfile
+from unittest.mock import Mock, patch
 
+from botocore.exceptions import ClientError
 from django.core import mail
+from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
-from django.db import models
-from django.test import Client, TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, models
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 
 from plana.apps.documents.models.document import Document
 from plana.apps.documents.models.document_upload import DocumentUpload
+from plana.apps.documents.models.staged_document_upload import StagedDocumentUpload
+from plana.apps.documents.uploads import store_pending_staged_uploads
 from plana.apps.users.models.user import AssociationUser
+from plana.libs.mail_template.outbox import deliver_outbox_mails
 from plana.storages import DynamicStorageFieldFile
 
 
@@ -497,6 +506,162 @@ class DocumentsViewsTests(TestCase):
         response = self.general_client.post("/documents/uploads", post_data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
+    def test_post_document_upload_initiate_errors(self):
+        """
+        POST /documents/uploads/initiate .
+
+        - Direct uploads are only available with S3 storage.
+        - The same checks as a classic upload are done.
+        - Returns 415 if MIME type is wrong.
+        """
+        post_data = {
+            "name": "filename.pdf",
+            "project": 1,
+            "document": 20,
+            "user": self.student_misc_user_name,
+            "content_type": "application/pdf",
+            "size": 1024,
+        }
+        response = self.student_misc_client.post("/documents/uploads/initiate", post_data)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with override_settings(USE_S3=True):
+            response = self.student_misc_client.post("/documents/uploads/initiate", {**post_data, "size": 0})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+            response = self.student_misc_client.post("/documents/uploads/initiate", {**post_data, "document": 99999})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+            response = self.client.post("/documents/uploads/initiate", post_data)
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+            response = self.student_misc_client.post("/documents/uploads/initiate", post_data)
+            self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+    @override_settings(USE_S3=True, DOCUMENTS_UPLOADS_PART_SIZE=10)
+    @patch("plana.apps.documents.uploads.get_s3_client")
+    @patch("plana.apps.documents.views.document_upload.get_s3_client")
+    def test_post_document_upload_direct_success(self, get_s3_client, uploads_get_s3_client):
+        """
+        POST /documents/uploads/initiate and /documents/uploads/complete .
+
+        - A presigned URL is returned for each part of the file.
+        - Only the user who initiated the upload can complete it.
+        - The uploaded file is stored in the background and the object is correctly created in db.
+        - Only the user who completed the upload can get its status.
+        """
+        s3_client = get_s3_client.return_value
+        uploads_get_s3_client.return_value = s3_client
+        s3_client.create_multipart_upload.return_value = {"UploadId": "upload"}
+        s3_client.generate_presigned_url.return_value = "https://s3.tld/part"
+        s3_client.head_object.return_value = {"ContentLength": 28}
+        s3_client.get_object.return_value = {"Body": io.BytesIO(b"content" * 4)}
+        Document.objects.filter(id=20).update(mime_types=["application/pdf"])
+
+        post_data = {
+            "name": "filename.pdf",
+            "project": 1,
+            "document": 20,
+            "user": self.student_misc_user_name,
+            "content_type": "application/pdf",
+            "size": 28,
+        }
+        response = self.student_misc_client.post("/documents/uploads/initiate", post_data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        content = json.loads(response.content.decode("utf-8"))
+        self.assertEqual([part["url"] for part in content["parts"]], ["https://s3.tld/part"] * 3)
+        self.assertEqual(s3_client.generate_presigned_url.call_args.kwargs["Params"]["PartNumber"], 3)
+
+        complete_data = {
+            "upload_token": content["uploadToken"],
+            "parts": [{"part_number": part_number, "etag": f"etag-{part_number}"} for part_number in [2, 1, 3]],
+        }
+        response = self.client.post("/documents/uploads/complete", {**complete_data, "upload_token": "wrong"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.general_client.post(
+            "/documents/uploads/complete", complete_data, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = self.student_misc_client.post(
+            "/documents/uploads/complete", complete_data, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(
+            s3_client.complete_multipart_upload.call_args.kwargs["MultipartUpload"]["Parts"][0],
+            {"PartNumber": 1, "ETag": "etag-1"},
+        )
+        staged_upload_id = json.loads(response.content.decode("utf-8"))["id"]
+        s3_client.get_object.assert_not_called()
+
+        self.assertEqual(store_pending_staged_uploads(), 1)
+        s3_client.delete_object.assert_called_once()
+        response = self.general_client.get(f"/documents/uploads/complete/{staged_upload_id}")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.student_misc_client.get(f"/documents/uploads/complete/{staged_upload_id}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        content = json.loads(response.content.decode("utf-8"))
+        self.assertEqual(content["stagingStatus"], StagedDocumentUpload.StagingStatus.STAGING_DONE)
+        document_upload = DocumentUpload.objects.get(id=content["documentUpload"])
+        self.assertEqual(document_upload.project_id, 1)
+        self.assertEqual(document_upload.path_file.read(), b"content" * 4)
+
+    @override_settings(USE_S3=True, DOCUMENTS_UPLOADS_PART_SIZE=10)
+    @patch("plana.apps.documents.uploads.get_s3_client")
+    @patch("plana.apps.documents.views.document_upload.get_s3_client")
+    def test_post_document_upload_direct_errors(self, get_s3_client, uploads_get_s3_client):
+        """
+        POST /documents/uploads/initiate and /documents/uploads/complete .
+
+        - Files larger than DOCUMENTS_UPLOADS_MAX_SIZE cannot be uploaded.
+        - Uploaded objects larger than the declared size are deleted and rejected.
+        - Staged files which cannot be read are marked as failed and kept until cleaned up.
+        """
+        s3_client = get_s3_client.return_value
+        uploads_get_s3_client.return_value = s3_client
+        s3_client.create_multipart_upload.return_value = {"UploadId": "upload"}
+        s3_client.generate_presigned_url.return_value = "https://s3.tld/part"
+        s3_client.head_object.return_value = {"ContentLength": 29}
+        s3_client.get_object.side_effect = ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        Document.objects.filter(id=20).update(mime_types=["application/pdf"])
+
+        post_data = {
+            "name": "filename.pdf",
+            "project": 1,
+            "document": 20,
+            "user": self.student_misc_user_name,
+            "content_type": "application/pdf",
+            "size": 28,
+        }
+        with override_settings(DOCUMENTS_UPLOADS_MAX_SIZE=20):
+            response = self.student_misc_client.post("/documents/uploads/initiate", post_data)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.student_misc_client.post("/documents/uploads/initiate", post_data)
+        complete_data = {
+            "upload_token": json.loads(response.content.decode("utf-8"))["uploadToken"],
+            "parts": [{"part_number": part_number, "etag": f"etag-{part_number}"} for part_number in [1, 2, 3]],
+        }
+        response = self.student_misc_client.post(
+            "/documents/uploads/complete", complete_data, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        s3_client.delete_object.assert_called_once()
+        self.assertFalse(StagedDocumentUpload.objects.exists())
+
+        s3_client.head_object.return_value = {"ContentLength": 28}
+        response = self.student_misc_client.post(
+            "/documents/uploads/complete", complete_data, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        store_pending_staged_uploads()
+        staged_upload = StagedDocumentUpload.objects.get(id=json.loads(response.content.decode("utf-8"))["id"])
+        self.assertEqual(staged_upload.staging_status, StagedDocumentUpload.StagingStatus.STAGING_FAILED)
+        self.assertIsNone(staged_upload.document_upload)
+        s3_client.delete_object.assert_called_once()
+
     def test_get_document_upload_by_id_anonymous(self):
         """
         GET /documents/uploads/{id} .
@@ -652,6 +817,7 @@ class DocumentsViewsTests(TestCase):
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["comment"], "Comment")
+        deliver_outbox_mails()
         self.assertTrue(len(mail.outbox))
 
         response = self.general_client.patch(
@@ -729,8 +895,42 @@ class DocumentsViewsTests(TestCase):
         self.assertFalse(len(mail.outbox))
         response = self.general_client.delete("/documents/uploads/7")
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        deliver_outbox_mails()
         self.assertTrue(len(mail.outbox))
 
+    def test_delete_document_upload_shared_file(self):
+        """
+        DELETE /documents/uploads/{id} .
+
+        - Identical uploaded files are stored once.
+        - The stored file is only deleted with the last DocumentUpload referencing it, once committed.
+        """
+        Document.objects.filter(id=20).update(mime_types=["application/pdf"])
+        post_data = {
+            "path_file": SimpleUploadedFile("statutes.pdf", b"content", content_type="application/pdf"),
+            "project": 1,
+            "document": 20,
+            "user": self.student_misc_user_name,
+        }
+        response = self.student_misc_client.post("/documents/uploads", post_data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        document_upload = DocumentUpload.objects.get(id=response.data["id"])
+        other_document_upload = DocumentUpload(name="statutes.pdf", document_id=20, user_id=self.student_misc_user_id)
+        other_document_upload.path_file.save("statutes.pdf", ContentFile(b"content"))
+        path_file = document_upload.path_file
+        self.assertEqual(path_file.name, other_document_upload.path_file.name)
+        self.assertEqual(path_file.read(), b"content")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.student_misc_client.delete(f"/documents/uploads/{document_upload.id}")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertTrue(path_file.storage.exists(path_file.name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.student_misc_client.delete(f"/documents/uploads/{other_document_upload.id}")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(path_file.storage.exists(path_file.name))
+
         response = self.general_client.delete(f"/documents/uploads/{self.new_document.data['id']}")
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
 
@@ -757,6 +957,48 @@ class DocumentsViewsTests(TestCase):
         response = self.student_misc_client.get("/documents/uploads/file?project_id=1")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_get_document_upload_file_same_names(self):
+        """
+        GET /documents/uploads/file .
+
+        - Uploaded documents with the same name are all stored in the ZIP archive.
+        """
+        document_uploads = []
+        for content in [b"first content", b"second content"]:
+            document_upload = DocumentUpload(
+                name="statutes.pdf", document_id=20, project_id=3, user_id=self.student_misc_user_id
+            )
+            document_upload.path_file.save("statutes.pdf", ContentFile(content))
+            document_uploads.append(document_upload)
+
+        response = self.student_misc_client.get("/documents/uploads/file?project_id=3")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(
+            archive.namelist(), [f"{document_upload.id}_statutes.pdf" for document_upload in document_uploads]
+        )
+        self.assertEqual(archive.read(f"{document_uploads[1].id}_statutes.pdf"), b"second content")
+
+    def test_get_document_upload_file_queries(self):
+        """
+        GET /documents/uploads/file .
+
+        - Access to uploaded documents is checked with a constant number of queries.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.student_misc_client.get("/documents/uploads/file")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        queries_cnt = len(queries.captured_queries)
+
+        document = Document.objects.first()
+        DocumentUpload.objects.bulk_create(
+            [DocumentUpload(name=f"upload-{index}", document=document, project_id=2) for index in range(5000)]
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.student_misc_client.get("/documents/uploads/file")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries.captured_queries), queries_cnt)
+
     def test_get_document_upload_file_by_id_anonymous(self):
         """
         GET /documents/uploads/{id}/file .
@@ -0,0 +1,232 @@
+"""
+Queue of files uploaded directly to S3, encrypted and stored as document uploads without any external broker.
+
+Staged files are streamed from S3 and encrypted by background threads of API processes once uploads are completed,
+and by the run_document_uploads command (picking up uploads interrupted by a restart, and deleting abandoned ones).
+"""
+
+import datetime
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.sites.shortcuts import get_current_site
+from django.core.files.base import File
+from django.db import connections, transaction
+from django.utils import timezone
+
+from plana.apps.documents.models.document import Document
+from plana.apps.documents.models.document_upload import DocumentUpload
+from plana.apps.documents.models.staged_document_upload import StagedDocumentUpload
+from plana.apps.history.models.history import History
+from plana.apps.institutions.models.institution import Institution
+from plana.apps.users.models.user import User
+from plana.libs.mail_template.models import MailTemplate
+from plana.libs.mail_template.outbox import queue_mail
+from plana.storages import S3_DELETE_OBJECTS_MAX_KEYS, delete_s3_objects
+from plana.utils import get_s3_client
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_document_uploads_dispatcher():
+    """Return the executor storing staged files in the background, shared by the whole process."""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = ThreadPoolExecutor(
+                    max_workers=settings.DOCUMENTS_UPLOADS_WORKERS, thread_name_prefix="uploads"
+                )
+    return _dispatcher
+
+
+def notify_document_upload(request, document_upload):
+    """Queue emails to managers and to the owner of a new document upload waiting for validation."""
+    document = document_upload.document
+    association = document_upload.association
+    user = document_upload.user
+    requester = getattr(request, "user", None)
+    if document.process_type in Document.ProcessType.get_validated_documents():
+        current_site = get_current_site(request)
+        context = {
+            "site_domain": f"https://{current_site.domain}",
+            "site_name": current_site.name,
+            "document_url": f"{settings.EMAIL_TEMPLATE_FRONTEND_URL}{settings.EMAIL_TEMPLATE_DOCUMENT_VALIDATE_PATH}",
+        }
+
+        template = MailTemplate.objects.get(code="MANAGER_DOCUMENT_CREATION")
+        managers_emails = []
+        if association is not None:
+            context["document_url"] += str(association.id)
+            managers_emails = list(
+                Institution.objects.get(id=association.institution_id)
+                .default_institution_managers()
+                .values_list("email", flat=True)
+            )
+        if user is not None:
+            for user_to_check in User.objects.filter(is_superuser=False, is_staff=True):
+                if user_to_check.has_perm("users.change_user_misc"):
+                    managers_emails.append(user_to_check.email)
+        queue_mail(
+            from_=settings.DEFAULT_FROM_EMAIL,
+            to_=managers_emails,
+            subject=template.subject.replace("{{ site_name }}", context["site_name"]),
+            message=template.parse_vars(requester, request, context),
+            template=template,
+            obj=document_upload,
+        )
+
+        template = MailTemplate.objects.get(code="USER_OR_ASSOCIATION_DOCUMENT_CREATION")
+        email = ""
+        if association is not None:
+            email = association.email
+        if user is not None:
+            email = user.email
+        queue_mail(
+            from_=settings.DEFAULT_FROM_EMAIL,
+            to_=email,
+            subject=template.subject.replace("{{ site_name }}", context["site_name"]),
+            message=template.parse_vars(requester, request, context),
+            template=template,
+            obj=document_upload,
+        )
+
+
+def store_staged_upload(staged_upload):
+    """Encrypt and store the staged file of a claimed upload, streamed from S3, and create its document upload."""
+    s3_client = get_s3_client()
+    try:
+        staged_file = s3_client.get_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=staged_upload.key)["Body"]
+        try:
+            content = File(staged_file, name=staged_upload.name)
+            content.content_type = staged_upload.content_type
+            with transaction.atomic():
+                document_upload = DocumentUpload(
+                    name=staged_upload.name,
+                    document_id=staged_upload.document_id,
+                    project_id=staged_upload.project_id,
+                    association_id=staged_upload.association_id,
+                    user_id=staged_upload.user_id,
+                    validated_date=staged_upload.validated_date,
+                )
+                document_upload.path_file.save(staged_upload.name, content)
+                notify_document_upload(None, document_upload)
+                if document_upload.document.acronym == "RIB":
+                    History.objects.create(
+                        action_title="DOCUMENT_UPLOAD_CHANGED",
+                        action_user_id=staged_upload.requester_id,
+                        document_upload_id=document_upload.id,
+                    )
+                staged_upload.document_upload = document_upload
+                staged_upload.staging_status = StagedDocumentUpload.StagingStatus.STAGING_DONE
+                staged_upload.end_date = timezone.now()
+                staged_upload.save()
+        finally:
+            staged_file.close()
+        s3_client.delete_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=staged_upload.key)
+    except Exception as error:
+        logging.getLogger(__name__).exception(error)
+        staged_upload.staging_status = StagedDocumentUpload.StagingStatus.STAGING_FAILED
+        staged_upload.error = str(error)
+        staged_upload.end_date = timezone.now()
+        staged_upload.save()
+
+
+def claim_next_staged_upload():
+    """Mark the oldest pending staged upload as running and return it (None if no upload is pending)."""
+    with transaction.atomic():
+        staged_upload = (
+            StagedDocumentUpload.objects.select_for_update(skip_locked=True)
+            .filter(staging_status=StagedDocumentUpload.StagingStatus.STAGING_PENDING)
+            .order_by("creation_date")
+            .first()
+        )
+        if staged_upload is not None:
+            staged_upload.staging_status = StagedDocumentUpload.StagingStatus.STAGING_RUNNING
+            staged_upload.start_date = timezone.now()
+            staged_upload.save(update_fields=["staging_status", "start_date"])
+    return staged_upload
+
+
+def store_pending_staged_uploads():
+    """
+    Store pending staged uploads until none is left, and return how many were processed.
+
+    Uploads being stored for more than DOCUMENTS_UPLOADS_STORE_TIMEOUT seconds are considered interrupted and queued
+    again.
+    """
+    StagedDocumentUpload.objects.filter(
+        staging_status=StagedDocumentUpload.StagingStatus.STAGING_RUNNING,
+        start_date__lt=timezone.now() - datetime.timedelta(seconds=settings.DOCUMENTS_UPLOADS_STORE_TIMEOUT),
+    ).update(staging_status=StagedDocumentUpload.StagingStatus.STAGING_PENDING)
+
+    staged_uploads_count = 0
+    while True:
+        staged_upload = claim_next_staged_upload()
+        if staged_upload is None:
+            return staged_uploads_count
+        store_staged_upload(staged_upload)
+        staged_uploads_count += 1
+
+
+def store_staged_uploads_in_background():
+    """Store pending staged uploads in a background thread."""
+
+    def run():
+        try:
+            store_pending_staged_uploads()
+        except Exception as error:
+            logging.getLogger(__name__).exception(error)
+        finally:
+            connections.close_all()
+
+    return get_document_uploads_dispatcher().submit(run)
+
+
+def delete_abandoned_uploads():
+    """
+    Abort direct uploads never completed and delete staged files never stored, and return how many were deleted.
+
+    Uploads are abandoned once DOCUMENTS_UPLOADS_EXPIRE seconds old, and results of staged uploads are deleted
+    DOCUMENTS_UPLOADS_RESULT_EXPIRE seconds after they were stored.
+    """
+    s3_client = get_s3_client()
+    bucket_name = settings.AWS_STORAGE_BUCKET_NAME
+    prefix = f"{settings.S3_UPLOADS_STAGING_FILEPATH}/"
+    expiration_date = timezone.now() - datetime.timedelta(seconds=settings.DOCUMENTS_UPLOADS_EXPIRE)
+
+    aborted_count = 0
+    for page in s3_client.get_paginator("list_multipart_uploads").paginate(Bucket=bucket_name, Prefix=prefix):
+        for upload in page.get("Uploads", []):
+            if upload["Initiated"] < expiration_date:
+                s3_client.abort_multipart_upload(Bucket=bucket_name, Key=upload["Key"], UploadId=upload["UploadId"])
+                aborted_count += 1
+
+    staged_keys = set(
+        StagedDocumentUpload.objects.filter(
+            staging_status__in=[
+                StagedDocumentUpload.StagingStatus.STAGING_PENDING,
+                StagedDocumentUpload.StagingStatus.STAGING_RUNNING,
+            ]
+        ).values_list("key", flat=True)
+    )
+    abandoned_keys = [
+        staged_object["Key"]
+        for page in s3_client.get_paginator("list_objects_v2").paginate(Bucket=bucket_name, Prefix=prefix)
+        for staged_object in page.get("Contents", [])
+        if staged_object["LastModified"] < expiration_date and staged_object["Key"] not in staged_keys
+    ]
+    deleted_count = 0
+    for index in range(0, len(abandoned_keys), S3_DELETE_OBJECTS_MAX_KEYS):
+        deleted, _failed_keys = delete_s3_objects(
+            s3_client, bucket_name, abandoned_keys[index : index + S3_DELETE_OBJECTS_MAX_KEYS]
+        )
+        deleted_count += deleted
+
+    StagedDocumentUpload.objects.filter(
+        end_date__lt=timezone.now() - datetime.timedelta(seconds=settings.DOCUMENTS_UPLOADS_RESULT_EXPIRE)
+    ).delete()
+    return aborted_count + deleted_count
@@ -2,10 +2,17 @@
 
 from django.urls import path
 
-from .views.document import DocumentList, DocumentRetrieveUpdateDestroy
+from .views.document import (
+    DocumentFileRetrieve,
+    DocumentList,
+    DocumentRetrieveUpdateDestroy,
+)
 from .views.document_upload import (
+    DocumentUploadComplete,
+    DocumentUploadCompleteRetrieve,
     DocumentUploadFileList,
     DocumentUploadFileRetrieve,
+    DocumentUploadInitiate,
     DocumentUploadListCreate,
     DocumentUploadRetrieveUpdateDestroy,
 )
@@ -17,11 +24,31 @@ urlpatterns = [
         DocumentRetrieveUpdateDestroy.as_view(),
         name="document_retrieve_update_destroy",
     ),
+    path(
+        "<int:pk>/file",
+        DocumentFileRetrieve.as_view(),
+        name="document_file_retrieve",
+    ),
     path(
         "uploads",
         DocumentUploadListCreate.as_view(),
         name="document_upload_list_create",
     ),
+    path(
+        "uploads/initiate",
+        DocumentUploadInitiate.as_view(),
+        name="document_upload_initiate",
+    ),
+    path(
+        "uploads/complete",
+        DocumentUploadComplete.as_view(),
+        name="document_upload_complete",
+    ),
+    path(
+        "uploads/complete/<uuid:pk>",
+        DocumentUploadCompleteRetrieve.as_view(),
+        name="document_upload_complete_retrieve",
+    ),
     path(
         "uploads/<int:pk>",
         DocumentUploadRetrieveUpdateDestroy.as_view(),
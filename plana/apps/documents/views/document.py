@@ -1,5 +1,7 @@
 """Views directly linked to documents."""
 
+import os
+
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils.translation import gettext_lazy as _
 from drf_spectacular.types import OpenApiTypes
@@ -14,6 +16,7 @@ from plana.apps.documents.serializers.document import (
     DocumentSerializer,
     DocumentUpdateSerializer,
 )
+from plana.utils import generate_file_response
 
 
 class DocumentList(generics.ListCreateAPIView):
@@ -283,3 +286,36 @@ class DocumentRetrieveUpdateDestroy(generics.RetrieveUpdateDestroyAPIView):
             )
 
         return self.destroy(request, *args, **kwargs)
+
+
+class DocumentFileRetrieve(generics.RetrieveAPIView):
+    """/documents/{id}/file route."""
+
+    permission_classes = [AllowAny]
+    queryset = Document.objects.all()
+    serializer_class = DocumentSerializer
+
+    @extend_schema(
+        responses={
+            status.HTTP_200_OK: None,
+            status.HTTP_302_FOUND: None,
+            status.HTTP_404_NOT_FOUND: None,
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        """Retrieve the example template file of a document type."""
+        try:
+            document = self.queryset.get(id=kwargs["pk"])
+        except ObjectDoesNotExist:
+            return response.Response(
+                {"error": _("Document does not exist.")},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        if not document.path_template:
+            return response.Response(
+                {"error": _("Document has no template file.")},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        return generate_file_response(request, document.path_template, os.path.basename(document.path_template.name))
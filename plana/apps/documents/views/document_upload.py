@@ -1,14 +1,15 @@
 """Views directly linked to document uploads."""
 
-import io
+import math
 import os
-import zipfile
+import uuid
 
+from botocore.exceptions import ClientError
 from django.conf import settings
 from django.contrib.sites.shortcuts import get_current_site
+from django.core import signing
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import models
-from django.http import FileResponse, HttpResponse
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, extend_schema
@@ -19,24 +20,163 @@ from rest_framework.permissions import AllowAny, DjangoModelPermissions, IsAuthe
 from plana.apps.associations.models.association import Association
 from plana.apps.documents.models.document import Document
 from plana.apps.documents.models.document_upload import DocumentUpload
+from plana.apps.documents.models.staged_document_upload import StagedDocumentUpload
 from plana.apps.documents.serializers.document_upload import (
+    DocumentUploadCompleteSerializer,
     DocumentUploadCreateSerializer,
     DocumentUploadFileSerializer,
+    DocumentUploadInitiateSerializer,
     DocumentUploadListSerializer,
     DocumentUploadRetrieveSerializer,
     DocumentUploadUpdateSerializer,
+    StagedDocumentUploadSerializer,
+)
+from plana.apps.documents.uploads import (
+    notify_document_upload,
+    store_staged_uploads_in_background,
 )
 from plana.apps.history.models.history import History
 from plana.apps.institutions.models.institution import Institution
 from plana.apps.projects.models.project import Project
+from plana.apps.users.access_scope import UserAccessScope
 from plana.apps.users.models.user import AssociationUser, User
 from plana.libs.mail_template.models import MailTemplate
-from plana.utils import send_mail, to_bool
+from plana.libs.mail_template.outbox import queue_mail
+from plana.pagination import OptionalCursorPagination
+from plana.utils import (
+    generate_file_response,
+    generate_zip_response,
+    get_s3_client,
+    to_bool,
+)
+
+DIRECT_UPLOAD_SALT = "plana.apps.documents.direct_upload"
+S3_MAX_PARTS = 10000
+
+
+def check_document_upload_data(requester, data):
+    """
+    Check that a document upload can be created by the requester with the given data.
+
+    Return a tuple with a dict of related document, project, association and user, and an error response (or None).
+    """
+    if "document" not in data:
+        return None, response.Response(
+            {"error": _("Document does not exist.")},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+
+    try:
+        document = Document.objects.get(id=data["document"])
+    except ObjectDoesNotExist:
+        return None, response.Response(
+            {"error": _("Document does not exist.")},
+            status=status.HTTP_404_NOT_FOUND,
+        )
+    existing_document = DocumentUpload.objects.filter(document_id=document.id)
+
+    if requester.is_anonymous and (
+        ("association" in data or "project" in data) or document.process_type != "DOCUMENT_USER"
+    ):
+        return None, response.Response(
+            {"error": _("Cannot upload documents not related to user as anonymous.")},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+
+    project = None
+    if "project" in data and data["project"] != "":
+        if document.process_type not in Document.ProcessType.get_project_documents():
+            return None, response.Response(
+                {"error": _("Project document not allowed for this process.")},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            project = Project.visible_objects.get(id=data["project"])
+        except ObjectDoesNotExist:
+            return None, response.Response(
+                {"error": _("Project does not exist.")},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        existing_document = existing_document.filter(project_id=project.id)
+        if not requester.can_edit_project(project):
+            return None, response.Response(
+                {"error": _("Not allowed to upload documents for this project.")},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+    association = None
+    if "association" in data and data["association"] is not None and data["association"] != "":
+        try:
+            association = Association.objects.get(id=data["association"])
+        except ObjectDoesNotExist:
+            return None, response.Response(
+                {"error": _("Association does not exist.")},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        existing_document = existing_document.filter(association_id=association.id)
+        if (
+            not requester.has_perm("documents.add_documentupload_all")
+            and not requester.is_president_in_association(data["association"])
+            and project is None
+        ):
+            return None, response.Response(
+                {"error": _("Not allowed to post documents if not president.")},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+    user = None
+    if "user" in data and data["user"] is not None and data["user"] != "":
+        try:
+            user = User.objects.get(username=data["user"])
+        except ObjectDoesNotExist:
+            return None, response.Response(
+                {"error": _("User does not exist.")},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        existing_document = existing_document.filter(user_id=requester.pk)
+        if (requester.is_anonymous and user.is_validated_by_admin is True) or (
+            not requester.is_anonymous
+            and not requester.has_perm("documents.add_documentupload_all")
+            and user.id != requester.pk
+        ):
+            return None, response.Response(
+                {"error": _("Not allowed to upload documents with this user.")},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+    if "validated_date" in data and (
+        requester.is_anonymous or not requester.has_perm("documents.add_documentupload_all")
+    ):
+        return None, response.Response(
+            {"error": _("Not allowed to validate documents.")},
+            status=status.HTTP_403_FORBIDDEN,
+        )
+
+    if association is not None and user is not None:
+        return None, response.Response(
+            {"error": _("A document upload can only have one affectation.")},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if association is None and user is None:
+        return None, response.Response(
+            {"error": _("No user or association specified in the new document upload.")},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    if not document.is_multiple and existing_document.count() > 0:
+        return None, response.Response(
+            {"error": _("Document cannot be submitted multiple times.")},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    return {"document": document, "project": project, "association": association, "user": user}, None
 
 
 class DocumentUploadListCreate(generics.ListCreateAPIView):
     """/documents/uploads route."""
 
+    pagination_class = OptionalCursorPagination
     permission_classes = [IsAuthenticated, DjangoModelPermissions]
     queryset = DocumentUpload.objects.all()
 
@@ -101,14 +241,7 @@ class DocumentUploadListCreate(generics.ListCreateAPIView):
         process_types = request.query_params.get("process_types")
         is_validated_by_admin = request.query_params.get("is_validated_by_admin")
 
-        if not request.user.has_perm("documents.view_documentupload_all"):
-            user_associations_ids = AssociationUser.objects.filter(user_id=request.user.pk).values_list(
-                "association_id"
-            )
-            user_documents_ids = DocumentUpload.objects.filter(
-                models.Q(user_id=request.user.pk) | models.Q(association_id__in=user_associations_ids)
-            ).values_list("id")
-            self.queryset = self.queryset.filter(id__in=user_documents_ids)
+        self.queryset = self.queryset.filter(UserAccessScope(request.user).get_document_uploads_filter())
 
         if user is not None and user != "":
             self.queryset = self.queryset.filter(user_id=user)
@@ -149,119 +282,150 @@ class DocumentUploadListCreate(generics.ListCreateAPIView):
         },
         tags=["documents/uploads"],
     )
+    @transaction.atomic
     def post(self, request, *args, **kwargs):
         """Create a new document upload."""
-        if "document" not in request.data:
-            return response.Response(
-                {"error": _("Document does not exist.")},
-                status=status.HTTP_404_NOT_FOUND,
-            )
+        document_upload_data, error_response = check_document_upload_data(request.user, request.data)
+        if error_response is not None:
+            return error_response
+        document = document_upload_data["document"]
 
         try:
-            document = Document.objects.get(id=request.data["document"])
-        except ObjectDoesNotExist:
+            serializer = self.get_serializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+        except ValidationError as error:
             return response.Response(
-                {"error": _("Document does not exist.")},
-                status=status.HTTP_404_NOT_FOUND,
+                {"error": error.detail},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-        existing_document = DocumentUpload.objects.filter(document_id=document.id)
 
-        if request.user.is_anonymous and (
-            ("association" in request.data or "project" in request.data) or document.process_type != "DOCUMENT_USER"
-        ):
+        if request.data["path_file"].content_type not in document.mime_types:
             return response.Response(
-                {"error": _("Cannot upload documents not related to user as anonymous.")},
-                status=status.HTTP_403_FORBIDDEN,
+                {"error": _("Wrong media type for this document.")},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
             )
 
-        project = None
-        if "project" in request.data and request.data["project"] != "":
-            if document.process_type not in Document.ProcessType.get_project_documents():
-                return response.Response(
-                    {"error": _("Project document not allowed for this process.")},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            try:
-                project = Project.visible_objects.get(id=request.data["project"])
-            except ObjectDoesNotExist:
-                return response.Response(
-                    {"error": _("Project does not exist.")},
-                    status=status.HTTP_404_NOT_FOUND,
-                )
-            existing_document = existing_document.filter(project_id=project.id)
-            if not request.user.can_edit_project(project):
-                return response.Response(
-                    {"error": _("Not allowed to upload documents for this project.")},
-                    status=status.HTTP_403_FORBIDDEN,
-                )
+        request.data["name"] = request.data["path_file"].name
+        document_upload_response = super().create(request, *args, **kwargs)
+        notify_document_upload(
+            request,
+            DocumentUpload.objects.select_related("document", "association", "user").get(
+                id=document_upload_response.data["id"]
+            ),
+        )
+        if document.acronym == "RIB":
+            History.objects.create(
+                action_title="DOCUMENT_UPLOAD_CHANGED",
+                action_user_id=request.user.pk,
+                document_upload_id=document_upload_response.data["id"],
+            )
+        return document_upload_response
 
-        association = None
-        if (
-            "association" in request.data
-            and request.data["association"] is not None
-            and request.data["association"] != ""
-        ):
-            try:
-                association = Association.objects.get(id=request.data["association"])
-            except ObjectDoesNotExist:
-                return response.Response(
-                    {"error": _("Association does not exist.")},
-                    status=status.HTTP_404_NOT_FOUND,
-                )
-            existing_document = existing_document.filter(association_id=association.id)
-            if (
-                not request.user.has_perm("documents.add_documentupload_all")
-                and not request.user.is_president_in_association(request.data["association"])
-                and project is None
-            ):
-                return response.Response(
-                    {"error": _("Not allowed to post documents if not president.")},
-                    status=status.HTTP_403_FORBIDDEN,
-                )
 
-        user = None
-        if "user" in request.data and request.data["user"] is not None and request.data["user"] != "":
-            try:
-                user = User.objects.get(username=request.data["user"])
-            except ObjectDoesNotExist:
-                return response.Response(
-                    {"error": _("User does not exist.")},
-                    status=status.HTTP_404_NOT_FOUND,
-                )
-            existing_document = existing_document.filter(user_id=request.user.pk)
-            if (request.user.is_anonymous and user.is_validated_by_admin is True) or (
-                not request.user.is_anonymous
-                and not request.user.has_perm("documents.add_documentupload_all")
-                and user.id != request.user.pk
-            ):
-                return response.Response(
-                    {"error": _("Not allowed to upload documents with this user.")},
-                    status=status.HTTP_403_FORBIDDEN,
-                )
+class DocumentUploadInitiate(generics.CreateAPIView):
+    """/documents/uploads/initiate route."""
 
-        if "validated_date" in request.data and (
-            request.user.is_anonymous or not request.user.has_perm("documents.add_documentupload_all")
-        ):
+    permission_classes = [AllowAny]
+    serializer_class = DocumentUploadInitiateSerializer
+
+    @extend_schema(
+        responses={
+            status.HTTP_201_CREATED: OpenApiTypes.OBJECT,
+            status.HTTP_400_BAD_REQUEST: None,
+            status.HTTP_403_FORBIDDEN: None,
+            status.HTTP_404_NOT_FOUND: None,
+            status.HTTP_415_UNSUPPORTED_MEDIA_TYPE: None,
+        },
+        tags=["documents/uploads"],
+    )
+    def post(self, request, *args, **kwargs):
+        """Start a direct upload of a file to S3, returning presigned URLs to send each part of the file."""
+        if settings.USE_S3 is False:
             return response.Response(
-                {"error": _("Not allowed to validate documents.")},
-                status=status.HTTP_403_FORBIDDEN,
+                {"error": _("Direct uploads are only available with S3 storage.")},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
-        if association is not None and user is not None:
+        try:
+            serializer = self.get_serializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+        except ValidationError as error:
             return response.Response(
-                {"error": _("A document upload can only have one affectation.")},
+                {"error": error.detail},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        if association is None and user is None:
+        upload_data = {key: value for key, value in serializer.data.items() if value is not None}
+        document_upload_data, error_response = check_document_upload_data(request.user, upload_data)
+        if error_response is not None:
+            return error_response
+
+        if upload_data["content_type"] not in document_upload_data["document"].mime_types:
             return response.Response(
-                {"error": _("No user or association specified in the new document upload.")},
+                {"error": _("Wrong media type for this document.")},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            )
+
+        parts_count = math.ceil(upload_data["size"] / settings.DOCUMENTS_UPLOADS_PART_SIZE)
+        if parts_count > S3_MAX_PARTS or upload_data["size"] > settings.DOCUMENTS_UPLOADS_MAX_SIZE:
+            return response.Response(
+                {"error": _("File is too large.")},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        if not document.is_multiple and existing_document.count() > 0:
+        s3_client = get_s3_client()
+        key = f"{settings.S3_UPLOADS_STAGING_FILEPATH}/{uuid.uuid4()}"
+        upload_id = s3_client.create_multipart_upload(
+            Bucket=settings.AWS_STORAGE_BUCKET_NAME,
+            Key=key,
+            ContentType=upload_data["content_type"],
+        )["UploadId"]
+        parts = [
+            {
+                "part_number": part_number,
+                "url": s3_client.generate_presigned_url(
+                    "upload_part",
+                    Params={
+                        "Bucket": settings.AWS_STORAGE_BUCKET_NAME,
+                        "Key": key,
+                        "UploadId": upload_id,
+                        "PartNumber": part_number,
+                    },
+                    ExpiresIn=settings.DOCUMENTS_UPLOADS_EXPIRE,
+                ),
+            }
+            for part_number in range(1, parts_count + 1)
+        ]
+        upload_token = signing.dumps(
+            {**upload_data, "key": key, "upload_id": upload_id, "requester": request.user.pk},
+            salt=DIRECT_UPLOAD_SALT,
+        )
+        return response.Response(
+            {"upload_token": upload_token, "part_size": settings.DOCUMENTS_UPLOADS_PART_SIZE, "parts": parts},
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class DocumentUploadComplete(generics.CreateAPIView):
+    """/documents/uploads/complete route."""
+
+    permission_classes = [AllowAny]
+    serializer_class = DocumentUploadCompleteSerializer
+
+    @extend_schema(
+        responses={
+            status.HTTP_202_ACCEPTED: StagedDocumentUploadSerializer,
+            status.HTTP_400_BAD_REQUEST: None,
+            status.HTTP_403_FORBIDDEN: None,
+            status.HTTP_404_NOT_FOUND: None,
+        },
+        tags=["documents/uploads"],
+    )
+    def post(self, request, *args, **kwargs):
+        """Finalize a direct upload of a file to S3, queuing its encryption and the creation of the document upload."""
+        if settings.USE_S3 is False:
             return response.Response(
-                {"error": _("Document cannot be submitted multiple times.")},
+                {"error": _("Direct uploads are only available with S3 storage.")},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
@@ -274,62 +438,108 @@ class DocumentUploadListCreate(generics.ListCreateAPIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        if request.data["path_file"].content_type not in document.mime_types:
+        try:
+            upload_data = signing.loads(
+                serializer.validated_data["upload_token"],
+                salt=DIRECT_UPLOAD_SALT,
+                max_age=settings.DOCUMENTS_UPLOADS_EXPIRE,
+            )
+        except signing.BadSignature:
             return response.Response(
-                {"error": _("Wrong media type for this document.")},
-                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                {"error": _("Upload token is invalid or expired.")},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
-        if document.process_type in Document.ProcessType.get_validated_documents():
-            current_site = get_current_site(request)
-            context = {
-                "site_domain": f"https://{current_site.domain}",
-                "site_name": current_site.name,
-                "document_url": f"{settings.EMAIL_TEMPLATE_FRONTEND_URL}{settings.EMAIL_TEMPLATE_DOCUMENT_VALIDATE_PATH}",
-            }
-
-            template = MailTemplate.objects.get(code="MANAGER_DOCUMENT_CREATION")
-            managers_emails = []
-            if association is not None:
-                context["document_url"] += str(association.id)
-                managers_emails = list(
-                    Institution.objects.get(id=association.institution_id)
-                    .default_institution_managers()
-                    .values_list("email", flat=True)
-                )
-            if user is not None:
-                for user_to_check in User.objects.filter(is_superuser=False, is_staff=True):
-                    if user_to_check.has_perm("users.change_user_misc"):
-                        managers_emails.append(user_to_check.email)
-            send_mail(
-                from_=settings.DEFAULT_FROM_EMAIL,
-                to_=managers_emails,
-                subject=template.subject.replace("{{ site_name }}", context["site_name"]),
-                message=template.parse_vars(request.user, request, context),
+        if upload_data["requester"] != request.user.pk:
+            return response.Response(
+                {"error": _("Not allowed to complete this upload.")},
+                status=status.HTTP_403_FORBIDDEN,
             )
 
-            template = MailTemplate.objects.get(code="USER_OR_ASSOCIATION_DOCUMENT_CREATION")
-            email = ""
-            if association is not None:
-                email = association.email
-            if user is not None:
-                email = user.email
-            send_mail(
-                from_=settings.DEFAULT_FROM_EMAIL,
-                to_=email,
-                subject=template.subject.replace("{{ site_name }}", context["site_name"]),
-                message=template.parse_vars(request.user, request, context),
+        s3_client = get_s3_client()
+        s3_upload = {
+            "Bucket": settings.AWS_STORAGE_BUCKET_NAME,
+            "Key": upload_data["key"],
+            "UploadId": upload_data["upload_id"],
+        }
+        document_upload_data, error_response = check_document_upload_data(request.user, upload_data)
+        if error_response is not None:
+            s3_client.abort_multipart_upload(**s3_upload)
+            return error_response
+
+        try:
+            s3_client.complete_multipart_upload(
+                **s3_upload,
+                MultipartUpload={
+                    "Parts": [
+                        {"PartNumber": part["part_number"], "ETag": part["etag"]}
+                        for part in sorted(serializer.validated_data["parts"], key=lambda part: part["part_number"])
+                    ]
+                },
+            )
+        except ClientError:
+            s3_client.abort_multipart_upload(**s3_upload)
+            return response.Response(
+                {"error": _("Upload could not be completed.")},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
-        request.data["name"] = request.data["path_file"].name
-        document_upload_response = super().create(request, *args, **kwargs)
-        if document.acronym == "RIB":
-            History.objects.create(
-                action_title="DOCUMENT_UPLOAD_CHANGED",
-                action_user_id=request.user.pk,
-                document_upload_id=document_upload_response.data["id"],
+        try:
+            size = s3_client.head_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=upload_data["key"])[
+                "ContentLength"
+            ]
+        except ClientError:
+            return response.Response(
+                {"error": _("Upload could not be completed.")},
+                status=status.HTTP_400_BAD_REQUEST,
             )
-        return document_upload_response
+        if size > upload_data["size"] or size > settings.DOCUMENTS_UPLOADS_MAX_SIZE:
+            s3_client.delete_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=upload_data["key"])
+            return response.Response(
+                {"error": _("File is too large.")},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        with transaction.atomic():
+            staged_upload = StagedDocumentUpload.objects.create(
+                key=upload_data["key"],
+                name=upload_data["name"],
+                content_type=upload_data["content_type"],
+                size=size,
+                document=document_upload_data["document"],
+                project=document_upload_data["project"],
+                association=document_upload_data["association"],
+                user=document_upload_data["user"],
+                validated_date=upload_data.get("validated_date"),
+                requester_id=request.user.pk,
+            )
+            transaction.on_commit(store_staged_uploads_in_background)
+        return response.Response(
+            StagedDocumentUploadSerializer(staged_upload).data,
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class DocumentUploadCompleteRetrieve(generics.RetrieveAPIView):
+    """/documents/uploads/complete/{id} route."""
+
+    permission_classes = [IsAuthenticated]
+    serializer_class = StagedDocumentUploadSerializer
+
+    def get_queryset(self):
+        return StagedDocumentUpload.objects.filter(requester_id=self.request.user.pk)
+
+    @extend_schema(
+        responses={
+            status.HTTP_200_OK: StagedDocumentUploadSerializer,
+            status.HTTP_401_UNAUTHORIZED: None,
+            status.HTTP_404_NOT_FOUND: None,
+        },
+        tags=["documents/uploads"],
+    )
+    def get(self, request, *args, **kwargs):
+        """Retrieve the status of a completed direct upload, and the created document upload once stored."""
+        return self.retrieve(request, *args, **kwargs)
 
 
 class DocumentUploadRetrieveUpdateDestroy(generics.RetrieveUpdateDestroyAPIView):
@@ -367,7 +577,9 @@ class DocumentUploadRetrieveUpdateDestroy(generics.RetrieveUpdateDestroyAPIView)
         if not request.user.has_perm("documents.view_documentupload_all") and (
             (
                 document_upload.project_id is not None
-                and not request.user.can_access_project(Project.visible_objects.get(id=document_upload.project_id))
+                and not request.user.filter_accessible_projects(
+                    Project.visible_objects.filter(id=document_upload.project_id)
+                ).exists()
             )
             or (document_upload.user_id is not None and request.user.pk != document_upload.user_id)
             or (
@@ -401,6 +613,7 @@ class DocumentUploadRetrieveUpdateDestroy(generics.RetrieveUpdateDestroyAPIView)
         },
         tags=["documents/uploads"],
     )
+    @transaction.atomic
     def patch(self, request, *args, **kwargs):
         """Update document upload details."""
         try:
@@ -460,11 +673,13 @@ class DocumentUploadRetrieveUpdateDestroy(generics.RetrieveUpdateDestroyAPIView)
                 email = Association.objects.get(id=document_upload.association_id).email
             if document_upload.user_id is not None:
                 email = User.objects.get(id=document_upload.user_id).email
-            send_mail(
+            queue_mail(
                 from_=settings.DEFAULT_FROM_EMAIL,
                 to_=email,
                 subject=template.subject.replace("{{ site_name }}", context["site_name"]),
                 message=template.parse_vars(request.user, request, context),
+                template=template,
+                obj=document_upload,
             )
 
         return self.partial_update(request, *args, **kwargs)
@@ -478,6 +693,7 @@ class DocumentUploadRetrieveUpdateDestroy(generics.RetrieveUpdateDestroyAPIView)
         },
         tags=["documents/uploads"],
     )
+    @transaction.atomic
     def delete(self, request, *args, **kwargs):
         """Destroys an uploaded document."""
         try:
@@ -529,11 +745,13 @@ class DocumentUploadRetrieveUpdateDestroy(generics.RetrieveUpdateDestroyAPIView)
                     if user_to_check.has_perm("users.change_user_misc"):
                         managers_emails.append(user_to_check.email)
             context["manager_email_address"] = ','.join(managers_emails)
-            send_mail(
+            queue_mail(
                 from_=settings.DEFAULT_FROM_EMAIL,
                 to_=email,
                 subject=template.subject.replace("{{ site_name }}", context["site_name"]),
                 message=template.parse_vars(request.user, request, context),
+                template=template,
+                obj=document_upload,
             )
 
         return self.destroy(request, *args, **kwargs)
@@ -568,38 +786,37 @@ class DocumentUploadFileList(generics.ListAPIView):
         if project is not None and project != "":
             self.queryset = self.queryset.filter(project_id=project)
 
-        filtered_uploads_ids = []
-        for document_upload in self.get_queryset():
-            if not request.user.has_perm("documents.view_documentupload_all") and (
+        if not request.user.has_perm("documents.view_documentupload_all"):
+            self.queryset = self.queryset.filter(
                 (
-                    document_upload.project_id is not None
-                    and not request.user.can_access_project(Project.visible_objects.get(id=document_upload.project_id))
+                    models.Q(project_id__isnull=True)
+                    | models.Q(
+                        project_id__in=request.user.filter_accessible_projects(Project.visible_objects.all()).values(
+                            "id"
+                        )
+                    )
                 )
-                or (document_upload.user_id is not None and request.user.pk != document_upload.user_id)
-                or (
-                    document_upload.association_id is not None
-                    and not request.user.is_in_association(document_upload.association_id)
+                & (models.Q(user_id__isnull=True) | models.Q(user_id=request.user.pk))
+                & (
+                    models.Q(association_id__isnull=True)
+                    | models.Q(
+                        association_id__in=AssociationUser.objects.filter(
+                            user_id=request.user.pk, is_validated_by_admin=True
+                        ).values("association_id")
+                    )
                 )
-            ):
-                filtered_uploads_ids.append(document_upload.id)
-        self.queryset = self.queryset.exclude(id__in=filtered_uploads_ids)
-
-        buffer = io.BytesIO()
-        archive = zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED)
-        for document_upload in self.get_queryset():
-            file = document_upload.path_file
-            archive.writestr(
-                os.path.basename(document_upload.path_file.name),
-                bytes(file.open().read()),
             )
-        archive.close()
-        buffer.seek(0)
-
-        res = HttpResponse(buffer.getvalue())
-        res['Content-Type'] = "application/x-zip-compressed"
-        res['Content-Disposition'] = "attachment; filename=documents.zip"
 
-        return res
+        return generate_zip_response(
+            "documents",
+            [
+                (
+                    f"{document_upload.id}_{document_upload.name or os.path.basename(document_upload.path_file.name)}",
+                    document_upload.path_file,
+                )
+                for document_upload in self.get_queryset().order_by("id")
+            ],
+        )
 
 
 class DocumentUploadFileRetrieve(generics.RetrieveAPIView):
@@ -631,7 +848,9 @@ class DocumentUploadFileRetrieve(generics.RetrieveAPIView):
         if not request.user.has_perm("documents.view_documentupload_all") and (
             (
                 document_upload.project_id is not None
-                and not request.user.can_access_project(Project.visible_objects.get(id=document_upload.project_id))
+                and not request.user.filter_accessible_projects(
+                    Project.visible_objects.filter(id=document_upload.project_id)
+                ).exists()
             )
             or (document_upload.user_id is not None and request.user.pk != document_upload.user_id)
             or (
@@ -644,9 +863,4 @@ class DocumentUploadFileRetrieve(generics.RetrieveAPIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        file = document_upload.path_file
-        return FileResponse(
-            file.open(),
-            as_attachment=False,
-            filename=document_upload.name,
-        )
+        return generate_file_response(request, document_upload.path_file, document_upload.name)
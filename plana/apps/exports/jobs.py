@@ -0,0 +1,210 @@
+"""
+Queue of export jobs stored in the database, without any external broker.
+
+Jobs are run by background threads of API processes once queued, and by the run_export_jobs command
+(picking up jobs interrupted by a restart). Workers claim jobs with row locks, so a job is only run once.
+"""
+
+import datetime
+import hashlib
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.files.base import File
+from django.db import connections, models, transaction
+from django.http import HttpRequest, QueryDict
+from django.urls import resolve
+from django.utils import timezone
+from django.utils.http import parse_header_parameters
+from rest_framework import status
+from rest_framework.authentication import BaseAuthentication
+
+from plana.apps.exports.models import ExportJob
+from plana.storages import delete_with_files
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_export_jobs_dispatcher():
+    """Return the executor running export jobs in the background, shared by the whole process."""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = ThreadPoolExecutor(
+                    max_workers=settings.EXPORT_JOBS_WORKERS, thread_name_prefix="exports"
+                )
+    return _dispatcher
+
+
+def get_export_user_scope(user):
+    """Return the scope of data a user can export, users with the same scope sharing export jobs."""
+    if user.has_perm("projects.view_project_any_fund") and user.has_perm("projects.view_project_any_institution"):
+        return "all"
+    return f"user_{user.pk}"
+
+
+def get_export_job_key(request, user_scope, edition_date):
+    """Return the key of an export, identical requests on unchanged data having the same key."""
+    key_data = [
+        request.resolver_match.view_name,
+        request.resolver_match.kwargs,
+        sorted(request.GET.lists()),
+        user_scope,
+        None if edition_date is None else edition_date.isoformat(),
+    ]
+    return hashlib.sha256(json.dumps(key_data, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def queue_export_job(request, edition_date):
+    """
+    Queue the export of the GET route of a request, or return the job of an identical export.
+
+    edition_date is the last edition date of exported data, exports being generated again once data is edited.
+    """
+    user_scope = get_export_user_scope(request.user)
+    key = get_export_job_key(request, user_scope, edition_date)
+    job = (
+        ExportJob.objects.filter(key=key)
+        .exclude(export_status=ExportJob.ExportJobStatus.EXPORT_FAILED)
+        .filter(models.Q(expiration_date__isnull=True) | models.Q(expiration_date__gt=timezone.now()))
+        .order_by("-creation_date")
+        .first()
+    )
+    if job is None:
+        job = ExportJob.objects.create(
+            key=key,
+            path=request.get_full_path(),
+            base_url=request.build_absolute_uri("/"),
+            user=request.user,
+            user_scope=user_scope,
+        )
+        transaction.on_commit(run_export_jobs_in_background)
+    return job
+
+
+class ExportJobRequest(HttpRequest):
+    """GET request of an exported route, replayed by an export job."""
+
+    def __init__(self, job):
+        super().__init__()
+        path, _separator, query_string = job.path.partition("?")
+        self.base_url = urlsplit(job.base_url)
+        self.method = "GET"
+        self.path = self.path_info = path
+        self.GET = QueryDict(query_string)
+        self.META["QUERY_STRING"] = query_string
+        self.META["HTTP_HOST"] = self.base_url.netloc
+        self.export_job = job
+
+    def _get_scheme(self):
+        return self.base_url.scheme
+
+
+class ExportJobAuthentication(BaseAuthentication):
+    """Authenticate replayed requests as the user who asked for the export."""
+
+    def authenticate(self, request):
+        return request._request.export_job.user, None
+
+
+def get_export_response(job):
+    """Return the response of the exported route, checking permissions of the user who asked for the export."""
+    request = ExportJobRequest(job)
+    match = resolve(request.path_info)
+    view = match.func.cls.as_view(authentication_classes=[ExportJobAuthentication])
+    return view(request, *match.args, **match.kwargs)
+
+
+def run_export_job(job):
+    """Generate and store the file of a claimed export job."""
+    try:
+        export_response = get_export_response(job)
+        if export_response.status_code != status.HTTP_200_OK:
+            job.export_status = ExportJob.ExportJobStatus.EXPORT_FAILED
+            error_data = getattr(export_response, "data", None) or {}
+            job.error = str(error_data.get("error", error_data.get("detail", export_response.status_code)))
+        else:
+            ExportJob.objects.filter(id=job.id).update(progress=90)
+            _disposition, disposition_params = parse_header_parameters(export_response.get("Content-Disposition", ""))
+            job.filename = disposition_params.get("filename") or str(job.id)
+            with SpooledTemporaryFile(max_size=settings.EXPORT_JOBS_MAX_MEMORY_SIZE) as export_file:
+                if export_response.streaming:
+                    for chunk in export_response.streaming_content:
+                        export_file.write(chunk)
+                else:
+                    export_file.write(export_response.content)
+                export_file.seek(0)
+                job.path_file.save(job.filename, File(export_file), save=False)
+            job.export_status = ExportJob.ExportJobStatus.EXPORT_DONE
+            job.progress = 100
+    except Exception as error:
+        logging.getLogger(__name__).exception(error)
+        job.export_status = ExportJob.ExportJobStatus.EXPORT_FAILED
+        job.error = str(error)
+
+    job.end_date = timezone.now()
+    job.expiration_date = job.end_date + datetime.timedelta(seconds=settings.EXPORT_JOBS_RESULT_EXPIRE)
+    job.save()
+
+
+def claim_next_export_job():
+    """Mark the oldest pending export job as running and return it (None if no job is pending)."""
+    with transaction.atomic():
+        job = (
+            ExportJob.objects.select_for_update(skip_locked=True)
+            .filter(export_status=ExportJob.ExportJobStatus.EXPORT_PENDING)
+            .order_by("creation_date")
+            .first()
+        )
+        if job is not None:
+            job.export_status = ExportJob.ExportJobStatus.EXPORT_RUNNING
+            job.progress = 10
+            job.start_date = timezone.now()
+            job.save(update_fields=["export_status", "progress", "start_date"])
+    return job
+
+
+def run_pending_export_jobs():
+    """
+    Run pending export jobs until none is left, and return how many were run.
+
+    Jobs running for more than EXPORT_JOBS_TIMEOUT seconds are considered interrupted and queued again.
+    """
+    ExportJob.objects.filter(
+        export_status=ExportJob.ExportJobStatus.EXPORT_RUNNING,
+        start_date__lt=timezone.now() - datetime.timedelta(seconds=settings.EXPORT_JOBS_TIMEOUT),
+    ).update(export_status=ExportJob.ExportJobStatus.EXPORT_PENDING, progress=0)
+
+    jobs_count = 0
+    while True:
+        job = claim_next_export_job()
+        if job is None:
+            return jobs_count
+        run_export_job(job)
+        jobs_count += 1
+
+
+def run_export_jobs_in_background():
+    """Run pending export jobs in a background thread."""
+
+    def run():
+        try:
+            run_pending_export_jobs()
+        except Exception as error:
+            logging.getLogger(__name__).exception(error)
+        finally:
+            connections.close_all()
+
+    return get_export_jobs_dispatcher().submit(run)
+
+
+def delete_expired_export_jobs():
+    """Delete expired export jobs and their files, returning the files deletion report."""
+    return delete_with_files(ExportJob.objects.filter(expiration_date__lt=timezone.now()))
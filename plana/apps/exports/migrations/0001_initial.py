@@ -0,0 +1,72 @@
+# Generated by Django 4.2.16 on 2026-10-17 13:17
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import plana.apps.exports.models.export_job
+import plana.storages
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('key', models.CharField(db_index=True, max_length=64, verbose_name='Key')),
+                ('path', models.TextField(verbose_name='Exported route path')),
+                ('base_url', models.CharField(max_length=250, verbose_name='Base URL')),
+                ('user_scope', models.CharField(max_length=64, verbose_name='User scope')),
+                (
+                    'export_status',
+                    models.CharField(
+                        choices=[
+                            ('EXPORT_PENDING', 'Export Pending'),
+                            ('EXPORT_RUNNING', 'Export Running'),
+                            ('EXPORT_DONE', 'Export Done'),
+                            ('EXPORT_FAILED', 'Export Failed'),
+                        ],
+                        db_index=True,
+                        default='EXPORT_PENDING',
+                        max_length=32,
+                        verbose_name='Export Status',
+                    ),
+                ),
+                ('progress', models.PositiveSmallIntegerField(default=0, verbose_name='Progress')),
+                ('error', models.TextField(default='', verbose_name='Error')),
+                ('filename', models.CharField(default='', max_length=250, verbose_name='Filename')),
+                (
+                    'path_file',
+                    plana.storages.DynamicStorageFileField(
+                        blank=True,
+                        upload_to=plana.apps.exports.models.export_job.get_file_path,
+                        verbose_name='Exported file',
+                    ),
+                ),
+                ('creation_date', models.DateTimeField(auto_now_add=True, verbose_name='Creation date')),
+                ('start_date', models.DateTimeField(null=True, verbose_name='Start date')),
+                ('end_date', models.DateTimeField(null=True, verbose_name='End date')),
+                ('expiration_date', models.DateTimeField(db_index=True, null=True, verbose_name='Expiration date')),
+                (
+                    'user',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name='User',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Export job',
+                'verbose_name_plural': 'Export jobs',
+            },
+        ),
+    ]
@@ -0,0 +1 @@
+from .export_job import ExportJob
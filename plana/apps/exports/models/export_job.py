@@ -0,0 +1,67 @@
+"""Models describing PDF exports generated in the background."""
+
+import os
+import uuid
+
+from django.conf import settings
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from plana.apps.users.models.user import User
+from plana.storages import DynamicStorageFileField, LocalDynamicStorageFileField
+
+if settings.USE_S3 is False:
+    DynamicStorageFileField = LocalDynamicStorageFileField
+
+
+def get_file_path(instance, filename):
+    """Is used by export job path_file field."""
+    return os.path.join(
+        settings.S3_EXPORTS_FILEPATH if hasattr(settings, "S3_EXPORTS_FILEPATH") else "",
+        f"{instance.id}{os.path.splitext(filename)[1]}",
+    )
+
+
+class ExportJob(models.Model):
+    """Main model."""
+
+    class ExportJobStatus(models.TextChoices):
+        """List of statuses an export job can have."""
+
+        EXPORT_PENDING = "EXPORT_PENDING", _("Export Pending")
+        EXPORT_RUNNING = "EXPORT_RUNNING", _("Export Running")
+        EXPORT_DONE = "EXPORT_DONE", _("Export Done")
+        EXPORT_FAILED = "EXPORT_FAILED", _("Export Failed")
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    key = models.CharField(_("Key"), max_length=64, db_index=True)
+    path = models.TextField(_("Exported route path"))
+    base_url = models.CharField(_("Base URL"), max_length=250)
+    user = models.ForeignKey(
+        User,
+        verbose_name=_("User"),
+        on_delete=models.CASCADE,
+    )
+    user_scope = models.CharField(_("User scope"), max_length=64)
+    export_status = models.CharField(
+        _("Export Status"),
+        max_length=32,
+        choices=ExportJobStatus.choices,
+        default="EXPORT_PENDING",
+        db_index=True,
+    )
+    progress = models.PositiveSmallIntegerField(_("Progress"), default=0)
+    error = models.TextField(_("Error"), default="")
+    filename = models.CharField(_("Filename"), max_length=250, default="")
+    path_file = DynamicStorageFileField(_("Exported file"), upload_to=get_file_path, blank=True)
+    creation_date = models.DateTimeField(_("Creation date"), auto_now_add=True)
+    start_date = models.DateTimeField(_("Start date"), null=True)
+    end_date = models.DateTimeField(_("End date"), null=True)
+    expiration_date = models.DateTimeField(_("Expiration date"), null=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.path} ({self.export_status})"
+
+    class Meta:
+        verbose_name = _("Export job")
+        verbose_name_plural = _("Export jobs")
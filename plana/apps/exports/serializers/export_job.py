@@ -0,0 +1,22 @@
+"""Serializer describing fields used on export jobs."""
+
+from rest_framework import serializers
+
+from plana.apps.exports.models.export_job import ExportJob
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    """Main serializer."""
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            "id",
+            "export_status",
+            "progress",
+            "error",
+            "filename",
+            "creation_date",
+            "end_date",
+            "expiration_date",
+        ]
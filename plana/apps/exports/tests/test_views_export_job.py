@@ -0,0 +1,142 @@
+"""List of tests done on export jobs views."""
+
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from plana.apps.exports.jobs import delete_expired_export_jobs, run_pending_export_jobs
+from plana.apps.exports.models.export_job import ExportJob
+from plana.apps.projects.models.project import Project
+
+
+class ExportJobsViewsTests(TestCase):
+    """Main tests class."""
+
+    fixtures = [
+        "account_emailaddress.json",
+        "associations_activityfield.json",
+        "associations_association.json",
+        "auth_group.json",
+        "auth_group_permissions.json",
+        "auth_permission.json",
+        "commissions_fund.json",
+        "commissions_commission.json",
+        "commissions_commissionfund.json",
+        "documents_document.json",
+        "institutions_institution.json",
+        "institutions_institutioncomponent.json",
+        "projects_category.json",
+        "projects_project.json",
+        "projects_projectcategory.json",
+        "projects_projectcommissionfund.json",
+        "users_associationuser.json",
+        "users_groupinstitutionfunduser.json",
+        "users_user.json",
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        """Start clients used on tests."""
+        cls.client = Client()
+        url_login = reverse("rest_login")
+
+        cls.student_misc_user_name = "etudiant-porteur@mail.tld"
+        cls.student_misc_client = Client()
+        data_student_misc = {
+            "username": cls.student_misc_user_name,
+            "password": "motdepasse",
+        }
+        cls.response = cls.student_misc_client.post(url_login, data_student_misc)
+
+        cls.student_offsite_user_name = "etudiant-asso-hors-site@mail.tld"
+        cls.student_offsite_client = Client()
+        data_student_offsite = {
+            "username": cls.student_offsite_user_name,
+            "password": "motdepasse",
+        }
+        cls.response = cls.student_offsite_client.post(url_login, data_student_offsite)
+
+    def test_post_export_anonymous(self):
+        """
+        POST /projects/{id}/pdf_export .
+
+        - An anonymous user cannot execute this request.
+        """
+        response = self.client.post("/projects/3/pdf_export")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_post_export_coalesced(self):
+        """
+        POST /projects/{id}/pdf_export .
+
+        - The export is queued as a job.
+        - An identical request returns the same job.
+        - A request on edited data returns a new job.
+        """
+        response = self.student_misc_client.post("/projects/3/pdf_export")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job_id = response.data["id"]
+        self.assertEqual(response.data["export_status"], "EXPORT_PENDING")
+
+        response = self.student_misc_client.post("/projects/3/pdf_export")
+        self.assertEqual(response.data["id"], job_id)
+
+        Project.objects.filter(id=3).update(edition_date=timezone.now())
+        response = self.student_misc_client.post("/projects/3/pdf_export")
+        self.assertNotEqual(response.data["id"], job_id)
+
+    def test_get_export_job(self):
+        """
+        GET /exports/{id} .
+
+        - The job progress can be retrieved by the user who queued it.
+        - Other users cannot see the job.
+        - The exported file can be downloaded once the job is done, until it expires.
+        """
+        job_id = self.student_misc_client.post("/projects/3/pdf_export").data["id"]
+        self.assertEqual(run_pending_export_jobs(), 1)
+
+        response = self.student_misc_client.get(f"/exports/{job_id}")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["export_status"], "EXPORT_DONE")
+        self.assertEqual(response.data["progress"], 100)
+
+        response = self.student_offsite_client.get(f"/exports/{job_id}")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.student_misc_client.get(f"/exports/{job_id}/file")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(b"".join(response.streaming_content).startswith(b"%PDF"))
+
+        ExportJob.objects.filter(id=job_id).update(expiration_date=timezone.now())
+        response = self.student_misc_client.get(f"/exports/{job_id}/file")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        delete_expired_export_jobs()
+        self.assertFalse(ExportJob.objects.filter(id=job_id).exists())
+
+    def test_get_export_job_filename(self):
+        """
+        GET /exports/{id} .
+
+        - The filename of the exported file is kept, quoted or not in the exported route response.
+        """
+        job_id = self.student_misc_client.post("/commissions/1/export?mode=csv").data["id"]
+        run_pending_export_jobs()
+
+        response = self.student_misc_client.get(f"/exports/{job_id}")
+        self.assertEqual(response.data["export_status"], "EXPORT_DONE")
+        self.assertEqual(response.data["filename"], "commission_1_export.csv")
+
+    def test_get_export_job_failed(self):
+        """
+        GET /exports/{id} .
+
+        - A job exporting a route returning an error is failed.
+        """
+        job_id = self.student_offsite_client.post("/projects/3/pdf_export").data["id"]
+        run_pending_export_jobs()
+
+        response = self.student_offsite_client.get(f"/exports/{job_id}")
+        self.assertEqual(response.data["export_status"], "EXPORT_FAILED")
+        self.assertNotEqual(response.data["error"], "")
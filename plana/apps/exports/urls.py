@@ -0,0 +1,10 @@
+"""List of URLs directly linked to operations that can be done on export jobs."""
+
+from django.urls import path
+
+from .views.export_job import ExportJobFileRetrieve, ExportJobRetrieve
+
+urlpatterns = [
+    path("<uuid:pk>", ExportJobRetrieve.as_view(), name="export_job_retrieve"),
+    path("<uuid:pk>/file", ExportJobFileRetrieve.as_view(), name="export_job_file_retrieve"),
+]
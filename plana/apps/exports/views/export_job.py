@@ -0,0 +1,99 @@
+"""Views directly linked to export jobs."""
+
+import abc
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.utils import extend_schema
+from rest_framework import generics, response, status
+from rest_framework.permissions import IsAuthenticated
+
+from plana.apps.exports.jobs import get_export_user_scope, queue_export_job
+from plana.apps.exports.models.export_job import ExportJob
+from plana.apps.exports.serializers.export_job import ExportJobSerializer
+from plana.utils import generate_file_response
+
+
+class ExportJobCreateMixin(metaclass=abc.ABCMeta):
+    """Add a POST method to an export route, queuing the export as a job returned by the /exports/{id} route."""
+
+    def get_permissions(self):
+        if self.request.method == "POST":
+            self.permission_classes = [IsAuthenticated]
+        return super().get_permissions()
+
+    @abc.abstractmethod
+    def get_export_edition_date(self, **kwargs):
+        """Return the last edition date of exported data, a new export being generated once it changes."""
+
+    @extend_schema(
+        request=None,
+        responses={
+            status.HTTP_202_ACCEPTED: ExportJobSerializer,
+            status.HTTP_401_UNAUTHORIZED: None,
+        },
+    )
+    def post(self, request, *args, **kwargs):
+        """Queue the export (the job of an identical export is returned if existing)."""
+        job = queue_export_job(request, self.get_export_edition_date(**kwargs))
+        return response.Response(ExportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+class ExportJobRetrieve(generics.RetrieveAPIView):
+    """/exports/{id} route."""
+
+    permission_classes = [IsAuthenticated]
+    queryset = ExportJob.objects.all()
+    serializer_class = ExportJobSerializer
+
+    @extend_schema(
+        responses={
+            status.HTTP_200_OK: ExportJobSerializer,
+            status.HTTP_401_UNAUTHORIZED: None,
+            status.HTTP_404_NOT_FOUND: None,
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        """Retrieve the progress of an export."""
+        try:
+            job = self.queryset.get(id=kwargs["pk"], user_scope=get_export_user_scope(request.user))
+        except ObjectDoesNotExist:
+            return response.Response(
+                {"error": _("Export job does not exist.")},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        return response.Response(self.get_serializer(job).data)
+
+
+class ExportJobFileRetrieve(generics.RetrieveAPIView):
+    """/exports/{id}/file route."""
+
+    permission_classes = [IsAuthenticated]
+    queryset = ExportJob.objects.all()
+    serializer_class = ExportJobSerializer
+
+    @extend_schema(
+        responses={
+            status.HTTP_200_OK: None,
+            status.HTTP_401_UNAUTHORIZED: None,
+            status.HTTP_404_NOT_FOUND: None,
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        """Retrieve the file generated by an export (until its expiration)."""
+        try:
+            job = self.queryset.get(
+                id=kwargs["pk"],
+                user_scope=get_export_user_scope(request.user),
+                export_status=ExportJob.ExportJobStatus.EXPORT_DONE,
+                expiration_date__gt=timezone.now(),
+            )
+        except ObjectDoesNotExist:
+            return response.Response(
+                {"error": _("Export file does not exist.")},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        return generate_file_response(request, job.path_file, job.filename)
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.16 on 2026-10-17 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0047_alter_projectcommissionfund_last_notification_file'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='project',
+            name='edition_date',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Edition date'),
+        ),
+    ]
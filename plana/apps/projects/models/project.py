@@ -167,7 +167,7 @@ class Project(models.Model):
         default="PROJECT_DRAFT",
     )
     creation_date = models.DateTimeField(_("Creation date"), auto_now_add=True)
-    edition_date = models.DateTimeField(_("Edition date"), auto_now=True)
+    edition_date = models.DateTimeField(_("Edition date"), auto_now=True, db_index=True)
     processing_date = models.DateTimeField(_("Processing date"), null=True)
     outcome = models.PositiveIntegerField(_("Outcome"), default=0)
     income = models.PositiveIntegerField(_("Income"), default=0)
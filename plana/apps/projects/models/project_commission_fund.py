@@ -8,10 +8,10 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 
 from plana.apps.commissions.models.commission_fund import CommissionFund
-from plana.storages import DynamicStorageFileField
+from plana.storages import DynamicStorageFileField, LocalDynamicStorageFileField
 
 if settings.USE_S3 is False:
-    DynamicStorageFileField = models.FileField
+    DynamicStorageFileField = LocalDynamicStorageFileField
 
 
 def get_file_path(instance, filename):
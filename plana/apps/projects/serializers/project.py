@@ -1,14 +1,11 @@
 """Serializers describing fields used on projects."""
 
-from django.core.exceptions import ObjectDoesNotExist
 from django.urls import reverse
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
 from plana.apps.commissions.serializers.commission import CommissionSerializer
-from plana.apps.documents.models.document import Document
-from plana.apps.documents.models.document_upload import DocumentUpload
 from plana.apps.projects.models.project import Project
 from plana.apps.projects.serializers.category import CategorySerializer
 
@@ -110,14 +107,10 @@ class ProjectPartialDataSerializer(serializers.ModelSerializer):
 
     @extend_schema_field(OpenApiTypes.STR)
     def get_budget_file(self, project):
-        """Return a link to DocumentUploadFileRetrieve view for BUDGET_PREVISIONNEL."""
-        try:
-            budget_file = DocumentUpload.objects.get(
-                document_id=Document.objects.get(acronym="BUDGET_PREVISIONNEL"), project_id=project.id
-            )
-            return reverse('document_upload_file_retrieve', args=[budget_file.id])
-        except ObjectDoesNotExist:
+        """Return a link to DocumentUploadFileRetrieve view for BUDGET_PREVISIONNEL (budget_file_id is annotated)."""
+        if project.budget_file_id is None:
             return None
+        return reverse('document_upload_file_retrieve', args=[project.budget_file_id])
 
     class Meta:
         model = Project
@@ -1,7 +1,14 @@
 """List of tests done on projects models."""
 
+import datetime
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 
+from plana.apps.contents.models.setting import Setting
 from plana.apps.projects.models.category import Category
 from plana.apps.projects.models.project import Project
 from plana.apps.projects.models.project_category import ProjectCategory
@@ -49,6 +56,33 @@ class ProjectsModelsTests(TestCase):
         project = Project.visible_objects.first()
         self.assertEqual(str(project), project.name)
 
+    def test_visible_project_manager(self):
+        """Projects edited before the amount of years set in AMOUNT_YEARS_BEFORE_PROJECT_INVISIBILITY are hidden."""
+        self.assertFalse(Project.visible_objects.filter(id=9).exists())
+        self.assertTrue(Project.objects.filter(id=9).exists())
+        self.assertTrue(Project.visible_objects.filter(id=1).exists())
+
+        setting = Setting.objects.get(setting="AMOUNT_YEARS_BEFORE_PROJECT_INVISIBILITY")
+        setting.parameters["value"] = 1000
+        setting.save()
+        self.addCleanup(caches[settings.SETTINGS_CACHE_ALIAS].clear)
+        self.assertTrue(Project.visible_objects.filter(id=9).exists())
+
+    def test_visible_project_manager_queries(self):
+        """Fetching visible projects always costs one query, no matter how many projects are hidden."""
+        list(Project.visible_objects.all())
+        old_edition_date = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+        visible_projects_count = Project.visible_objects.count()
+        for amount_hidden_projects in [10, 1000]:
+            Project.objects.bulk_create(
+                [Project(name=f"Hidden project {index}") for index in range(amount_hidden_projects)]
+            )
+            Project.objects.filter(name__startswith="Hidden project").update(edition_date=old_edition_date)
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(len(list(Project.visible_objects.all())), visible_projects_count)
+            self.assertEqual(len(queries.captured_queries), 1)
+            self.assertNotIn(" IN ", queries.captured_queries[0]["sql"])
+
     def test_project_category_model(self):
         """There's at least one project category link in the database."""
         project_cat = ProjectCategory.objects.first()
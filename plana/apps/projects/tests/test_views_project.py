@@ -4,8 +4,9 @@ import datetime
 import json
 
 from django.core import mail
-from django.db import models
+from django.db import connection, models
 from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 
@@ -20,6 +21,7 @@ from plana.apps.projects.models.project import Project
 from plana.apps.projects.models.project_comment import ProjectComment
 from plana.apps.projects.models.project_commission_fund import ProjectCommissionFund
 from plana.apps.users.models.user import AssociationUser, GroupInstitutionFundUser
+from plana.libs.mail_template.outbox import deliver_outbox_mails
 
 
 class ProjectsViewsTests(TestCase):
@@ -187,6 +189,105 @@ class ProjectsViewsTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(content), association_projects_cnt)
 
+    def test_get_project_manager_permission_queries(self):
+        """
+        GET /projects/ .
+
+        - Permissions of the user doing the request are only loaded once.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.general_client.get("/projects/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        permission_queries = [query for query in queries.captured_queries if 'FROM "auth_permission"' in query["sql"]]
+        self.assertEqual(len(permission_queries), 1)
+
+    def test_get_project_list_queries(self):
+        """
+        GET /projects/ .
+
+        - The amount of queries doesn't depend on the amount of projects returned.
+        - Commission and budget file are still given for each project.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.general_client.get("/projects/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        queries_cnt = len(queries.captured_queries)
+
+        commission_fund = CommissionFund.objects.first()
+        budget_document = Document.objects.get(acronym="BUDGET_PREVISIONNEL")
+        projects = Project.objects.bulk_create(
+            [Project(name=f"Project {index}", association_id=2) for index in range(100)]
+        )
+        ProjectCommissionFund.objects.bulk_create(
+            [ProjectCommissionFund(project=project, commission_fund=commission_fund) for project in projects]
+        )
+        DocumentUpload.objects.bulk_create(
+            [DocumentUpload(name="budget", document=budget_document, project=project) for project in projects]
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.general_client.get("/projects/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries.captured_queries), queries_cnt)
+
+        content = json.loads(response.content.decode("utf-8"))
+        project_content = next(project for project in content if project["id"] == projects[0].id)
+        self.assertEqual(project_content["commission"]["id"], commission_fund.commission_id)
+        self.assertIsNotNone(project_content["budgetFile"])
+
+    def test_get_project_list_paginated(self):
+        """
+        GET /projects/ .
+
+        - Projects are paginated with cursors if page_size is given.
+        - Filters still work on paginated lists.
+        - Getting a page costs the same amount of queries and only fetches one page, whatever the table size.
+        """
+        response = self.general_client.get("/projects/")
+        projects_ids = [project["id"] for project in json.loads(response.content.decode("utf-8"))]
+
+        paginated_ids = []
+        url = "/projects/?page_size=3"
+        while url is not None:
+            response = self.general_client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            content = json.loads(response.content.decode("utf-8"))
+            self.assertLessEqual(len(content["results"]), 3)
+            paginated_ids += [project["id"] for project in content["results"]]
+            url = content["next"]
+        self.assertEqual(paginated_ids, projects_ids)
+
+        response = self.general_client.get("/projects/?page_size=3&association_id=2")
+        content = json.loads(response.content.decode("utf-8"))
+        self.assertTrue(all(project["association"] == 2 for project in content["results"]))
+
+        with CaptureQueriesContext(connection) as queries:
+            self.general_client.get("/projects/?page_size=3")
+        queries_cnt = len(queries.captured_queries)
+        Project.objects.bulk_create([Project(name=f"Project {index}", association_id=2) for index in range(1000)])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.general_client.get("/projects/?page_size=3")
+        self.assertEqual(len(queries.captured_queries), queries_cnt)
+        self.assertTrue(any("LIMIT 4" in query["sql"] for query in queries.captured_queries))
+
+    def test_get_project_scope_queries(self):
+        """
+        GET /projects/ .
+
+        - Funds, institutions and associations of the user doing the request are only loaded once.
+        - Projects are then filtered in a single query.
+        """
+        for route in ["/projects/", "/projects/commission_funds", "/projects/categories"]:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.fund_client.get(route)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            scope_queries = [
+                query
+                for query in queries.captured_queries
+                if query["sql"].startswith('SELECT "users_groupinstitutionfunduser"')
+                or query["sql"].startswith('SELECT "users_associationuser"')
+            ]
+            self.assertEqual(len(scope_queries), 2)
+
     def test_get_project_manager(self):
         """
         GET /projects/ .
@@ -870,6 +971,7 @@ class ProjectsViewsTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         project = Project.visible_objects.get(id=1)
         self.assertEqual(project.project_status, "PROJECT_PROCESSING")
+        deliver_outbox_mails()
         self.assertTrue(len(mail.outbox))
 
         response = self.student_president_client.patch(
@@ -991,6 +1093,7 @@ class ProjectsViewsTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         project = Project.visible_objects.get(id=2)
         self.assertEqual(project.project_status, "PROJECT_PROCESSING")
+        deliver_outbox_mails()
         self.assertTrue(len(mail.outbox))
 
     def test_patch_project_review_processing_association_status(self):
@@ -1016,4 +1119,5 @@ class ProjectsViewsTests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         project = Project.visible_objects.get(id=project_id)
         self.assertEqual(project.project_status, "PROJECT_REVIEW_PROCESSING")
+        deliver_outbox_mails()
         self.assertTrue(len(mail.outbox))
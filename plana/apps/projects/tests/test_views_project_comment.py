@@ -9,6 +9,7 @@ from rest_framework import status
 
 from plana.apps.projects.models.project import Project
 from plana.apps.projects.models.project_comment import ProjectComment
+from plana.libs.mail_template.outbox import deliver_outbox_mails
 
 
 class ProjectCommentLinksViewsTests(TestCase):
@@ -166,6 +167,7 @@ class ProjectCommentLinksViewsTests(TestCase):
             1,
             len(ProjectComment.objects.filter(project=post_data["project"], text=post_data["text"])),
         )
+        deliver_outbox_mails()
         self.assertTrue(len(mail.outbox))
         post_data = {"project": 2, "text": "Autre Commentaire"}
         response = self.general_client.post("/projects/comments", post_data)
@@ -175,6 +177,18 @@ class ProjectCommentLinksViewsTests(TestCase):
             len(ProjectComment.objects.filter(project=post_data["project"], text=post_data["text"])),
         )
 
+    def test_post_project_comments_notified_for_each_comment(self):
+        """
+        POST /projects/comments .
+
+        - Each comment on a project is notified, even if the previous notification is still pending.
+        """
+        for text in ["Commentaire", "Autre Commentaire"]:
+            response = self.general_client.post("/projects/comments", {"project": 1, "text": text})
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        deliver_outbox_mails()
+        self.assertEqual(len(mail.outbox), 2)
+
     def test_get_project_comments_by_id_anonymous(self):
         """
         GET /projects/{project_id}/comments .
@@ -1,6 +1,7 @@
 """List of tests done on links between projects and commission funds views."""
 
 import json
+from unittest.mock import patch
 
 from django.core import mail
 from django.test import Client, TestCase
@@ -588,6 +589,31 @@ class ProjectCommissionFundViewsTests(TestCase):
         project = Project.visible_objects.get(id=project_id)
         self.assertEqual(project.project_status, "PROJECT_CANCELED")
 
+    @patch("plana.utils.generate_pdf_binary", return_value=b"%PDF")
+    def test_patch_project_cf_amount_earned_notification_stored(self, generate_pdf_binary):
+        """
+        PATCH /projects/{project_id}/commission_funds/{commission_fund_id} .
+
+        - The notification is stored in the project commission fund.
+        - The same notification is read from the stored file instead of being rendered again.
+        """
+        project_id = 2
+        commission_fund_id = 1
+        for _ in range(2):
+            response = self.general_client.patch(
+                f"/projects/{project_id}/commission_funds/{commission_fund_id}",
+                {"amount_earned": 0},
+                content_type="application/json",
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(generate_pdf_binary.call_count, 1)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[1].attachments[0][1], b"%PDF")
+        project_commission_fund = ProjectCommissionFund.objects.get(
+            project_id=project_id, commission_fund_id=commission_fund_id
+        )
+        self.assertTrue(project_commission_fund.last_notification_file.name)
+
     def test_patch_project_cf_success(self):
         """
         PATCH /projects/{project_id}/commission_funds/{commission_fund_id} .
@@ -5,7 +5,7 @@ import datetime
 from django.conf import settings
 from django.contrib.sites.shortcuts import get_current_site
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import models
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, extend_schema
@@ -19,7 +19,6 @@ from plana.apps.contents.models.setting import Setting
 from plana.apps.documents.models.document import Document
 from plana.apps.documents.models.document_upload import DocumentUpload
 from plana.apps.history.models.history import History
-from plana.apps.institutions.models.institution import Institution
 from plana.apps.projects.models.project import Project
 from plana.apps.projects.models.project_comment import ProjectComment
 from plana.apps.projects.models.project_commission_fund import ProjectCommissionFund
@@ -30,14 +29,19 @@ from plana.apps.projects.serializers.project import (
     ProjectUpdateManagerSerializer,
     ProjectUpdateSerializer,
 )
+from plana.apps.users.access_scope import UserAccessScope
 from plana.apps.users.models.user import AssociationUser, User
 from plana.libs.mail_template.models import MailTemplate
-from plana.utils import send_mail, to_bool
+from plana.libs.mail_template.outbox import queue_mail
+from plana.pagination import OptionalCursorPagination
+from plana.utils import to_bool
 
 
 class ProjectListCreate(generics.ListCreateAPIView):
     """/projects/ route."""
 
+    pagination_class = OptionalCursorPagination
+    pagination_ordering = ("edition_date", "id")
     filter_backends = [filters.SearchFilter]
     permission_classes = [IsAuthenticated, DjangoModelPermissions]
     search_fields = [
@@ -50,7 +54,7 @@ class ProjectListCreate(generics.ListCreateAPIView):
     ]
 
     def get_queryset(self):
-        return Project.visible_objects.all().order_by("edition_date")
+        return Project.visible_objects.all().order_by("edition_date", "id")
 
     def get_serializer_class(self):
         if self.request.method == "POST":
@@ -149,64 +153,14 @@ class ProjectListCreate(generics.ListCreateAPIView):
                 manual_identifier__nospaces__unaccent__icontains=manual_identifier.replace(" ", "")
             )
 
-        if not request.user.has_perm("projects.view_project_any_fund"):
-            managed_funds = request.user.get_user_managed_funds()
-            if managed_funds.count() > 0:
-                user_funds_ids = managed_funds
-            else:
-                user_funds_ids = request.user.get_user_funds()
-        else:
-            user_funds_ids = Fund.objects.all().values_list("id")
-
-        if not request.user.has_perm("projects.view_project_any_institution"):
-            user_institutions_ids = request.user.get_user_managed_institutions()
-        else:
-            user_institutions_ids = Institution.objects.all().values_list("id")
-
-        if not request.user.has_perm("projects.view_project_any_fund") or not request.user.has_perm(
-            "projects.view_project_any_institution"
-        ):
-            user_associations_ids = request.user.get_user_associations()
-            user_projects_ids = Project.visible_objects.filter(
-                models.Q(user_id=request.user.pk) | models.Q(association_id__in=user_associations_ids)
-            ).values_list("id")
-            if not request.user.has_perm("projects.view_project_any_status"):
-                queryset = queryset.filter(
-                    models.Q(id__in=user_projects_ids)
-                    | models.Q(
-                        id__in=(
-                            ProjectCommissionFund.objects.filter(
-                                commission_fund_id__in=CommissionFund.objects.filter(
-                                    fund_id__in=user_funds_ids
-                                ).values_list("id")
-                            ).values_list("project_id")
-                        ),
-                        project_status__in=Project.ProjectStatus.get_commissionnable_project_statuses(),
-                    )
-                    | models.Q(
-                        association_id__in=Association.objects.filter(
-                            institution_id__in=user_institutions_ids
-                        ).values_list("id")
-                    )
-                )
-            else:
-                queryset = queryset.filter(
-                    models.Q(id__in=user_projects_ids)
-                    | models.Q(
-                        id__in=(
-                            ProjectCommissionFund.objects.filter(
-                                commission_fund_id__in=CommissionFund.objects.filter(
-                                    fund_id__in=user_funds_ids
-                                ).values_list("id")
-                            ).values_list("project_id")
-                        ),
-                    )
-                    | models.Q(
-                        association_id__in=Association.objects.filter(
-                            institution_id__in=user_institutions_ids
-                        ).values_list("id")
-                    )
-                )
+        access_scope = UserAccessScope(request.user)
+        queryset = queryset.filter(
+            access_scope.get_projects_filter(
+                "projects.view_project_any_fund",
+                "projects.view_project_any_institution",
+                "projects.view_project_any_status",
+            )
+        )
 
         if user is not None and user != "":
             queryset = queryset.filter(user_id=user)
@@ -245,16 +199,32 @@ class ProjectListCreate(generics.ListCreateAPIView):
             else:
                 queryset = queryset.exclude(project_status__in=inactive_statuses)
 
-        for project in queryset:
-            pcf = project.projectcommissionfund_set.first()
-            if pcf is not None:
-                project.commission = Commission.objects.get(
-                    id=CommissionFund.objects.get(id=pcf.commission_fund_id).commission_id
+        queryset = queryset.annotate(
+            commission_id=models.Subquery(
+                ProjectCommissionFund.objects.filter(project_id=models.OuterRef("id"))
+                .order_by("id")
+                .values("commission_fund__commission_id")[:1]
+            ),
+            budget_file_id=models.Subquery(
+                DocumentUpload.objects.filter(
+                    project_id=models.OuterRef("id"), document__acronym="BUDGET_PREVISIONNEL"
                 )
-            else:
-                project.commission = None
-
-        serializer = self.get_serializer_class()(queryset, many=True)
+                .order_by("id")
+                .values("id")[:1]
+            ),
+        )
+        projects = self.paginate_queryset(queryset)
+        if projects is None:
+            projects = list(queryset)
+        commissions = Commission.objects.in_bulk(
+            {project.commission_id for project in projects if project.commission_id is not None}
+        )
+        for project in projects:
+            project.commission = commissions.get(project.commission_id)
+
+        serializer = self.get_serializer_class()(projects, many=True)
+        if self.paginator.is_requested(request):
+            return self.get_paginated_response(serializer.data)
         return response.Response(serializer.data)
 
     @extend_schema(
@@ -646,6 +616,7 @@ class ProjectStatusUpdate(generics.UpdateAPIView):
             status.HTTP_404_NOT_FOUND: None,
         }
     )
+    @transaction.atomic
     def patch(self, request, *args, **kwargs):
         """Update project status."""
         try:
@@ -816,11 +787,13 @@ class ProjectStatusUpdate(generics.UpdateAPIView):
                 context["last_name"] = request.user.last_name
                 template = MailTemplate.objects.get(code=user_email_template_code)
 
-            send_mail(
+            queue_mail(
                 from_=settings.DEFAULT_FROM_EMAIL,
                 to_=managers_emails,
                 subject=template.subject.replace("{{ site_name }}", context["site_name"]),
                 message=template.parse_vars(request.user, request, context),
+                template=template,
+                obj=project,
             )
         elif new_project_status in Project.ProjectStatus.get_validator_project_statuses():
             mail_templates_codes_by_status = {
@@ -864,11 +837,13 @@ class ProjectStatusUpdate(generics.UpdateAPIView):
             elif project.user_id is not None:
                 email = User.objects.get(id=project.user_id).email
             context["manager_email_address"] = ','.join(project.get_project_default_manager_emails())
-            send_mail(
+            queue_mail(
                 from_=settings.DEFAULT_FROM_EMAIL,
                 to_=email,
                 subject=template.subject.replace("{{ site_name }}", context["site_name"]),
                 message=template.parse_vars(request.user, request, context),
+                template=template,
+                obj=project,
             )
 
         request.data["edition_date"] = datetime.date.today()
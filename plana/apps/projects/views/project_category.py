@@ -3,7 +3,6 @@
 import datetime
 
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import models
 from django.utils.translation import gettext_lazy as _
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, extend_schema
@@ -11,13 +10,11 @@ from rest_framework import generics, response, status
 from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import DjangoModelPermissions, IsAuthenticated
 
-from plana.apps.associations.models.association import Association
-from plana.apps.commissions.models import CommissionFund
 from plana.apps.projects.models.category import Category
 from plana.apps.projects.models.project import Project
 from plana.apps.projects.models.project_category import ProjectCategory
-from plana.apps.projects.models.project_commission_fund import ProjectCommissionFund
 from plana.apps.projects.serializers.project_category import ProjectCategorySerializer
+from plana.apps.users.access_scope import UserAccessScope
 
 
 class ProjectCategoryListCreate(generics.ListCreateAPIView):
@@ -47,46 +44,13 @@ class ProjectCategoryListCreate(generics.ListCreateAPIView):
         """List all links between categories and projects."""
         project_id = request.query_params.get("project_id")
 
-        user_funds_ids = []
-        user_institutions_ids = []
-        if not request.user.has_perm("projects.view_projectcategory_any_fund"):
-            managed_funds = request.user.get_user_managed_funds()
-            if managed_funds.count() > 0:
-                user_funds_ids = managed_funds
-            else:
-                user_funds_ids = request.user.get_user_funds()
-        if not request.user.has_perm("projects.view_projectcategory_any_institution"):
-            user_institutions_ids = request.user.get_user_managed_institutions()
-
-        if not request.user.has_perm("projects.view_projectcategory_any_fund") or not request.user.has_perm(
-            "projects.view_projectcategory_any_institution"
-        ):
-            user_associations_ids = request.user.get_user_associations()
-            user_projects_ids = Project.visible_objects.filter(
-                models.Q(user_id=request.user.pk) | models.Q(association_id__in=user_associations_ids)
-            ).values_list("id")
-
-            self.queryset = self.queryset.filter(
-                models.Q(project_id__in=user_projects_ids)
-                | models.Q(
-                    project_id__in=(
-                        ProjectCommissionFund.objects.filter(
-                            commission_fund_id__in=CommissionFund.objects.filter(
-                                fund_id__in=user_funds_ids
-                            ).values_list("id")
-                        ).values_list("project_id")
-                    )
-                )
-                | models.Q(
-                    project_id__in=(
-                        Project.visible_objects.filter(
-                            association_id__in=Association.objects.filter(
-                                institution_id__in=user_institutions_ids
-                            ).values_list("id")
-                        ).values_list("id")
-                    )
-                )
+        access_scope = UserAccessScope(request.user)
+        self.queryset = self.queryset.filter(
+            access_scope.get_project_categories_filter(
+                "projects.view_projectcategory_any_fund",
+                "projects.view_projectcategory_any_institution",
             )
+        )
 
         if project_id:
             self.queryset = self.queryset.filter(project_id=project_id)
@@ -5,6 +5,7 @@ import datetime
 from django.conf import settings
 from django.contrib.sites.shortcuts import get_current_site
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
 from django.utils.translation import gettext_lazy as _
 from drf_spectacular.utils import extend_schema
 from rest_framework import generics, response, status
@@ -21,7 +22,8 @@ from plana.apps.projects.serializers.project_comment import (
 )
 from plana.apps.users.models.user import AssociationUser, User
 from plana.libs.mail_template.models import MailTemplate
-from plana.utils import send_mail, to_bool
+from plana.libs.mail_template.outbox import queue_mail
+from plana.utils import to_bool
 
 
 class ProjectCommentCreate(generics.CreateAPIView):
@@ -41,6 +43,7 @@ class ProjectCommentCreate(generics.CreateAPIView):
         },
         tags=["projects/comments"],
     )
+    @transaction.atomic
     def post(self, request, *args, **kwargs):
         """Create a link between a comment and a project."""
         try:
@@ -72,6 +75,8 @@ class ProjectCommentCreate(generics.CreateAPIView):
         request.data["edition_date"] = today
         request.data["user"] = request.user.pk
 
+        project_comment_response = super().create(request, *args, **kwargs)
+
         if "is_visible" not in request.data or (
             request.data["is_visible"] != "" and to_bool(request.data["is_visible"]) is True
         ):
@@ -91,14 +96,20 @@ class ProjectCommentCreate(generics.CreateAPIView):
                     email = Association.objects.get(id=project.association_id).email
             elif project.user_id is not None:
                 email = User.objects.get(id=project.user_id).email
-            send_mail(
+            queue_mail(
                 from_=settings.DEFAULT_FROM_EMAIL,
                 to_=email,
                 subject=template.subject.replace("{{ site_name }}", context["site_name"]),
                 message=template.parse_vars(request.user, request, context),
+                template=template,
+                obj=self.project_comment,
             )
 
-        return super().create(request, *args, **kwargs)
+        return project_comment_response
+
+    def perform_create(self, serializer):
+        """Keep the created comment to notify it."""
+        self.project_comment = serializer.save()
 
 
 class ProjectCommentRetrieve(generics.RetrieveAPIView):
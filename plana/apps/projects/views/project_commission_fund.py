@@ -6,7 +6,6 @@ import locale
 from django.conf import settings
 from django.contrib.sites.shortcuts import get_current_site
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import models
 from django.db.models import Sum
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
@@ -19,7 +18,6 @@ from rest_framework.permissions import AllowAny, DjangoModelPermissions, IsAuthe
 from plana.apps.associations.models.association import Association
 from plana.apps.commissions.models import Commission, CommissionFund, Fund
 from plana.apps.contents.models import Content
-from plana.apps.institutions.models.institution import Institution
 from plana.apps.projects.models import ProjectComment
 from plana.apps.projects.models.project import Project
 from plana.apps.projects.models.project_commission_fund import ProjectCommissionFund
@@ -27,14 +25,17 @@ from plana.apps.projects.serializers.project_commission_fund import (
     ProjectCommissionFundDataSerializer,
     ProjectCommissionFundSerializer,
 )
+from plana.apps.users.access_scope import UserAccessScope
 from plana.apps.users.models.user import AssociationUser, User
 from plana.libs.mail_template.models import MailTemplate
+from plana.pagination import OptionalCursorPagination
 from plana.utils import send_mail
 
 
 class ProjectCommissionFundListCreate(generics.ListCreateAPIView):
     """/projects/commission_funds route."""
 
+    pagination_class = OptionalCursorPagination
     permission_classes = [IsAuthenticated, DjangoModelPermissions]
     queryset = ProjectCommissionFund.objects.all()
     serializer_class = ProjectCommissionFundSerializer
@@ -66,42 +67,13 @@ class ProjectCommissionFundListCreate(generics.ListCreateAPIView):
         project_id = request.query_params.get("project_id")
         commission_id = request.query_params.get("commission_id")
 
-        if not request.user.has_perm("projects.view_projectcommissionfund_any_fund"):
-            managed_funds = request.user.get_user_managed_funds()
-            if managed_funds.count() > 0:
-                user_funds_ids = managed_funds
-            else:
-                user_funds_ids = request.user.get_user_funds()
-        else:
-            user_funds_ids = Fund.objects.all().values_list("id")
-        if not request.user.has_perm("projects.view_projectcommissionfund_any_institution"):
-            user_institutions_ids = request.user.get_user_managed_institutions()
-        else:
-            user_institutions_ids = Institution.objects.all().values_list("id")
-
-        if not request.user.has_perm("projects.view_projectcommissionfund_any_fund") or not request.user.has_perm(
-            "projects.view_projectcommissionfund_any_institution"
-        ):
-            user_associations_ids = request.user.get_user_associations()
-            user_projects_ids = Project.visible_objects.filter(
-                models.Q(user_id=request.user.pk) | models.Q(association_id__in=user_associations_ids)
-            ).values_list("id")
-
-            self.queryset = self.queryset.filter(
-                models.Q(project_id__in=user_projects_ids)
-                | models.Q(
-                    commission_fund_id__in=CommissionFund.objects.filter(fund_id__in=user_funds_ids).values_list("id")
-                )
-                | models.Q(
-                    project_id__in=(
-                        Project.visible_objects.filter(
-                            association_id__in=Association.objects.filter(
-                                institution_id__in=user_institutions_ids
-                            ).values_list("id")
-                        ).values_list("id")
-                    )
-                )
+        access_scope = UserAccessScope(request.user)
+        self.queryset = self.queryset.filter(
+            access_scope.get_project_commission_funds_filter(
+                "projects.view_projectcommissionfund_any_fund",
+                "projects.view_projectcommissionfund_any_institution",
             )
+        )
 
         if project_id:
             self.queryset = self.queryset.filter(project_id=project_id)
@@ -1,6 +1,7 @@
 """Views for project PDF generation."""
 
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import models
 from django.utils.translation import gettext_lazy as _
 from drf_spectacular.utils import extend_schema
 from rest_framework import generics, response, status
@@ -12,6 +13,7 @@ from plana.apps.commissions.models.commission import Commission
 from plana.apps.commissions.models.fund import Fund
 from plana.apps.documents.models.document import Document
 from plana.apps.documents.models.document_upload import DocumentUpload
+from plana.apps.exports.views.export_job import ExportJobCreateMixin
 from plana.apps.projects.models.category import Category
 from plana.apps.projects.models.project import Project
 from plana.apps.projects.models.project_category import ProjectCategory
@@ -22,13 +24,16 @@ from plana.apps.users.models.user import AssociationUser, User
 from plana.utils import generate_pdf_response
 
 
-class ProjectDataExport(generics.RetrieveAPIView):
+class ProjectDataExport(ExportJobCreateMixin, generics.RetrieveAPIView):
     """/projects/{id}/pdf_export route."""
 
     permission_classes = [IsAuthenticated, DjangoModelPermissions]
     queryset = Project.visible_objects.all()
     serializer_class = ProjectSerializer
 
+    def get_export_edition_date(self, **kwargs):
+        return self.queryset.filter(id=kwargs["pk"]).aggregate(models.Max("edition_date"))["edition_date__max"]
+
     @extend_schema(
         responses={
             status.HTTP_200_OK: ProjectSerializer,
@@ -109,13 +114,16 @@ class ProjectDataExport(generics.RetrieveAPIView):
         return generate_pdf_response(data["name"], data, "project_summary", request.build_absolute_uri("/"))
 
 
-class ProjectReviewDataExport(generics.RetrieveAPIView):
+class ProjectReviewDataExport(ExportJobCreateMixin, generics.RetrieveAPIView):
     """/projects/{id}/review/pdf_export route."""
 
     permission_classes = [IsAuthenticated, DjangoModelPermissions]
     queryset = Project.visible_objects.all()
     serializer_class = ProjectReviewSerializer
 
+    def get_export_edition_date(self, **kwargs):
+        return self.queryset.filter(id=kwargs["pk"]).aggregate(models.Max("edition_date"))["edition_date__max"]
+
     @extend_schema(
         responses={
             status.HTTP_200_OK: ProjectSerializer,
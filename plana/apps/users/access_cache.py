@@ -0,0 +1,121 @@
+"""
+Cache shared between workers, storing permissions and scopes (funds, institutions, associations) of users.
+
+Values are stored under keys containing a global generation and a per-user generation.
+Bumping a generation makes all previous values unreachable, so they don't need to be deleted one by one.
+Generations are fetched once per user instance (so once per request), then each value costs a single lookup.
+If the cache is unavailable, errors are logged and values are loaded from the database on each call.
+"""
+
+import logging
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+GLOBAL_GENERATION_KEY = "access_generation"
+USER_GENERATION_KEY = "access_generation_user_{user_id}"
+VALUE_KEY = "access_{global_generation}_{user_generation}_{user_id}_{name}"
+
+_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+
+def get_access_cache():
+    """Return the cache backend configured for users permissions and scopes."""
+    return caches[settings.ACCESS_CACHE_ALIAS]
+
+
+def _new_generation():
+    return uuid.uuid4().hex
+
+
+def get_generations(user_id):
+    """
+    Return the global generation and the generation of a user, under which values of the user are cached.
+
+    Return None if the cache is unavailable.
+    """
+    cache = get_access_cache()
+    user_generation_key = USER_GENERATION_KEY.format(user_id=user_id)
+    try:
+        generations = cache.get_many([GLOBAL_GENERATION_KEY, user_generation_key])
+        for key in [GLOBAL_GENERATION_KEY, user_generation_key]:
+            if key not in generations:
+                cache.add(key, _new_generation(), None)
+                generations[key] = cache.get(key)
+    except Exception as error:
+        logging.getLogger(__name__).exception(error)
+        return None
+    return generations[GLOBAL_GENERATION_KEY], generations[user_generation_key]
+
+
+def get_or_set(user_id, generations, name, loader):
+    """
+    Return a cached value for a user under the given generations, calling loader to compute it if missing.
+
+    The value is loaded without being cached if generations are missing or if the cache is unavailable.
+    """
+    if generations is None:
+        return loader()
+    cache = get_access_cache()
+    global_generation, user_generation = generations
+    key = VALUE_KEY.format(
+        global_generation=global_generation,
+        user_generation=user_generation,
+        user_id=user_id,
+        name=name,
+    )
+    try:
+        value = cache.get(key)
+    except Exception as error:
+        logging.getLogger(__name__).exception(error)
+        return loader()
+    with _stats_lock:
+        _stats["hits" if value is not None else "misses"] += 1
+    if value is None:
+        value = loader()
+        try:
+            cache.set(key, value)
+        except Exception as error:
+            logging.getLogger(__name__).exception(error)
+    return value
+
+
+def _bump(key):
+    # Values cached under a generation that could not be bumped expire after the cache timeout.
+    try:
+        get_access_cache().set(key, _new_generation(), None)
+    except Exception as error:
+        logging.getLogger(__name__).exception(error)
+
+
+def bump_user_generation(user_id):
+    """Invalidate cached values of a user, now and once the current transaction is committed."""
+    key = USER_GENERATION_KEY.format(user_id=user_id)
+    _bump(key)
+    transaction.on_commit(lambda: _bump(key))
+
+
+def bump_global_generation():
+    """Invalidate cached values of all users, now and once the current transaction is committed."""
+    _bump(GLOBAL_GENERATION_KEY)
+    transaction.on_commit(lambda: _bump(GLOBAL_GENERATION_KEY))
+
+
+def get_stats():
+    """Return hits and misses counted by the current process."""
+    with _stats_lock:
+        stats = dict(_stats)
+    total = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / total if total > 0 else None
+    return stats
+
+
+def reset_stats():
+    """Reset hits and misses counted by the current process."""
+    with _stats_lock:
+        _stats["hits"] = 0
+        _stats["misses"] = 0
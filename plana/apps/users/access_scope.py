@@ -0,0 +1,120 @@
+"""Access scope of a user, resolved once and used to filter querysets in views."""
+
+from django.db import models
+
+from plana.apps.associations.models.association import Association
+from plana.apps.commissions.models.commission_fund import CommissionFund
+from plana.apps.projects.models.project import Project
+from plana.apps.projects.models.project_commission_fund import ProjectCommissionFund
+
+
+class UserAccessScope:
+    """Funds, institutions and associations a user is linked to, with permissions checks."""
+
+    def __init__(self, user):
+        self.user = user
+        scope_ids = user.get_scope_ids()
+        self.funds_ids = scope_ids["funds"]
+        self.managed_funds_ids = scope_ids["managed_funds"]
+        self.managed_institutions_ids = scope_ids["managed_institutions"]
+        self.associations_ids = scope_ids["associations"]
+
+    def has_perm(self, perm):
+        """Check a permission of the user (loaded once for all checks)."""
+        return self.user.has_perm(perm)
+
+    def get_visible_funds_ids(self, any_fund_perm):
+        """Return IDs of funds the user can see projects from, or None if all funds are allowed."""
+        if self.has_perm(any_fund_perm):
+            return None
+        if len(self.managed_funds_ids) > 0:
+            return self.managed_funds_ids
+        return self.funds_ids
+
+    def get_visible_institutions_ids(self, any_institution_perm):
+        """Return IDs of institutions the user can see projects from, or None if all institutions are allowed."""
+        if self.has_perm(any_institution_perm):
+            return None
+        return self.managed_institutions_ids
+
+    def get_own_projects(self):
+        """Return visible projects owned by the user or by one of its associations."""
+        return Project.visible_objects.filter(
+            models.Q(user_id=self.user.pk) | models.Q(association_id__in=self.associations_ids)
+        )
+
+    def get_funds_projects_commission_funds(self, funds_ids):
+        """Return project commission funds linked to funds (all of them if funds_ids is None)."""
+        commission_funds = CommissionFund.objects.all()
+        if funds_ids is not None:
+            commission_funds = commission_funds.filter(fund_id__in=funds_ids)
+        return ProjectCommissionFund.objects.filter(commission_fund_id__in=commission_funds.values("id"))
+
+    def get_institutions_associations(self, institutions_ids):
+        """Return associations linked to institutions (all of them if institutions_ids is None)."""
+        if institutions_ids is None:
+            return Association.objects.filter(institution_id__isnull=False)
+        return Association.objects.filter(institution_id__in=institutions_ids)
+
+    def get_projects_filter(self, any_fund_perm, any_institution_perm, any_status_perm=None):
+        """
+        Return a filter on projects the user can see.
+
+        If any_status_perm is given and not granted, projects seen through funds are limited to validated ones.
+        """
+        funds_ids = self.get_visible_funds_ids(any_fund_perm)
+        institutions_ids = self.get_visible_institutions_ids(any_institution_perm)
+        if funds_ids is None and institutions_ids is None:
+            return models.Q()
+
+        funds_filter = models.Q(id__in=self.get_funds_projects_commission_funds(funds_ids).values("project_id"))
+        if any_status_perm is not None and not self.has_perm(any_status_perm):
+            funds_filter &= models.Q(project_status__in=Project.ProjectStatus.get_commissionnable_project_statuses())
+        return (
+            models.Q(id__in=self.get_own_projects().values("id"))
+            | funds_filter
+            | models.Q(association_id__in=self.get_institutions_associations(institutions_ids).values("id"))
+        )
+
+    def get_project_commission_funds_filter(self, any_fund_perm, any_institution_perm):
+        """Return a filter on project commission funds the user can see."""
+        funds_ids = self.get_visible_funds_ids(any_fund_perm)
+        institutions_ids = self.get_visible_institutions_ids(any_institution_perm)
+        if funds_ids is None and institutions_ids is None:
+            return models.Q()
+
+        commission_funds = CommissionFund.objects.all()
+        if funds_ids is not None:
+            commission_funds = commission_funds.filter(fund_id__in=funds_ids)
+        return (
+            models.Q(project_id__in=self.get_own_projects().values("id"))
+            | models.Q(commission_fund_id__in=commission_funds.values("id"))
+            | models.Q(
+                project_id__in=Project.visible_objects.filter(
+                    association_id__in=self.get_institutions_associations(institutions_ids).values("id")
+                ).values("id")
+            )
+        )
+
+    def get_project_categories_filter(self, any_fund_perm, any_institution_perm):
+        """Return a filter on project categories the user can see."""
+        funds_ids = self.get_visible_funds_ids(any_fund_perm)
+        institutions_ids = self.get_visible_institutions_ids(any_institution_perm)
+        if funds_ids is None and institutions_ids is None:
+            return models.Q()
+
+        return (
+            models.Q(project_id__in=self.get_own_projects().values("id"))
+            | models.Q(project_id__in=self.get_funds_projects_commission_funds(funds_ids).values("project_id"))
+            | models.Q(
+                project_id__in=Project.visible_objects.filter(
+                    association_id__in=self.get_institutions_associations(institutions_ids).values("id")
+                ).values("id")
+            )
+        )
+
+    def get_document_uploads_filter(self):
+        """Return a filter on document uploads the user can see."""
+        if self.has_perm("documents.view_documentupload_all"):
+            return models.Q()
+        return models.Q(user_id=self.user.pk) | models.Q(association_id__in=self.associations_ids)
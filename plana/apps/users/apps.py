@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from health_check.plugins import plugin_dir
 
 
 class UsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "plana.apps.users"
+
+    def ready(self):
+        """Clear cached permissions and scopes when changed, and add health check on access cache."""
+        from plana.apps.users import signals  # noqa: F401
+        from plana.apps.users.backends import AccessCacheCheckBackend
+
+        plugin_dir.register(AccessCacheCheckBackend)
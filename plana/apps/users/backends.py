@@ -0,0 +1,33 @@
+"""Testers for health check."""
+
+from health_check.backends import BaseHealthCheckBackend
+from health_check.exceptions import HealthCheckException
+
+from plana.apps.users import access_cache
+
+
+class AccessCacheCheckBackend(BaseHealthCheckBackend):
+    """Backend tester for health check, also showing hits and misses of the users access cache."""
+
+    critical_service = False
+
+    def check_status(self):
+        try:
+            cache = access_cache.get_access_cache()
+            cache.set("health_check_access_cache", "ok", 10)
+            if cache.get("health_check_access_cache") is None:
+                raise HealthCheckException("Access cache cannot store values")
+        except HealthCheckException:
+            raise
+        except Exception as error:
+            raise HealthCheckException(error) from error
+
+    def pretty_status(self):
+        if self.errors:
+            return super().pretty_status()
+        stats = access_cache.get_stats()
+        hit_rate = "-" if stats["hit_rate"] is None else f"{stats['hit_rate']:.0%}"
+        return f"working (hits: {stats['hits']}, misses: {stats['misses']}, hit rate: {hit_rate})"
+
+    def identifier(self):
+        return self.__class__.__name__
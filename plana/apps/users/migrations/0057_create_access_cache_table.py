@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-17 11:20
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # Created the table of the database cache first used to share users permissions and scopes between workers.
+    # The access cache now uses Redis (ACCESS_CACHE_ALIAS), so this migration is kept as a no-op for databases
+    # where it was already applied.
+
+    dependencies = [
+        ('users', '0056_alter_user_address_alter_user_city_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, migrations.RunPython.noop),
+    ]
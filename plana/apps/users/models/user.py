@@ -4,6 +4,7 @@ import datetime
 
 from allauth.account.models import EmailAddress
 from allauth.socialaccount.models import SocialAccount
+from django.apps import apps
 from django.contrib.auth.models import AbstractUser, Group, Permission
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
@@ -15,6 +16,7 @@ from plana.apps.commissions.models.fund import Fund
 from plana.apps.contents.models.setting import Setting
 from plana.apps.institutions.models.institution import Institution
 from plana.apps.projects.models.project_commission_fund import ProjectCommissionFund
+from plana.apps.users import access_cache
 from plana.apps.users.provider import CASProvider
 
 
@@ -130,18 +132,35 @@ class User(AbstractUser):
         related_name="group_institution_fund_set",
     )
 
+    # Bumped each time permissions or scopes of users change, to refresh values memoized on instances.
+    access_generation = 0
+
     def has_perm(self, perm, obj=None):
         """Overriden has_perm to check for institutions."""
         if self.is_superuser:
             return True
-        return (
-            Permission.objects.filter(
-                group__id__in=Group.objects.filter(
-                    id__in=GroupInstitutionFundUser.objects.filter(user_id=self.pk).values_list("group_id")
-                ).values_list("id"),
-                codename=perm.split(".")[1],
-            ).count()
-            > 0
+        return perm.split(".")[1] in self.get_permission_codenames()
+
+    def get_cached_access(self, name, loader):
+        """Return permissions or a scope of the user, memoized on the instance and cached between workers."""
+        generation, cache_generations, memo = getattr(self, "_access_memo", (None, None, None))
+        if memo is None or generation != User.access_generation:
+            cache_generations = access_cache.get_generations(self.pk)
+            memo = {}
+            self._access_memo = (User.access_generation, cache_generations, memo)
+        if name not in memo:
+            memo[name] = access_cache.get_or_set(self.pk, cache_generations, name, loader)
+        return memo[name]
+
+    def get_permission_codenames(self):
+        """Return codenames of permissions granted through user groups."""
+        return self.get_cached_access(
+            "permissions",
+            lambda: frozenset(
+                Permission.objects.filter(group__groupinstitutionfunduser__user_id=self.pk)
+                .order_by()
+                .values_list("codename", flat=True)
+            ),
         )
 
     def can_access_project(self, project_obj):
@@ -186,6 +205,43 @@ class User(AbstractUser):
 
         return False
 
+    def get_accessible_projects_filter(self):
+        """Return a filter on projects matching the checks done by can_access_project."""
+        scope_ids = self.get_scope_ids()
+        projects_filter = models.Q(association_id__in=scope_ids["associations"]) | models.Q(user_id=self.pk)
+
+        user_funds_ids = scope_ids["funds"] | scope_ids["managed_funds"]
+        if len(user_funds_ids) != 0:
+            if self.is_staff:
+                return models.Q()
+            return projects_filter | models.Q(
+                id__in=ProjectCommissionFund.objects.filter(commission_fund__fund_id__in=user_funds_ids).values(
+                    "project_id"
+                )
+            )
+
+        if self.is_staff:
+            staff_filter = models.Q(association_id__isnull=True) | models.Q(
+                association__institution_id__in=scope_ids["managed_institutions"]
+            )
+            if not self.has_perm("users.change_user_misc"):
+                staff_filter &= models.Q(user_id__isnull=True)
+            return projects_filter | staff_filter
+
+        return projects_filter
+
+    def filter_accessible_projects(self, queryset):
+        """Restrict a projects queryset to projects the user can access, without running any query."""
+        return queryset.filter(self.get_accessible_projects_filter())
+
+    def accessible_project_ids(self, project_ids):
+        """Return the subset of the given project IDs the user can access, in a single query."""
+        return set(
+            self.filter_accessible_projects(
+                apps.get_model("projects.project").objects.filter(id__in=project_ids)
+            ).values_list("id", flat=True)
+        )
+
     def can_edit_project(self, project_obj):
         """Check if a user can edit a project as association president, misc user, fund member, or manager."""
         if not self.can_access_project(project_obj):
@@ -203,33 +259,43 @@ class User(AbstractUser):
 
         return True
 
+    def get_scope_ids(self):
+        """Return IDs of funds, managed funds, managed institutions and associations linked to the user."""
+
+        def load_scope_ids():
+            scope_ids = {"funds": set(), "managed_funds": set(), "managed_institutions": set()}
+            for fund_id, institution_id, managed_fund_id in GroupInstitutionFundUser.objects.filter(
+                user_id=self.pk
+            ).values_list("fund_id", "institution_id", "institution__fund__id"):
+                for key, value in [
+                    ("funds", fund_id),
+                    ("managed_institutions", institution_id),
+                    ("managed_funds", managed_fund_id),
+                ]:
+                    if value is not None:
+                        scope_ids[key].add(value)
+            scope_ids["associations"] = set(
+                AssociationUser.objects.filter(user_id=self.pk).values_list("association_id", flat=True)
+            )
+            return {key: frozenset(value) for key, value in scope_ids.items()}
+
+        return self.get_cached_access("scope", load_scope_ids)
+
     def get_user_associations(self):
         """Return a list of Association IDs linked to a student user."""
-        return Association.objects.filter(
-            id__in=AssociationUser.objects.filter(user_id=self.pk).values_list("association_id")
-        )
+        return Association.objects.filter(id__in=self.get_scope_ids()["associations"])
 
     def get_user_managed_associations(self):
         """Return a list of Association IDs linked to a manager user."""
-        return Association.objects.filter(
-            institution_id__in=Institution.objects.filter(
-                id__in=GroupInstitutionFundUser.objects.filter(user_id=self.pk).values_list("institution_id")
-            ).values_list("id")
-        )
+        return Association.objects.filter(institution_id__in=self.get_scope_ids()["managed_institutions"])
 
     def get_user_funds(self):
         """Return a list of Fund IDs linked to a student user."""
-        return Fund.objects.filter(
-            id__in=GroupInstitutionFundUser.objects.filter(user_id=self.pk).values_list("fund_id")
-        )
+        return Fund.objects.filter(id__in=self.get_scope_ids()["funds"])
 
     def get_user_managed_funds(self):
         """Return a list of Fund IDs linked to a manager user."""
-        return Fund.objects.filter(
-            institution_id__in=Institution.objects.filter(
-                id__in=GroupInstitutionFundUser.objects.filter(user_id=self.pk).values_list("institution_id")
-            ).values_list("id")
-        )
+        return Fund.objects.filter(id__in=self.get_scope_ids()["managed_funds"])
 
     def get_user_groups(self):
         """Return a list of Group IDs linked to a user."""
@@ -254,9 +320,7 @@ class User(AbstractUser):
 
     def get_user_managed_institutions(self):
         """Return a list of Institution IDs linked to a manager user."""
-        return Institution.objects.filter(
-            id__in=GroupInstitutionFundUser.objects.filter(user_id=self.pk).values_list("institution_id")
-        )
+        return Institution.objects.filter(id__in=self.get_scope_ids()["managed_institutions"])
 
     def get_user_default_manager_emails(self):
         """Return a list of manager email addresses affected to a user."""
@@ -0,0 +1,25 @@
+"""Signals invalidating permissions and scopes cached for users."""
+
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from plana.apps.commissions.models.fund import Fund
+from plana.apps.users import access_cache
+from plana.apps.users.models.user import AssociationUser, GroupInstitutionFundUser, User
+
+
+@receiver([post_save, post_delete], sender=AssociationUser)
+@receiver([post_save, post_delete], sender=GroupInstitutionFundUser)
+def clear_user_access(sender, instance, **kwargs):
+    """Force a user to reload permissions and scopes when its groups or associations change."""
+    User.access_generation += 1
+    access_cache.bump_user_generation(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+@receiver([post_save, post_delete], sender=Fund)
+def clear_all_users_access(sender, **kwargs):
+    """Force all users to reload permissions and scopes when group permissions or funds change."""
+    User.access_generation += 1
+    access_cache.bump_global_generation()
@@ -1,7 +1,15 @@
 """List of tests done on users models."""
 
-from django.test import Client, TestCase
+from unittest.mock import patch
 
+from django.conf import settings
+from django.contrib.auth.models import Group, Permission
+from django.test import Client, TestCase, override_settings
+
+from plana.apps.commissions.models.fund import Fund
+from plana.apps.projects.models.project import Project
+from plana.apps.projects.models.project_commission_fund import ProjectCommissionFund
+from plana.apps.users import access_cache
 from plana.apps.users.models.user import AssociationUser, GroupInstitutionFundUser, User
 
 
@@ -12,6 +20,8 @@ class UsersModelsTests(TestCase):
         "associations_activityfield.json",
         "associations_association.json",
         "auth_group.json",
+        "auth_group_permissions.json",
+        "auth_permission.json",
         "commissions_fund.json",
         "institutions_institution.json",
         "institutions_institutioncomponent.json",
@@ -44,3 +54,189 @@ class UsersModelsTests(TestCase):
             str(group_user),
             f"{group_user.user} - {group_user.group} - {group_user.institution} - {group_user.fund}",
         )
+
+    def test_user_has_perm_memoized(self):
+        """Permissions are loaded once per user instance, and reloaded when groups permissions change."""
+        user = User.objects.get(username="gestionnaire-svu@mail.tld")
+        with self.assertNumQueries(1):
+            self.assertTrue(user.has_perm("users.change_user_misc"))
+            self.assertTrue(user.has_perm("projects.view_project_any_fund"))
+            self.assertFalse(user.has_perm("projects.add_project_user"))
+
+        group = Group.objects.get(name="MANAGER_GENERAL")
+        group.permissions.remove(Permission.objects.get(codename="change_user_misc"))
+        with self.assertNumQueries(1):
+            self.assertFalse(user.has_perm("users.change_user_misc"))
+
+        GroupInstitutionFundUser.objects.filter(user_id=user.pk).delete()
+        self.assertFalse(user.has_perm("projects.view_project_any_fund"))
+
+
+@override_settings(
+    CACHES={
+        **settings.CACHES,
+        "access": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "access-tests",
+            "TIMEOUT": 300,
+        },
+    }
+)
+class UsersAccessCacheTests(TestCase):
+    """Permissions and scopes cached between requests."""
+
+    fixtures = [
+        "associations_activityfield.json",
+        "associations_association.json",
+        "auth_group.json",
+        "auth_group_permissions.json",
+        "auth_permission.json",
+        "commissions_fund.json",
+        "institutions_institution.json",
+        "institutions_institutioncomponent.json",
+        "users_associationuser.json",
+        "users_groupinstitutionfunduser.json",
+        "users_user.json",
+    ]
+
+    def setUp(self):
+        """Start each test with an empty cache."""
+        access_cache.get_access_cache().clear()
+        access_cache.reset_stats()
+
+    def test_permissions_shared_between_instances(self):
+        """A permission set loaded for a user is reused by other instances of the same user."""
+        User.objects.get(username="gestionnaire-svu@mail.tld").has_perm("users.change_user_misc")
+        user = User.objects.get(username="gestionnaire-svu@mail.tld")
+        with self.assertNumQueries(0):
+            self.assertTrue(user.has_perm("users.change_user_misc"))
+        stats = access_cache.get_stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_generations_fetched_once_per_instance(self):
+        """Cache generations are fetched once for all permissions and scopes of a user instance."""
+        user = User.objects.get(username="gestionnaire-svu@mail.tld")
+        user.has_perm("users.change_user_misc")
+        user.get_user_associations()
+
+        user = User.objects.get(username="gestionnaire-svu@mail.tld")
+        cache = access_cache.get_access_cache()
+        with patch.object(cache, "get_many", wraps=cache.get_many) as get_many:
+            with patch.object(cache, "get", wraps=cache.get) as get:
+                user.has_perm("users.change_user_misc")
+                user.get_user_managed_funds()
+                user.get_user_associations()
+        self.assertEqual(get_many.call_count, 1)
+        self.assertEqual(get.call_count, 2)
+
+    def test_permissions_invalidated_by_group_change(self):
+        """Changing user groups or group permissions invalidates cached permissions."""
+        user = User.objects.get(username="gestionnaire-uha@mail.tld")
+        self.assertFalse(user.has_perm("users.change_user_misc"))
+
+        GroupInstitutionFundUser.objects.create(user_id=user.pk, group_id=1, institution_id=3)
+        user = User.objects.get(username="gestionnaire-uha@mail.tld")
+        self.assertTrue(user.has_perm("users.change_user_misc"))
+
+        Group.objects.get(id=1).permissions.remove(Permission.objects.get(codename="change_user_misc"))
+        user = User.objects.get(username="gestionnaire-uha@mail.tld")
+        self.assertFalse(user.has_perm("users.change_user_misc"))
+
+    def test_scopes_invalidated(self):
+        """Scopes are invalidated when association links or funds change."""
+        user = User.objects.get(username="etudiant-asso-hors-site@mail.tld")
+        associations_ids = set(user.get_user_associations().values_list("id", flat=True))
+        AssociationUser.objects.filter(user_id=user.pk).delete()
+        user = User.objects.get(username="etudiant-asso-hors-site@mail.tld")
+        self.assertNotEqual(associations_ids, set())
+        self.assertEqual(set(user.get_user_associations().values_list("id", flat=True)), set())
+
+        user = User.objects.get(username="gestionnaire-uha@mail.tld")
+        self.assertEqual(user.get_user_managed_funds().count(), 0)
+        fund = Fund.objects.create(name="Fonds", acronym="F", institution_id=3)
+        user = User.objects.get(username="gestionnaire-uha@mail.tld")
+        self.assertEqual(list(user.get_user_managed_funds().values_list("id", flat=True)), [fund.id])
+
+    def test_access_loaded_when_cache_unavailable(self):
+        """Permissions and scopes are loaded from the database when the cache raises errors."""
+        cache = access_cache.get_access_cache()
+        with patch.object(cache, "get_many", side_effect=Exception("Cache unavailable")):
+            user = User.objects.get(username="gestionnaire-svu@mail.tld")
+            self.assertTrue(user.has_perm("users.change_user_misc"))
+        with patch.object(cache, "get", side_effect=Exception("Cache unavailable")):
+            with patch.object(cache, "set", side_effect=Exception("Cache unavailable")):
+                user = User.objects.get(username="gestionnaire-svu@mail.tld")
+                self.assertTrue(user.has_perm("users.change_user_misc"))
+                user = User.objects.get(username="etudiant-asso-hors-site@mail.tld")
+                self.assertNotEqual(set(user.get_user_associations().values_list("id", flat=True)), set())
+
+
+class UsersProjectAccessTests(TestCase):
+    """Projects access checked on batches of projects."""
+
+    fixtures = [
+        "associations_activityfield.json",
+        "associations_association.json",
+        "auth_group.json",
+        "auth_group_permissions.json",
+        "auth_permission.json",
+        "commissions_commission.json",
+        "commissions_commissionfund.json",
+        "commissions_fund.json",
+        "institutions_institution.json",
+        "institutions_institutioncomponent.json",
+        "projects_project.json",
+        "projects_projectcommissionfund.json",
+        "users_associationuser.json",
+        "users_groupinstitutionfunduser.json",
+        "users_user.json",
+    ]
+
+    def assert_same_access(self, user):
+        """Batch access resolution gives the same result as can_access_project on each project."""
+        projects = Project.objects.all()
+        expected_ids = {project.id for project in projects if user.can_access_project(project)}
+        self.assertEqual(user.accessible_project_ids(projects.values_list("id", flat=True)), expected_ids)
+        self.assertEqual(set(user.filter_accessible_projects(projects).values_list("id", flat=True)), expected_ids)
+
+    def test_accessible_project_ids_equivalence(self):
+        """Every user gets the same accessible projects as with can_access_project."""
+        for user in User.objects.all():
+            with self.subTest(user=user.username):
+                self.assert_same_access(user)
+
+    def test_accessible_project_ids_equivalence_staff(self):
+        """Results stay the same when staff status or misc users permission change."""
+        for user in User.objects.all():
+            user.is_staff = not user.is_staff
+            with self.subTest(user=user.username, is_staff=user.is_staff):
+                self.assert_same_access(user)
+
+        Group.objects.get(name="MANAGER_GENERAL").permissions.remove(
+            Permission.objects.get(codename="change_user_misc")
+        )
+        for user in User.objects.filter(is_staff=True):
+            with self.subTest(user=user.username):
+                self.assert_same_access(user)
+
+    def test_accessible_project_ids_equivalence_links(self):
+        """Results stay the same for projects linked to other funds, institutions and associations."""
+        Project.objects.filter(id=2).update(association_id=3)
+        Project.objects.filter(id=4).update(association_id=None, user_id=10)
+        ProjectCommissionFund.objects.filter(project_id=6).update(commission_fund_id=1)
+        for user in User.objects.all():
+            with self.subTest(user=user.username):
+                self.assert_same_access(user)
+
+    def test_accessible_project_ids_queries(self):
+        """Access to a batch of projects is resolved with a constant number of queries."""
+        user = User.objects.get(username="membre-fsdie-idex@mail.tld")
+        user.has_perm("users.change_user_misc")
+        user.get_scope_ids()
+        projects_ids = list(Project.objects.values_list("id", flat=True))
+        with self.assertNumQueries(1):
+            user.accessible_project_ids(projects_ids)
+        with self.assertNumQueries(1):
+            user.accessible_project_ids(projects_ids * 500)
@@ -12,6 +12,7 @@ from rest_framework import status
 from plana.apps.associations.models.association import Association
 from plana.apps.history.models.history import History
 from plana.apps.users.models.user import AssociationUser, GroupInstitutionFundUser
+from plana.libs.mail_template.outbox import deliver_outbox_mails
 
 
 class AssociationUserViewsTests(TestCase):
@@ -387,6 +388,7 @@ class AssociationUserViewsTests(TestCase):
                 "association": 5,
             },
         )
+        deliver_outbox_mails()
         self.assertTrue(len(mail.outbox))
         self.assertEqual(response_student.status_code, status.HTTP_201_CREATED)
         user_asso = AssociationUser.objects.get(user_id=self.student_user_id, association_id=5)
@@ -5,6 +5,7 @@ import datetime
 from django.conf import settings
 from django.contrib.sites.shortcuts import get_current_site
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
 from django.utils.datastructures import MultiValueDictKeyError
 from django.utils.translation import gettext_lazy as _
 from drf_spectacular.types import OpenApiTypes
@@ -23,12 +24,15 @@ from plana.apps.users.serializers.association_user import (
     AssociationUserUpdateSerializer,
 )
 from plana.libs.mail_template.models import MailTemplate
+from plana.libs.mail_template.outbox import queue_mail
+from plana.pagination import OptionalCursorPagination
 from plana.utils import send_mail, to_bool
 
 
 class AssociationUserListCreate(generics.ListCreateAPIView):
     """/users/associations/ route."""
 
+    pagination_class = OptionalCursorPagination
     queryset = AssociationUser.objects.all()
 
     def get_permissions(self):
@@ -116,6 +120,7 @@ class AssociationUserListCreate(generics.ListCreateAPIView):
         },
         tags=["users/associations"],
     )
+    @transaction.atomic
     def post(self, request, *args, **kwargs):
         """Create a new link between a user and an association."""
         try:
@@ -211,6 +216,8 @@ class AssociationUserListCreate(generics.ListCreateAPIView):
             else:
                 request.data["is_validated_by_admin"] = False
 
+        association_user_response = super().create(request, *args, **kwargs)
+
         if "is_validated_by_admin" not in request.data or (
             "is_validated_by_admin" in request.data
             and (to_bool(request.data["is_validated_by_admin"]) is False)
@@ -223,7 +230,7 @@ class AssociationUserListCreate(generics.ListCreateAPIView):
                 "user_association_url": f"{settings.EMAIL_TEMPLATE_FRONTEND_URL}{settings.EMAIL_TEMPLATE_USER_ASSOCIATION_VALIDATE_PATH}",
             }
             template = MailTemplate.objects.get(code="MANAGER_ACCOUNT_ASSOCIATION_USER_CREATION")
-            send_mail(
+            queue_mail(
                 from_=settings.DEFAULT_FROM_EMAIL,
                 to_=list(
                     Institution.objects.get(id=association.institution_id)
@@ -232,9 +239,11 @@ class AssociationUserListCreate(generics.ListCreateAPIView):
                 ),
                 subject=template.subject.replace("{{ site_name }}", context["site_name"]),
                 message=template.parse_vars(request.user, request, context),
+                template=template,
+                obj=AssociationUser.objects.get(user_id=user.id, association_id=association_id),
             )
 
-        return super().create(request, *args, **kwargs)
+        return association_user_response
 
 
 class AssociationUserRetrieve(generics.RetrieveAPIView):
@@ -32,12 +32,14 @@ from plana.apps.users.serializers.user import (
     UserUpdateSerializer,
 )
 from plana.libs.mail_template.models import MailTemplate
+from plana.pagination import OptionalCursorPagination
 from plana.utils import send_mail, to_bool
 
 
 class UserListCreate(generics.ListCreateAPIView):
     """/users/ route."""
 
+    pagination_class = OptionalCursorPagination
     filter_backends = [filters.SearchFilter]
     permission_classes = [IsAuthenticated, DjangoModelPermissions]
     queryset = User.objects.all().order_by("id")
@@ -0,0 +1,98 @@
+"""Background generation of thumbnails for images stored with django-thumbnails."""
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import django
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections
+from storages.backends.s3boto3 import S3Boto3Storage
+from thumbnails import images, post_processors, processors
+
+_process_pool = None
+_dispatcher = None
+_executors_lock = threading.Lock()
+
+
+def get_thumbnails_executors():
+    """
+    Return the executors shared by the whole process, created on first use.
+
+    Thumbnails jobs are run one at a time by a dispatcher thread, images being resized by long-lived worker processes.
+    """
+    global _process_pool, _dispatcher
+    if _dispatcher is None:
+        with _executors_lock:
+            if _dispatcher is None:
+                _process_pool = ProcessPoolExecutor(
+                    max_workers=settings.THUMBNAILS_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=django.setup,
+                )
+                _dispatcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="thumbnails")
+    return _process_pool, _dispatcher
+
+
+def render_thumbnail(content, name, size):
+    """Resize an image through the processors of a thumbnail size (run in a worker process)."""
+    image_file = processors.process(ContentFile(content, name=name), size)
+    image_file = post_processors.process(image_file, size)
+    return image_file.read()
+
+
+def replace_file(storage, name, content):
+    """Overwrite a stored file keeping its name."""
+    if not isinstance(storage, S3Boto3Storage):
+        storage.delete(name)
+    return storage._save(name, content)
+
+
+def generate_thumbnails(storage, metadata_backend, source_name, resize_source_to=None, sizes=()):
+    """
+    Generate thumbnails of a stored image, all sizes being resized in parallel from the original image.
+
+    The source image is replaced by its resized version if resize_source_to is given.
+    Existing thumbnails of the given sizes are replaced, each new thumbnail being recorded in metadata once stored.
+    """
+    process_pool, _dispatcher = get_thumbnails_executors()
+    with storage.open(source_name, "rb") as source_file:
+        content = source_file.read()
+
+    rendered_sizes = list(sizes) + ([resize_source_to] if resize_source_to else [])
+    renders = {size: process_pool.submit(render_thumbnail, content, source_name, size) for size in rendered_sizes}
+    del content
+
+    with ThreadPoolExecutor(max_workers=len(rendered_sizes) or 1) as uploads_executor:
+        uploads = {}
+        for size, render in renders.items():
+            thumbnail_file = ContentFile(render.result())
+            if size == resize_source_to:
+                uploads[size] = uploads_executor.submit(replace_file, storage, source_name, thumbnail_file)
+            else:
+                images.delete(source_name, size, metadata_backend, storage)
+                uploads[size] = uploads_executor.submit(
+                    storage.save, images.get_thumbnail_name(source_name, size), thumbnail_file
+                )
+
+        for size in sizes:
+            metadata_backend.add_thumbnail(source_name, size, uploads[size].result())
+        if resize_source_to:
+            uploads[resize_source_to].result()
+
+
+def generate_thumbnails_in_background(storage, metadata_backend, source_name, resize_source_to=None, sizes=()):
+    """Queue the generation of thumbnails of a stored image, the original image being used until they are ready."""
+
+    def run():
+        try:
+            generate_thumbnails(storage, metadata_backend, source_name, resize_source_to, sizes)
+        except Exception as error:
+            logging.getLogger(__name__).exception(error)
+        finally:
+            connections.close_all()
+
+    _process_pool, dispatcher = get_thumbnails_executors()
+    return dispatcher.submit(run)
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from health_check.plugins import plugin_dir
 
 
 class MailTemplateConfig(AppConfig):
     name = "plana.libs.mail_template"
     verbose_name = "Mail template"
+
+    def ready(self):
+        """Add health check on the mail outbox."""
+        from plana.libs.mail_template.backends import MailOutboxCheckBackend
+
+        plugin_dir.register(MailOutboxCheckBackend)
@@ -0,0 +1,32 @@
+"""Testers for health check."""
+
+from health_check.backends import BaseHealthCheckBackend
+from health_check.exceptions import HealthCheckException
+
+from plana.libs.mail_template.outbox import get_outbox_stats
+
+
+class MailOutboxCheckBackend(BaseHealthCheckBackend):
+    """Backend tester for health check, also showing the depth and delivery latency of the mail outbox."""
+
+    critical_service = False
+    stats = None
+
+    def check_status(self):
+        try:
+            self.stats = get_outbox_stats()
+        except Exception as error:
+            raise HealthCheckException(error) from error
+        if self.stats["failed"] > 0:
+            raise HealthCheckException(f"{self.stats['failed']} outbox mails could not be delivered")
+
+    def pretty_status(self):
+        if self.stats is None:
+            return super().pretty_status()
+        oldest = "-" if self.stats["oldest_pending_age"] is None else f"{self.stats['oldest_pending_age']:.0f}s"
+        latency = "-" if self.stats["average_latency"] is None else f"{self.stats['average_latency']:.1f}s"
+        status = super().pretty_status() if self.errors else "working"
+        return f"{status} (pending: {self.stats['pending']}, oldest pending: {oldest}, average latency: {latency})"
+
+    def identifier(self):
+        return self.__class__.__name__
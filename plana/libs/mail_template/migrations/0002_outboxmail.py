@@ -0,0 +1,62 @@
+# Generated by Django 4.2.16 on 2026-10-17 13:24
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mail_template', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxMail',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('template_code', models.CharField(max_length=128, verbose_name='Template code')),
+                ('recipient', models.CharField(max_length=254, verbose_name='Recipient')),
+                ('object_key', models.CharField(default='', max_length=128, verbose_name='Notified object')),
+                ('from_email', models.CharField(max_length=254, verbose_name='From')),
+                ('subject', models.CharField(max_length=256, verbose_name='Subject')),
+                ('message', models.TextField(verbose_name='Message')),
+                (
+                    'mail_status',
+                    models.CharField(
+                        choices=[
+                            ('MAIL_PENDING', 'Mail Pending'),
+                            ('MAIL_SENT', 'Mail Sent'),
+                            ('MAIL_FAILED', 'Mail Failed'),
+                        ],
+                        db_index=True,
+                        default='MAIL_PENDING',
+                        max_length=32,
+                        verbose_name='Mail Status',
+                    ),
+                ),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Attempts')),
+                (
+                    'next_attempt_date',
+                    models.DateTimeField(
+                        db_index=True, default=django.utils.timezone.now, verbose_name='Next attempt date'
+                    ),
+                ),
+                ('error', models.TextField(default='', verbose_name='Error')),
+                ('creation_date', models.DateTimeField(auto_now_add=True, verbose_name='Creation date')),
+                ('send_date', models.DateTimeField(null=True, verbose_name='Send date')),
+            ],
+            options={
+                'verbose_name': 'Outbox mail',
+                'verbose_name_plural': 'Outbox mails',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='outboxmail',
+            constraint=models.UniqueConstraint(
+                condition=models.Q(('mail_status', 'MAIL_PENDING')),
+                fields=('template_code', 'recipient', 'object_key'),
+                name='unique_pending_outbox_mail',
+            ),
+        ),
+    ]
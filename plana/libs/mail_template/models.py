@@ -1,6 +1,7 @@
 import re
 
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -88,3 +89,49 @@ class MailTemplate(models.Model):
         ordering = [
             'label',
         ]
+
+
+class OutboxMail(models.Model):
+    """
+    Mails written in the transaction of the change they notify, delivered in batches afterwards
+    """
+
+    class OutboxMailStatus(models.TextChoices):
+        """List of statuses an outbox mail can have."""
+
+        MAIL_PENDING = "MAIL_PENDING", _("Mail Pending")
+        MAIL_SENT = "MAIL_SENT", _("Mail Sent")
+        MAIL_FAILED = "MAIL_FAILED", _("Mail Failed")
+
+    template_code = models.CharField(_("Template code"), max_length=128)
+    recipient = models.CharField(_("Recipient"), max_length=254)
+    object_key = models.CharField(_("Notified object"), max_length=128, default="")
+    from_email = models.CharField(_("From"), max_length=254)
+    subject = models.CharField(_("Subject"), max_length=256)
+    message = models.TextField(_("Message"))
+    mail_status = models.CharField(
+        _("Mail Status"),
+        max_length=32,
+        choices=OutboxMailStatus.choices,
+        default="MAIL_PENDING",
+        db_index=True,
+    )
+    attempts = models.PositiveSmallIntegerField(_("Attempts"), default=0)
+    next_attempt_date = models.DateTimeField(_("Next attempt date"), default=timezone.now, db_index=True)
+    error = models.TextField(_("Error"), default="")
+    creation_date = models.DateTimeField(_("Creation date"), auto_now_add=True)
+    send_date = models.DateTimeField(_("Send date"), null=True)
+
+    def __str__(self):
+        return f"{self.template_code} : {self.recipient} ({self.mail_status})"
+
+    class Meta:
+        verbose_name = _('Outbox mail')
+        verbose_name_plural = _('Outbox mails')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['template_code', 'recipient', 'object_key'],
+                condition=models.Q(mail_status='MAIL_PENDING'),
+                name='unique_pending_outbox_mail',
+            ),
+        ]
@@ -0,0 +1,178 @@
+"""
+Outbox of notification mails stored in the database, without any external broker.
+
+Mails are written in the transaction of the change they notify, so they are only sent if the change is committed.
+They are delivered in batches over a single SMTP connection by background threads of API processes once queued,
+and by the send_outbox_mails command (retrying mails whose delivery failed).
+"""
+
+import datetime
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connections, models, transaction
+from django.utils import timezone
+
+from plana.libs.mail_template.models import OutboxMail
+from plana.utils import _listify
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_outbox_dispatcher():
+    """Return the executor delivering outbox mails in the background, shared by the whole process."""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="outbox")
+    return _dispatcher
+
+
+def get_object_key(obj, subject, message):
+    """Return the key of the object notified by a mail and of its content, used to deduplicate mails."""
+    digest = hashlib.sha256(f"{subject}\n{message}".encode()).hexdigest()[:32]
+    if obj is None:
+        return digest
+    return f"{obj._meta.label_lower}:{obj.pk}:{digest}"
+
+
+def queue_mail(to_, subject, message, template, obj=None, from_=""):
+    """
+    Write a mail to the outbox, delivered once the current transaction is committed.
+
+    A mail still pending with the same template, recipient, notified object and content is not queued again.
+    """
+    mails = [
+        OutboxMail(
+            template_code=template.code,
+            recipient=recipient,
+            object_key=get_object_key(obj, subject, message),
+            from_email=from_ or settings.DEFAULT_FROM_EMAIL,
+            subject=subject,
+            message=message,
+        )
+        for recipient in dict.fromkeys(_listify(to_))
+        if recipient
+    ]
+    if len(mails) > 0:
+        OutboxMail.objects.bulk_create(mails, ignore_conflicts=True)
+        transaction.on_commit(deliver_outbox_mails_in_background)
+
+
+def claim_outbox_mails():
+    """Return the next batch of pending mails due for delivery, postponing them so other workers skip them."""
+    with transaction.atomic():
+        mails = list(
+            OutboxMail.objects.select_for_update(skip_locked=True)
+            .filter(
+                mail_status=OutboxMail.OutboxMailStatus.MAIL_PENDING,
+                next_attempt_date__lte=timezone.now(),
+            )
+            .order_by("next_attempt_date")[: settings.MAIL_OUTBOX_BATCH_SIZE]
+        )
+        OutboxMail.objects.filter(id__in=[mail.id for mail in mails]).update(
+            attempts=models.F("attempts") + 1,
+            next_attempt_date=timezone.now() + datetime.timedelta(seconds=settings.MAIL_OUTBOX_RETRY_DELAY),
+        )
+    for mail in mails:
+        mail.attempts += 1
+    return mails
+
+
+def send_outbox_mail(mail, connection):
+    """Send an outbox mail over an open connection, and store the result of the attempt."""
+    try:
+        email = EmailMultiAlternatives(
+            mail.subject, mail.message, mail.from_email, [mail.recipient], connection=connection
+        )
+        email.attach_alternative(mail.message, "text/html")
+        email.send()
+        mail.mail_status = OutboxMail.OutboxMailStatus.MAIL_SENT
+        mail.send_date = timezone.now()
+        mail.error = ""
+    except Exception as error:
+        logging.getLogger(__name__).exception(error)
+        mail.error = str(error)
+        if mail.attempts >= settings.MAIL_OUTBOX_MAX_ATTEMPTS:
+            mail.mail_status = OutboxMail.OutboxMailStatus.MAIL_FAILED
+        else:
+            mail.next_attempt_date = timezone.now() + datetime.timedelta(
+                seconds=settings.MAIL_OUTBOX_RETRY_DELAY * 2 ** (mail.attempts - 1)
+            )
+    mail.save(update_fields=["mail_status", "send_date", "error", "next_attempt_date"])
+
+
+def deliver_outbox_mails():
+    """
+    Deliver pending mails due for delivery in batches until none is left, and return how many were sent.
+
+    Each batch is sent over a single connection, and failed mails are retried with an exponential backoff
+    (MAIL_OUTBOX_RETRY_DELAY seconds doubled at each attempt) until MAIL_OUTBOX_MAX_ATTEMPTS is reached.
+    """
+    sent_count = 0
+    while True:
+        mails = claim_outbox_mails()
+        if len(mails) == 0:
+            return sent_count
+        connection = get_connection()
+        try:
+            connection.open()
+            for mail in mails:
+                send_outbox_mail(mail, connection)
+                if mail.mail_status == OutboxMail.OutboxMailStatus.MAIL_SENT:
+                    sent_count += 1
+        except Exception as error:
+            logging.getLogger(__name__).exception(error)
+            return sent_count
+        finally:
+            connection.close()
+
+
+def deliver_outbox_mails_in_background():
+    """Deliver pending mails in a background thread."""
+
+    def run():
+        try:
+            deliver_outbox_mails()
+        except Exception as error:
+            logging.getLogger(__name__).exception(error)
+        finally:
+            connections.close_all()
+
+    return get_outbox_dispatcher().submit(run)
+
+
+def delete_sent_outbox_mails():
+    """Delete mails sent more than MAIL_OUTBOX_RETENTION_DAYS days ago, and return how many were deleted."""
+    deleted_count, _deleted_per_model = OutboxMail.objects.filter(
+        mail_status=OutboxMail.OutboxMailStatus.MAIL_SENT,
+        send_date__lt=timezone.now() - datetime.timedelta(days=settings.MAIL_OUTBOX_RETENTION_DAYS),
+    ).delete()
+    return deleted_count
+
+
+def get_outbox_stats():
+    """Return the depth of the outbox and the delivery latency of mails sent during the last hour."""
+    now = timezone.now()
+    pending_mails = OutboxMail.objects.filter(mail_status=OutboxMail.OutboxMailStatus.MAIL_PENDING)
+    oldest_pending_date = pending_mails.aggregate(models.Min("creation_date"))["creation_date__min"]
+    latency = OutboxMail.objects.filter(
+        mail_status=OutboxMail.OutboxMailStatus.MAIL_SENT,
+        send_date__gte=now - datetime.timedelta(hours=1),
+    ).aggregate(
+        average=models.Avg(models.F("send_date") - models.F("creation_date")),
+        maximum=models.Max(models.F("send_date") - models.F("creation_date")),
+    )
+    return {
+        "pending": pending_mails.count(),
+        "failed": OutboxMail.objects.filter(mail_status=OutboxMail.OutboxMailStatus.MAIL_FAILED).count(),
+        "oldest_pending_age": None if oldest_pending_date is None else (now - oldest_pending_date).total_seconds(),
+        "average_latency": None if latency["average"] is None else latency["average"].total_seconds(),
+        "max_latency": None if latency["maximum"] is None else latency["maximum"].total_seconds(),
+    }
@@ -0,0 +1,56 @@
+from unittest.mock import patch
+
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..models import MailTemplate, OutboxMail
+from ..outbox import deliver_outbox_mails, get_outbox_stats, queue_mail
+
+
+class OutboxTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.mail_template = MailTemplate.objects.create(
+            code='TPL',
+            label='template',
+            description='empty template',
+            subject='tpl',
+            body='This is a template',
+        )
+
+    def test_queue_mail_deduplicated(self):
+        queue_mail(
+            ['a@mail.tld', 'b@mail.tld', 'a@mail.tld'],
+            'Subject',
+            'Message',
+            self.mail_template,
+            obj=self.mail_template,
+        )
+        queue_mail('a@mail.tld', 'Subject', 'Message', self.mail_template, obj=self.mail_template)
+        queue_mail('a@mail.tld', 'Subject', 'Message', self.mail_template)
+        self.assertEqual(OutboxMail.objects.count(), 3)
+        self.assertFalse(len(mail.outbox))
+
+        self.assertEqual(deliver_outbox_mails(), 3)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(get_outbox_stats()['pending'], 0)
+
+        queue_mail('a@mail.tld', 'Subject', 'Message', self.mail_template, obj=self.mail_template)
+        self.assertEqual(OutboxMail.objects.filter(mail_status='MAIL_PENDING').count(), 1)
+        queue_mail('a@mail.tld', 'Subject', 'Other message', self.mail_template, obj=self.mail_template)
+        self.assertEqual(OutboxMail.objects.filter(mail_status='MAIL_PENDING').count(), 2)
+
+    @override_settings(MAIL_OUTBOX_BATCH_SIZE=2, MAIL_OUTBOX_MAX_ATTEMPTS=2)
+    def test_deliver_outbox_mails_retried(self):
+        queue_mail(['a@mail.tld', 'b@mail.tld', 'c@mail.tld'], 'Subject', 'Message', self.mail_template)
+        with patch('django.core.mail.EmailMultiAlternatives.send', side_effect=OSError('Connection refused')):
+            self.assertEqual(deliver_outbox_mails(), 0)
+        self.assertEqual(OutboxMail.objects.filter(attempts=1, mail_status='MAIL_PENDING').count(), 3)
+        self.assertEqual(deliver_outbox_mails(), 0)
+
+        OutboxMail.objects.update(next_attempt_date=timezone.now())
+        with patch('django.core.mail.EmailMultiAlternatives.send', side_effect=OSError('Connection refused')):
+            deliver_outbox_mails()
+        self.assertEqual(OutboxMail.objects.filter(mail_status='MAIL_FAILED').count(), 3)
+        self.assertEqual(get_outbox_stats()['failed'], 3)
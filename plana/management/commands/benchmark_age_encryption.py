@@ -0,0 +1,68 @@
+import os
+import resource
+import shutil
+import time
+from tempfile import TemporaryDirectory
+
+from django.core.files.base import File
+from django.core.management.base import BaseCommand
+from django.utils.translation import gettext as _
+from pyrage import decrypt, encrypt
+
+from plana.storages import LocalEncryptedPrivateFileStorage
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class Command(BaseCommand):
+    help = _("Compares duration and memory peak of private files encryption between one-shot and streamed age.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", type=int, default=100, help=_("Size in MB of the encrypted payload."))
+
+    def handle(self, *args, **options):
+        try:
+            with TemporaryDirectory() as directory:
+                payload_path = os.path.join(directory, "payload")
+                with open(payload_path, "wb") as payload:
+                    for _index in range(options["size"]):
+                        payload.write(os.urandom(CHUNK_SIZE))
+                storage = LocalEncryptedPrivateFileStorage(location=directory)
+
+                # Peak RSS never decreases, so the streamed mode is measured first.
+                modes = {
+                    _("streamed encryption"): self.encrypt_streamed,
+                    _("one-shot encryption"): self.encrypt_one_shot,
+                }
+                for mode, cycle in modes.items():
+                    initial_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                    start = time.perf_counter()
+                    cycle(storage, payload_path, os.path.join(directory, "encrypted"))
+                    duration = time.perf_counter() - start
+                    extra_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - initial_peak
+                    self.stdout.write(f"{mode} : {duration:.1f} s, {extra_peak / 1024:.1f} MiB extra peak RSS")
+        except Exception as error:
+            self.stdout.write(self.style.ERROR(f"Error : {error}"))
+
+    def encrypt_streamed(self, storage, payload_path, encrypted_path):
+        """Encrypt and decrypt a file chunk by chunk, like EncryptedPrivateFileStorage does with S3 objects."""
+        with open(payload_path, "rb") as payload:
+            encrypted_file = storage._encrypt(File(payload, name="payload"))
+        with encrypted_file, open(encrypted_path, "wb") as encrypted:
+            shutil.copyfileobj(encrypted_file, encrypted, CHUNK_SIZE)
+        with open(encrypted_path, "rb") as encrypted:
+            decrypted_file = storage._decrypt(encrypted, "payload")
+        with decrypted_file:
+            while decrypted_file.read(CHUNK_SIZE):
+                pass
+
+    def encrypt_one_shot(self, storage, payload_path, encrypted_path):
+        """Encrypt and decrypt a whole file in memory, like EncryptedPrivateFileStorage did before."""
+        with open(payload_path, "rb") as payload:
+            encrypted_content = encrypt(payload.read(), [storage.recipient])
+        with open(encrypted_path, "wb") as encrypted:
+            encrypted.write(encrypted_content)
+        del encrypted_content
+        with open(encrypted_path, "rb") as encrypted:
+            decrypted_content = decrypt(encrypted.read(), [storage.identity])
+        del decrypted_content
@@ -0,0 +1,63 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import weasyprint
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.translation import gettext as _
+
+from plana.pdf import get_rendering_pool, render_pdf
+from plana.utils import get_pdf_template
+
+
+class Command(BaseCommand):
+    help = _("Compares PDF rendering latencies between the pool of rendering processes and the request process.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--template",
+            choices=settings.TEMPLATES_PDF_FILEPATHS.keys(),
+            help=_("PDF template rendered with an empty context (a generated table if not set)."),
+        )
+        parser.add_argument("--renders", type=int, default=50, help=_("Number of renders for each mode."))
+        parser.add_argument("--concurrency", type=int, default=1, help=_("Number of simultaneous renders."))
+        parser.add_argument("--base-url", default="http://localhost:8000/", help=_("Base URL of rendered documents."))
+
+    def handle(self, *args, **options):
+        try:
+            if options["template"] is not None:
+                html = get_pdf_template(settings.TEMPLATES_PDF_FILEPATHS[options["template"]]).render({})
+            else:
+                rows = "".join(f"<tr><td>Project {index}</td><td>{index * 100} €</td></tr>" for index in range(200))
+                html = (
+                    "<style>table { border-collapse: collapse; } td { border: 1px solid; padding: 2px; }</style>"
+                    f"<h1>PlanA</h1><table>{rows}</table>"
+                )
+            base_url = options["base_url"]
+
+            modes = {
+                _("request process"): lambda: weasyprint.HTML(string=html, base_url=base_url).write_pdf(),
+            }
+            if settings.PDF_RENDERING_WORKERS > 0:
+                get_rendering_pool().start()
+                modes[_("rendering pool")] = lambda: render_pdf(html, base_url)
+
+            for mode, render in modes.items():
+                render()
+                latencies = self.measure(render, options["renders"], options["concurrency"])
+                percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+                self.stdout.write(f"{mode} : p50 {percentiles[49] * 1000:.1f} ms, p99 {percentiles[98] * 1000:.1f} ms")
+        except Exception as error:
+            self.stdout.write(self.style.ERROR(f"Error : {error}"))
+
+    def measure(self, render, renders, concurrency):
+        """Return the latencies in seconds of renders, started by concurrency threads at once."""
+
+        def timed_render(_index):
+            start = time.perf_counter()
+            render()
+            return time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(timed_render, range(max(renders, 2))))
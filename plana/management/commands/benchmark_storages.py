@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils.translation import gettext as _
+
+from plana.storages import EncryptedPrivateFileStorage, PublicFileStorage, get_storage
+
+
+class Command(BaseCommand):
+    help = _("Compares the duration of building S3 storages and their bucket between new and shared instances.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--files", type=int, default=500, help=_("Number of field files using a storage."))
+
+    def handle(self, *args, **options):
+        try:
+            modes = {
+                _("new storage for each file"): lambda storage_class: storage_class(),
+                _("shared storage"): get_storage,
+            }
+            for mode, build_storage in modes.items():
+                start = time.perf_counter()
+                buckets = []
+                for index in range(options["files"]):
+                    storage_class = EncryptedPrivateFileStorage if index % 2 else PublicFileStorage
+                    buckets.append(build_storage(storage_class).bucket)
+                duration = time.perf_counter() - start
+                self.stdout.write(
+                    f"{mode} : {duration:.2f} s, {len({id(bucket) for bucket in buckets})} buckets built"
+                )
+        except Exception as error:
+            self.stdout.write(self.style.ERROR(f"Error : {error}"))
@@ -0,0 +1,68 @@
+import datetime
+import time
+import tracemalloc
+from tempfile import NamedTemporaryFile
+
+from django.core.management.base import BaseCommand
+from django.utils.translation import gettext as _
+from openpyxl import Workbook
+
+from plana.utils import generate_xlsx_response
+
+
+class Command(BaseCommand):
+    help = _("Compares duration and memory peak of XLSX exports between the previous workbook and the write-only one.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=50000, help=_("Number of exported rows."))
+        parser.add_argument("--columns", type=int, default=12, help=_("Number of exported columns."))
+
+    def handle(self, *args, **options):
+        try:
+            fields = [f"Field {index}" for index in range(options["columns"])]
+
+            def get_rows():
+                for index in range(options["rows"]):
+                    yield [
+                        (f"Value {index}", index * 100, datetime.date(2024, 1, 1))[column % 3]
+                        for column in range(options["columns"])
+                    ]
+
+            modes = {
+                _("cell by cell workbook"): self.export_cell_by_cell,
+                _("write-only workbook"): self.export_write_only,
+            }
+            for mode, export in modes.items():
+                tracemalloc.start()
+                start = time.perf_counter()
+                size = export(fields, get_rows())
+                duration = time.perf_counter() - start
+                _current, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                self.stdout.write(
+                    f"{mode} : {duration:.1f} s, {peak / 1024 / 1024:.1f} MiB peak, {size / 1024 / 1024:.1f} MiB file"
+                )
+        except Exception as error:
+            self.stdout.write(self.style.ERROR(f"Error : {error}"))
+
+    def export_cell_by_cell(self, fields, rows):
+        """Return the size of a XLSX file built like exports did before generate_xlsx_response."""
+        workbook = Workbook()
+        worksheet = workbook.active
+        for index_field, field in enumerate(fields):
+            worksheet.cell(row=1, column=index_field + 1).value = field
+        for index_row, row in enumerate(rows):
+            for index_field, field in enumerate(row):
+                worksheet.cell(row=index_row + 2, column=index_field + 1).value = field
+        with NamedTemporaryFile() as tmp:
+            workbook.save(tmp.name)
+            tmp.seek(0)
+            return len(tmp.read())
+
+    def export_write_only(self, fields, rows):
+        """Return the size of a XLSX file sent by generate_xlsx_response."""
+        xlsx_response = generate_xlsx_response("benchmark", fields, rows)
+        try:
+            return sum(len(block) for block in xlsx_response.streaming_content)
+        finally:
+            xlsx_response.close()
@@ -9,6 +9,7 @@ from django.utils.translation import gettext as _
 
 from plana.apps.contents.models.setting import Setting
 from plana.libs.mail_template.models import MailTemplate
+from plana.storages import delete_with_files
 from plana.utils import send_mail
 
 User = get_user_model()
@@ -54,7 +55,10 @@ class Command(BaseCommand):
                 Q(last_login__isnull=True, date_joined__date__lte=deletion_due_date)
                 | Q(last_login__isnull=False, last_login__date__lte=deletion_due_date)
             )
-            deletion_queryset.delete()
+            deletion_report = delete_with_files(deletion_queryset)
+            self.stdout.write(str(deletion_report))
+            for name in deletion_report.failed:
+                self.stdout.write(self.style.ERROR(f"Error : {name} could not be deleted."))
 
         except Exception as error:
             self.stdout.write(self.style.ERROR(f"Error : {error}"))
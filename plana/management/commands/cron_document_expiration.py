@@ -12,6 +12,7 @@ from plana.apps.documents.models.document import Document
 from plana.apps.documents.models.document_upload import DocumentUpload
 from plana.apps.users.models.user import User
 from plana.libs.mail_template.models import MailTemplate
+from plana.storages import delete_with_files
 from plana.utils import send_mail
 
 
@@ -28,6 +29,7 @@ class Command(BaseCommand):
             cron_days_before_document_expiration_warning = Setting.get_setting(
                 "CRON_DAYS_BEFORE_DOCUMENT_EXPIRATION_WARNING"
             )
+            expired_document_uploads = []
             for document_upload in document_uploads_with_expiration:
                 document = Document.objects.get(id=document_upload.document_id)
                 expiration_date = None
@@ -65,7 +67,16 @@ class Command(BaseCommand):
                         message=template.parse_vars(None, None, context),
                     )
                 elif expiration_date is not None and datetime.date.today() >= expiration_date:
-                    document_upload.delete()
+                    expired_document_uploads.append(document_upload)
+
+            deletion_report = delete_with_files(
+                DocumentUpload.objects.filter(
+                    id__in=[document_upload.id for document_upload in expired_document_uploads]
+                )
+            )
+            self.stdout.write(str(deletion_report))
+            for name in deletion_report.failed:
+                self.stdout.write(self.style.ERROR(f"Error : {name} could not be deleted."))
 
         except Exception as error:
             self.stdout.write(self.style.ERROR(f"Error : {error}"))
@@ -4,8 +4,8 @@ from django.core.management.base import BaseCommand
 from django.utils.translation import gettext as _
 
 from plana.apps.contents.models.setting import Setting
-from plana.apps.documents.models.document_upload import DocumentUpload
 from plana.apps.projects.models.project import Project
+from plana.storages import delete_with_files
 
 
 class Command(BaseCommand):
@@ -23,10 +23,9 @@ class Command(BaseCommand):
                     archived_projects_ids.append(project.id)
             projects = projects.filter(id__in=archived_projects_ids)
 
-            documents = DocumentUpload.objects.filter(project_id__in=projects.values_list("id"))
-            for document in documents:
-                document.path_file.delete()
-            documents.delete()
-            projects.delete()
+            deletion_report = delete_with_files(projects)
+            self.stdout.write(str(deletion_report))
+            for name in deletion_report.failed:
+                self.stdout.write(self.style.ERROR(f"Error : {name} could not be deleted."))
         except Exception as error:
             self.stdout.write(self.style.ERROR(f"Error : {error}"))
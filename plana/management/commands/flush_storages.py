@@ -27,8 +27,9 @@ class Command(BaseCommand):
 
                 self.stdout.write(self.style.SUCCESS(_(f"S3 bucket {bucket_name} content cleaned.")))
             else:
-                shutil.rmtree(os.path.join(settings.MEDIA_ROOT))
-                pass
+                shutil.rmtree(os.path.join(settings.MEDIA_ROOT), ignore_errors=True)
+                shutil.rmtree(os.path.join(settings.PRIVATE_MEDIA_ROOT), ignore_errors=True)
+                self.stdout.write(self.style.SUCCESS(_("Local storages content cleaned.")))
 
         except Exception as error:
             self.stdout.write(self.style.ERROR(f"Error : {error}"))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.utils.translation import gettext as _
+from thumbnails import conf
+
+from plana.apps.associations.models.association import Association
+from plana.images import generate_thumbnails
+
+
+class Command(BaseCommand):
+    help = _("Generates missing thumbnails of associations logos (all of them if sizes settings changed).")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            help=_("Set without value if existing thumbnails should be generated again."),
+            action="store_true",
+        )
+
+    def handle(self, *args, **options):
+        field = Association._meta.get_field("path_logo")
+        sizes = [size for size in conf.SIZES if size != field.resize_source_to]
+        generated_count = 0
+        for association in (
+            Association.objects.exclude(path_logo="").exclude(path_logo__isnull=True).only("id", "path_logo")
+        ):
+            try:
+                logo = association.path_logo
+                logo_sizes = sizes
+                if not options["all"]:
+                    logo_sizes = [size for size in sizes if size not in logo.thumbnails.all()]
+                if logo_sizes:
+                    generate_thumbnails(logo.storage, field.metadata_backend, logo.name, sizes=logo_sizes)
+                    generated_count += 1
+            except Exception as error:
+                self.stdout.write(self.style.ERROR(f"Error : {association.path_logo.name} : {error}"))
+
+        self.stdout.write(self.style.SUCCESS(_(f"Thumbnails generated for {generated_count} logos.")))
@@ -1,10 +1,9 @@
 import datetime
-import os
 import pathlib
-import shutil
 
 import boto3
 from django.conf import settings
+from django.core.files import File
 from django.core.management.base import BaseCommand
 from django.utils.translation import gettext as _
 
@@ -47,7 +46,16 @@ class Command(BaseCommand):
 
                 self.stdout.write(self.style.SUCCESS(_(f"S3 bucket {bucket_name} content loaded.")))
             else:
-                shutil.rmtree(os.path.join(settings.MEDIA_ROOT))
+                for file in pathlib.Path().glob("plana/apps/contents/fixtures/files/logos/*.*"):
+                    with file.open(mode="rb") as logo_file:
+                        logo_object = Logo.objects.get(id=int(file.name.split("_")[0]))
+                        logo_object.path_logo.save(file.name, File(logo_file))
+                for file in pathlib.Path().glob("plana/apps/documents/fixtures/files/documents/*.*"):
+                    with file.open(mode="rb") as document_file:
+                        document_object = Document.objects.get(id=int(file.name.split("_")[0]))
+                        document_object.path_template.save(file.name, File(document_file))
+
+                self.stdout.write(self.style.SUCCESS(_("Local storages content loaded.")))
 
         except Exception as error:
             self.stdout.write(self.style.ERROR(f"Error : {error}"))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.utils.translation import gettext as _
+
+from plana.apps.documents.uploads import (
+    delete_abandoned_uploads,
+    store_pending_staged_uploads,
+)
+
+
+class Command(BaseCommand):
+    help = _("Stores pending direct uploads (interrupted ones included) and deletes abandoned ones.")
+
+    def handle(self, *args, **options):
+        try:
+            staged_uploads_count = store_pending_staged_uploads()
+            self.stdout.write(self.style.SUCCESS(_(f"{staged_uploads_count} direct uploads stored.")))
+
+            abandoned_uploads_count = delete_abandoned_uploads()
+            self.stdout.write(self.style.SUCCESS(_(f"{abandoned_uploads_count} abandoned direct uploads deleted.")))
+
+        except Exception as error:
+            self.stdout.write(self.style.ERROR(f"Error : {error}"))
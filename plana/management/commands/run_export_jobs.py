@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.utils.translation import gettext as _
+
+from plana.apps.exports.jobs import delete_expired_export_jobs, run_pending_export_jobs
+
+
+class Command(BaseCommand):
+    help = _("Runs pending export jobs (interrupted ones included) and deletes expired exports.")
+
+    def handle(self, *args, **options):
+        try:
+            jobs_count = run_pending_export_jobs()
+            self.stdout.write(self.style.SUCCESS(_(f"{jobs_count} export jobs run.")))
+
+            deletion_report = delete_expired_export_jobs()
+            self.stdout.write(str(deletion_report))
+            for name in deletion_report.failed:
+                self.stdout.write(self.style.ERROR(f"Error : {name} could not be deleted."))
+
+        except Exception as error:
+            self.stdout.write(self.style.ERROR(f"Error : {error}"))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.utils.translation import gettext as _
+
+from plana.libs.mail_template.outbox import (
+    delete_sent_outbox_mails,
+    deliver_outbox_mails,
+    get_outbox_stats,
+)
+
+
+class Command(BaseCommand):
+    help = _("Sends pending outbox mails (failed deliveries included) and deletes old sent mails.")
+
+    def handle(self, *args, **options):
+        try:
+            sent_count = deliver_outbox_mails()
+            self.stdout.write(self.style.SUCCESS(_(f"{sent_count} outbox mails sent.")))
+
+            deleted_count = delete_sent_outbox_mails()
+            self.stdout.write(self.style.SUCCESS(_(f"{deleted_count} old outbox mails deleted.")))
+
+            stats = get_outbox_stats()
+            self.stdout.write(
+                _(
+                    f"Pending : {stats['pending']}, failed : {stats['failed']}, average latency : {stats['average_latency']}"
+                )
+            )
+
+        except Exception as error:
+            self.stdout.write(self.style.ERROR(f"Error : {error}"))
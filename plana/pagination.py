@@ -0,0 +1,30 @@
+"""Pagination classes used on list routes."""
+
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class OptionalCursorPagination(CursorPagination):
+    """
+    Cursor pagination only used if the client asks for it with cursor or page_size query parameters.
+
+    Without them, the full unpaginated list is returned as before.
+    Views can set a pagination_ordering attribute to choose the stable ordering used by cursors.
+    """
+
+    ordering = ("id",)
+    page_size = settings.PAGINATION_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.PAGINATION_MAX_PAGE_SIZE
+
+    def is_requested(self, request):
+        """Check if the client asked for a paginated response."""
+        return self.cursor_query_param in request.query_params or self.page_size_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_ordering(self, request, queryset, view):
+        return tuple(getattr(view, "pagination_ordering", self.ordering))
@@ -0,0 +1,196 @@
+"""Rendering of PDF files by a pool of long-lived WeasyPrint processes."""
+
+import multiprocessing
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+import weasyprint
+from django.conf import settings
+from weasyprint.text.fonts import FontConfiguration
+
+_rendering_pool = None
+_rendering_pool_lock = threading.Lock()
+
+# State of a rendering process, kept between renders.
+_font_config = None
+_fetched_resources = OrderedDict()
+_max_fetched_resources = 0
+_fetched_resources_timeout = 0
+
+
+def init_rendering_process(max_fetched_resources, fetched_resources_timeout):
+    """Load WeasyPrint and the fonts configuration once for all renders done by a worker process."""
+    global _font_config, _max_fetched_resources, _fetched_resources_timeout
+    _font_config = FontConfiguration()
+    _max_fetched_resources = max_fetched_resources
+    _fetched_resources_timeout = fetched_resources_timeout
+
+
+def fetch_resource(url):
+    """
+    Fetch a resource (stylesheet, image, font) of rendered documents, the most used ones being kept in memory.
+
+    Kept resources are fetched again once older than the timeout given to the rendering process.
+    """
+    fetched_resource = _fetched_resources.get(url)
+    if fetched_resource is None or time.monotonic() - fetched_resource[0] > _fetched_resources_timeout:
+        resource = weasyprint.default_url_fetcher(url)
+        if "file_obj" in resource:
+            resource["string"] = resource.pop("file_obj").read()
+        _fetched_resources[url] = (time.monotonic(), resource)
+        _fetched_resources.move_to_end(url)
+        while len(_fetched_resources) > _max_fetched_resources:
+            _fetched_resources.popitem(last=False)
+    else:
+        resource = fetched_resource[1]
+        _fetched_resources.move_to_end(url)
+    return dict(resource)
+
+
+def render_pdf_in_process(html, base_url):
+    """Render HTML as PDF bytes in a worker process."""
+    return weasyprint.HTML(string=html, base_url=base_url, url_fetcher=fetch_resource).write_pdf(
+        font_config=_font_config
+    )
+
+
+def run_rendering_process(connection, max_fetched_resources, fetched_resources_timeout):
+    """Render documents received through a pipe until it is closed, sending back PDF bytes or the render error."""
+    init_rendering_process(max_fetched_resources, fetched_resources_timeout)
+    while True:
+        try:
+            html, base_url = connection.recv()
+        except EOFError:
+            return
+        try:
+            connection.send((render_pdf_in_process(html, base_url), None))
+        except Exception as error:
+            connection.send((None, f"{error.__class__.__name__}: {error}"))
+
+
+class RenderingError(Exception):
+    """Error raised by WeasyPrint in a rendering process."""
+
+
+class RenderingProcess:
+    """Long-lived process rendering one document at a time."""
+
+    def __init__(self, max_fetched_resources, fetched_resources_timeout):
+        context = multiprocessing.get_context("spawn")
+        self.connection, process_connection = context.Pipe()
+        self.process = context.Process(
+            target=run_rendering_process,
+            args=(process_connection, max_fetched_resources, fetched_resources_timeout),
+            daemon=True,
+        )
+        self.process.start()
+        process_connection.close()
+        self.renders = 0
+
+    def render(self, html, base_url, timeout):
+        """Return PDF bytes rendered by the process, raising a TimeoutError if not rendered after timeout seconds."""
+        self.connection.send((html, base_url))
+        if not self.connection.poll(timeout):
+            raise TimeoutError(f"PDF not rendered after {timeout:.0f} seconds.")
+        pdf, error = self.connection.recv()
+        self.renders += 1
+        if error is not None:
+            raise RenderingError(error)
+        return pdf
+
+    def stop(self):
+        """Stop the process, even if it is rendering."""
+        self.connection.close()
+        self.process.kill()
+        self.process.join()
+
+
+class RenderingPool:
+    """
+    Pool of long-lived rendering processes.
+
+    A process is replaced after max_renders_per_process renders (to release memory), after a timeout
+    (as a running render cannot be cancelled otherwise) or if it died.
+    """
+
+    def __init__(self, max_workers, max_renders_per_process, max_fetched_resources, fetched_resources_timeout):
+        self.max_workers = max_workers
+        self.max_renders_per_process = max_renders_per_process
+        self.max_fetched_resources = max_fetched_resources
+        self.fetched_resources_timeout = fetched_resources_timeout
+        self.free_workers = threading.BoundedSemaphore(max_workers)
+        self.idle_processes = queue.LifoQueue()
+
+    def start(self):
+        """Start all processes of the pool before the first renders."""
+        processes = [self.acquire_process(None) for _worker in range(self.max_workers)]
+        for process in processes:
+            self.release_process(process)
+
+    def acquire_process(self, timeout):
+        """Return an idle process (started if needed), waiting at most timeout seconds for one."""
+        if not self.free_workers.acquire(timeout=timeout):
+            raise TimeoutError(f"No PDF rendering process available after {timeout:.0f} seconds.")
+        try:
+            return self.idle_processes.get_nowait()
+        except queue.Empty:
+            try:
+                return RenderingProcess(self.max_fetched_resources, self.fetched_resources_timeout)
+            except BaseException:
+                self.free_workers.release()
+                raise
+
+    def release_process(self, process):
+        """Give back a process to the pool, stopping it if it has reached its maximum amount of renders."""
+        if process.renders >= self.max_renders_per_process:
+            process.stop()
+        else:
+            self.idle_processes.put(process)
+        self.free_workers.release()
+
+    def render(self, html, base_url, timeout):
+        """Return PDF bytes, raising a TimeoutError if not rendered after timeout seconds (waiting included)."""
+        deadline = time.monotonic() + timeout
+        process = self.acquire_process(timeout)
+        try:
+            pdf = process.render(html, base_url, max(deadline - time.monotonic(), 0))
+        except RenderingError:
+            self.release_process(process)
+            raise
+        except BaseException:
+            process.stop()
+            self.free_workers.release()
+            raise
+        self.release_process(process)
+        return pdf
+
+
+def get_rendering_pool():
+    """Return the pool of rendering processes shared by the whole process, created on first use."""
+    global _rendering_pool
+    if _rendering_pool is None:
+        with _rendering_pool_lock:
+            if _rendering_pool is None:
+                _rendering_pool = RenderingPool(
+                    settings.PDF_RENDERING_WORKERS,
+                    settings.PDF_RENDERING_MAX_TASKS_PER_WORKER,
+                    settings.PDF_RENDERING_CACHED_RESOURCES,
+                    settings.PDF_RENDERING_CACHED_RESOURCES_TIMEOUT,
+                )
+    return _rendering_pool
+
+
+def render_pdf(html, base_url):
+    """
+    Render HTML as PDF bytes.
+
+    Renders are done by PDF_RENDERING_WORKERS long-lived processes started on first use by each API process
+    (in the current process if 0),
+    a render taking more than PDF_RENDERING_TIMEOUT seconds (waiting included) raising a TimeoutError.
+    """
+    if settings.PDF_RENDERING_WORKERS == 0:
+        return weasyprint.HTML(string=html, base_url=base_url).write_pdf()
+
+    return get_rendering_pool().render(html, base_url, settings.PDF_RENDERING_TIMEOUT)
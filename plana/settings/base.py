@@ -135,6 +135,9 @@ MEDIA_ROOT = normpath(join(DJANGO_ROOT, "media"))
 # Examples: "http://example.com/media/", "http://media.example.com/"
 MEDIA_URL = "/media/"
 
+# Absolute filesystem path to the directory holding private files if USE_S3 is False (not served by the web server).
+PRIVATE_MEDIA_ROOT = normpath(join(DJANGO_ROOT, "private_media"))
+
 
 ##############################
 # Static files configuration #
@@ -312,6 +315,7 @@ LOCAL_APPS = [
     "plana.apps.users",
     "plana.apps.contents",
     "plana.libs.mail_template",
+    "plana.apps.exports",
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
@@ -395,6 +399,26 @@ LOGGING = {
 }
 
 
+#########
+# Cache #
+#########
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Permissions and scopes of users and general settings, must be shared between workers (Redis, or Memcached with
+    # PyMemcacheCache).
+    # LocMemCache can only be used if a single process serves the API.
+    "access": {
+        "BACKEND": environ.get("ACCESS_CACHE_BACKEND", "django.core.cache.backends.redis.RedisCache"),
+        "LOCATION": environ.get("ACCESS_CACHE_LOCATION", "redis://127.0.0.1:6379/1"),
+        "TIMEOUT": 60 * 60,
+    },
+}
+ACCESS_CACHE_ALIAS = "access"
+
+
 #########################
 # DJANGO REST FRAMEWORK #
 #########################
@@ -417,6 +441,10 @@ REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
+# Pagination is only used on list routes if cursor or page_size query parameters are given.
+PAGINATION_PAGE_SIZE = 50
+PAGINATION_MAX_PAGE_SIZE = 500
+
 
 ##################
 # Storage config #
@@ -432,7 +460,8 @@ STORAGES = {
         "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
     },
 }
-USE_S3 = True  # TODO FileSystemStorage implementation not finished (encryption not available, migrations errors).
+# If False, files are stored in MEDIA_ROOT and PRIVATE_MEDIA_ROOT (still encrypted) and PDF templates are loaded from TEMPLATES DIRS.
+USE_S3 = True
 AWS_S3_FILE_OVERWRITE = True
 AWS_DEFAULT_ACL = None
 AWS_USE_OBJECT_ACL = True
@@ -445,8 +474,39 @@ S3_ASSOCIATIONS_LOGOS_FILEPATH = "associations_logos"
 S3_TEMPLATES_FILEPATH = "associations_documents_templates"
 S3_DOCUMENTS_FILEPATH = "associations_documents"
 S3_NOTIFICATIONS_FILEPATH = "projects_notifications"
+S3_UPLOADS_STAGING_FILEPATH = "uploads_staging"
+S3_EXPORTS_FILEPATH = "exports"
+# Files of content-addressed models (stored once for identical contents) are stored in this folder.
+S3_CONTENT_ADDRESSED_FILEPATH = "content_addressed"
 AGE_PUBLIC_KEY = load_key("age-public-key.key")
 AGE_PRIVATE_KEY = load_key("age-private-key.key")
+# Size in bytes above which files encrypted before being stored once (content-addressed files) are buffered on disk
+# instead of memory. Other files are encrypted and decrypted while they are streamed.
+AGE_MAX_MEMORY_SIZE = 5 * 1024 * 1024
+# Download mode of stored files by storage class name ("redirect" to a presigned URL, "stream" through the API).
+# Encrypted files are always streamed.
+STORAGES_DOWNLOAD_MODES = {
+    "PublicFileStorage": "redirect",
+    "PrivateFileStorage": "redirect",
+    "EncryptedPrivateFileStorage": "stream",
+}
+# Validity duration in seconds of presigned URLs used to download files.
+STORAGES_PRESIGNED_URL_EXPIRE = 60
+# Amount of S3 DeleteObjects requests sent concurrently, and retries of a request, when deleting files in bulk.
+STORAGES_DELETION_WORKERS = 4
+STORAGES_DELETION_RETRIES = 3
+# Size in bytes of the parts of files uploaded directly to S3 (at least 5 MiB).
+DOCUMENTS_UPLOADS_PART_SIZE = 16 * 1024 * 1024
+# Validity duration in seconds of direct uploads to S3.
+DOCUMENTS_UPLOADS_EXPIRE = 60 * 60
+# Maximum size in bytes of a file uploaded directly to S3.
+DOCUMENTS_UPLOADS_MAX_SIZE = 512 * 1024 * 1024
+# Amount of threads of each API process encrypting and storing files uploaded directly to S3.
+DOCUMENTS_UPLOADS_WORKERS = 1
+# Delay in seconds after which a file still being stored is considered interrupted and stored again.
+DOCUMENTS_UPLOADS_STORE_TIMEOUT = 30 * 60
+# Delay in seconds during which the result of a direct upload can be retrieved.
+DOCUMENTS_UPLOADS_RESULT_EXPIRE = 24 * 60 * 60
 
 
 #####################
@@ -494,6 +554,9 @@ THUMBNAILS = {
         },
     },
 }
+# Amount of processes resizing images in the background.
+THUMBNAILS_WORKERS = 2
+
 
 ##################
 # AUTHENTICATION #
@@ -649,6 +712,24 @@ TEMPLATES_PDF_FILEPATHS = {
     "project_review_summary": f"{S3_PDF_FILEPATH}/{TEMPLATES_PDF_EXPORTS_FOLDER}/project_review_summary.html",
 }
 
+# Amount of compiled PDF templates kept in memory by each process.
+TEMPLATES_PDF_CACHE_SIZE = 32
+# Delay in seconds before checking if a cached PDF template was replaced in the S3 bucket.
+TEMPLATES_PDF_CACHE_REVALIDATE_INTERVAL = 60
+
+# Number of long-lived processes rendering PDF files (rendered in the request process if 0).
+# Processes are started on first render by each API process, so up to PDF_RENDERING_WORKERS times the number of
+# gunicorn workers (and of run_export_jobs commands) are running.
+PDF_RENDERING_WORKERS = 1
+# Maximum delay in seconds to get a rendered PDF file, waiting for a free process included.
+PDF_RENDERING_TIMEOUT = 60
+# Number of PDF files rendered by a process before it is replaced (to release memory).
+PDF_RENDERING_MAX_TASKS_PER_WORKER = 200
+# Number of resources (stylesheets, images, fonts) kept in memory by each rendering process.
+PDF_RENDERING_CACHED_RESOURCES = 64
+# Delay in seconds after which a resource kept in memory by a rendering process is fetched again.
+PDF_RENDERING_CACHED_RESOURCES_TIMEOUT = 5 * 60
+
 
 ########
 # Misc #
@@ -670,6 +751,38 @@ MIGRATION_SITE_NAME = "Campulse"
 # Random password are generated with this length.
 DEFAULT_PASSWORD_LENGTH = 16
 
+# Cache shared between workers storing general settings, and amount of seconds they stay in it (changes made through
+# the app clear it earlier, for all workers).
+SETTINGS_CACHE_ALIAS = ACCESS_CACHE_ALIAS
+SETTINGS_CACHE_TIMEOUT = 300
+
+# Amount of rows fetched at once from the database while streaming CSV exports.
+EXPORTS_CHUNK_SIZE = 500
+
+# Size in bytes above which XLSX exports are written to disk instead of memory before being sent.
+EXPORTS_XLSX_MAX_MEMORY_SIZE = 5 * 1024 * 1024
+
+# Amount of files fetched and decrypted concurrently while streaming ZIP archives.
+EXPORTS_ZIP_PREFETCH_SIZE = 4
+
+# Amount of threads of each API process running queued export jobs in the background.
+EXPORT_JOBS_WORKERS = 1
+# Delay in seconds after which a running export job is considered interrupted and queued again.
+EXPORT_JOBS_TIMEOUT = 10 * 60
+# Delay in seconds during which the file generated by an export job can be downloaded.
+EXPORT_JOBS_RESULT_EXPIRE = 24 * 60 * 60
+# Size in bytes above which files generated by export jobs are written to disk instead of memory before being stored.
+EXPORT_JOBS_MAX_MEMORY_SIZE = 5 * 1024 * 1024
+
+# Amount of outbox mails sent at once over a single SMTP connection.
+MAIL_OUTBOX_BATCH_SIZE = 50
+# Amount of delivery attempts after which an outbox mail is considered failed.
+MAIL_OUTBOX_MAX_ATTEMPTS = 5
+# Delay in seconds before the first retry of an outbox mail, doubled at each attempt.
+MAIL_OUTBOX_RETRY_DELAY = 60
+# Amount of days during which sent outbox mails are kept.
+MAIL_OUTBOX_RETENTION_DAYS = 7
+
 # Default value for is_site setting.
 ASSOCIATION_IS_SITE_DEFAULT = False
 
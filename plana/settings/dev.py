@@ -55,6 +55,15 @@ for logger in LOGGING["loggers"]:
     LOGGING["loggers"][logger]["level"] = "DEBUG"
 
 
+#########
+# Cache #
+#########
+
+# The development server runs in a single process, Redis is only needed to run several workers.
+CACHES["access"]["BACKEND"] = environ.get("ACCESS_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache")
+CACHES["access"]["LOCATION"] = environ.get("ACCESS_CACHE_LOCATION", "access")
+
+
 ###########################
 # Unit test configuration #
 ###########################
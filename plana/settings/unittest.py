@@ -70,6 +70,18 @@ THUMBNAILS["METADATA"]["BACKEND"] = "thumbnails.backends.metadata.DatabaseBacken
 THUMBNAILS["STORAGE"]["BACKEND"] = "thumbnails.tests.storage.TemporaryStorage"
 
 
+#########
+# Cache #
+#########
+
+# Values are not kept between requests by default, as rollbacks between tests don't trigger invalidation signals.
+CACHES["access"] = {
+    "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    "LOCATION": "access",
+    "TIMEOUT": 0,
+}
+
+
 #########################
 # DJANGO REST FRAMEWORK #
 #########################
@@ -4,27 +4,69 @@ Storage management from octant.
 https://git.unistra.fr/di/cesar/octant/back/-/blob/develop/octant/apps/api/storages.py
 """
 
-from io import BytesIO
-
+import hashlib
+import hmac
+import io
+import mmap
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from tempfile import SpooledTemporaryFile
+
+import shortuuid
+from botocore.exceptions import BotoCoreError, ClientError
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
-from django.core.files.uploadedfile import InMemoryUploadedFile
-from django.db import models
+from django.core.files.base import File
+from django.core.files.storage import FileSystemStorage
+from django.db import connections, models, router, transaction
+from django.db.models.deletion import Collector
 from django.db.models.fields.files import FieldFile
-from pyrage import decrypt, encrypt, x25519
+from pyrage import decrypt_io, encrypt_io, x25519
 from storages.backends.s3boto3 import S3Boto3Storage
 from storages.utils import clean_name
 from thumbnails.fields import ImageField as ThumbnailImageField
 from thumbnails.files import ThumbnailedImageFile, ThumbnailManager
 
+from plana.images import generate_thumbnails_in_background
+
 PUBLIC_ACL = "public-read"
 PRIVATE_ACL = "private"
 
 PUBLIC_CLASSES_NAMES = ["Logo", "Association", "Document"]
-PRIVATE_CLASSES_NAMES = ["DocumentUpload", "ProjectCommissionFund"]
+PRIVATE_CLASSES_NAMES = ["DocumentUpload", "ExportJob", "ProjectCommissionFund"]
+CONTENT_ADDRESSED_CLASSES_NAMES = ["DocumentUpload"]
+
+S3_DELETE_OBJECTS_MAX_KEYS = 1000
+
+# Age payloads are a nonce followed by chunks of 64 KiB of plain content, each ending with an authentication tag.
+AGE_NONCE_SIZE = 16
+AGE_CHUNK_SIZE = 64 * 1024
+AGE_TAG_SIZE = 16
+
+_storages = {}
+_storages_lock = threading.Lock()
+
 
+class ThreadLocalBucketMixin:
+    """
+    Keep the bucket of S3 storages per thread, next to the boto3 resource it comes from.
 
-class MediaStorage(S3Boto3Storage):
+    Storage instances are shared by the whole process, and boto3 resources are not thread-safe.
+    django-storages keeps one resource per thread, but caches the bucket of the first thread on the instance.
+    """
+
+    @property
+    def bucket(self):
+        bucket = getattr(self._connections, "bucket", None)
+        if bucket is None:
+            bucket = self._connections.bucket = self.connection.Bucket(self.bucket_name)
+        return bucket
+
+
+class MediaStorage(ThreadLocalBucketMixin, S3Boto3Storage):
     """Default storage."""
 
     location = "media"
@@ -33,7 +75,7 @@ class MediaStorage(S3Boto3Storage):
         super().url(name, parameters, expire, http_method)
 
 
-class UpdateACLStorage(S3Boto3Storage):
+class UpdateACLStorage(ThreadLocalBucketMixin, S3Boto3Storage):
     """https://medium.com/@hiteshgarg14/how-to-dynamically-select-storage-in-django-filefield-bc2e8f5883fd"""
 
     def update_acl(self, name, acl=None):
@@ -60,11 +102,139 @@ class PrivateFileStorage(UpdateACLStorage):
     querystring_auth = True
 
 
-class EncryptedPrivateFileStorage(PrivateFileStorage):
-    """Storage used for encrypted files."""
+class HashingReader:
+    """Readable stream computing a keyed hash (HMAC-SHA256 with SECRET_KEY) of the content read through it."""
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, file):
+        self.file = file
+        self.hash = hmac.new(settings.SECRET_KEY.encode("utf-8"), digestmod=hashlib.sha256)
+
+    def read(self, size=-1):
+        data = self.file.read(size)
+        self.hash.update(data)
+        return data
+
+    def hexdigest(self):
+        return self.hash.hexdigest()
+
+
+class PrefixedReader:
+    """Readable stream returning bytes already read from a stream, followed by the rest of the stream."""
+
+    def __init__(self, prefix, file):
+        self.prefix = prefix
+        self.file = file
+
+    def read(self, size=-1):
+        if not self.prefix:
+            return self.file.read(size)
+        if size is None or size < 0:
+            data = self.prefix + self.file.read()
+            self.prefix = b""
+            return data
+        data = self.prefix[:size]
+        self.prefix = self.prefix[size:]
+        return data
+
+
+class PipedReader:
+    """
+    Readable stream of the bytes written by a function running in a background thread, through an OS pipe.
+
+    Errors raised by the function are raised again once all the bytes it wrote are read.
+    If the size of the stream is known, it can be sought forward (bytes being skipped) and to its end.
+    """
+
+    def __init__(self, write, size=None):
+        read_fd, write_fd = os.pipe()
+        self.pipe = os.fdopen(read_fd, "rb")
+        self.size = size
+        self.position = 0
+        self.pipe_position = 0
+        self.error = None
+        self.thread = threading.Thread(target=self._write, args=(write, os.fdopen(write_fd, "wb")), daemon=True)
+        self.thread.start()
+
+    def _write(self, write, pipe):
+        try:
+            with pipe:
+                write(pipe)
+        except Exception as error:
+            self.error = error
+
+    def _read(self, size):
+        data = self.pipe.read(size)
+        self.pipe_position += len(data)
+        if size is None or size < 0 or len(data) < size:
+            self.thread.join()
+            if self.error is not None:
+                raise self.error
+        return data
+
+    @property
+    def closed(self):
+        return self.pipe.closed
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return self.size is not None
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if self.size is None:
+            raise io.UnsupportedOperation("Stream of unknown size is not seekable")
+        if whence == os.SEEK_CUR:
+            offset += self.position
+        elif whence == os.SEEK_END:
+            offset += self.size
+        if offset < self.pipe_position:
+            raise io.UnsupportedOperation("Stream cannot be sought backwards")
+        self.position = offset
+        return offset
+
+    def read(self, size=-1):
+        while self.pipe_position < self.position:
+            if not self._read(min(self.position - self.pipe_position, AGE_CHUNK_SIZE)):
+                return b""
+        data = self._read(size)
+        self.position = self.pipe_position
+        return data
+
+    def close(self):
+        self.pipe.close()
+        self.thread.join()
+
+
+def read_age_header(encrypted_content):
+    """Read the header of an age encrypted stream, and return it with the bytes of the payload read after it."""
+    data = b""
+    while True:
+        mac_start = data.find(b"\n--- ")
+        mac_end = data.find(b"\n", mac_start + 1) if mac_start != -1 else -1
+        if mac_end != -1:
+            return data[: mac_end + 1], data[mac_end + 1 :]
+        chunk = encrypted_content.read(1024)
+        if not chunk:
+            raise ValueError("Invalid age header")
+        data += chunk
+
+
+def get_age_plain_size(payload_size):
+    """Return the size of the plain content of an age payload."""
+    chunks_size = payload_size - AGE_NONCE_SIZE
+    chunks_count = max(1, -(-chunks_size // (AGE_CHUNK_SIZE + AGE_TAG_SIZE)))
+    return chunks_size - chunks_count * AGE_TAG_SIZE
+
+
+class AgeEncryptionMixin:
+    """Age encryption of stored files, shared by S3 and local encrypted storages."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
         self.age_public_key = settings.AGE_PUBLIC_KEY
         self.age_private_key = settings.AGE_PRIVATE_KEY
 
@@ -78,47 +248,374 @@ class EncryptedPrivateFileStorage(PrivateFileStorage):
         except Exception as error:
             raise ImproperlyConfigured(f"AGE public key not found : {error}") from error
 
-    def _open(self, name, mode="rb"):
-        file = super()._open(name, mode)
-        decrypted_file = self._decrypt(file)
-        return decrypted_file
-
-    def _save(self, name, content):
-        encrypted_file = self._encrypt(content)
-        return super()._save(name, encrypted_file)
-
     def _encrypt(self, original_file):
-        file_content = original_file.file.read()
-        encryption_result = encrypt(file_content, [self.recipient])
-        encrypted_file = InMemoryUploadedFile(
-            BytesIO(encryption_result),
-            # TODO Find a better way to handle field_name for large files.
-            original_file.field_name if hasattr(original_file, "field_name") else None,
-            original_file.name,
-            original_file.content_type,
-            len(encryption_result),
-            original_file.charset,
-            original_file.content_type_extra,
+        """Encrypt a file chunk by chunk, the result being kept in memory only if small enough."""
+        encrypted_content = SpooledTemporaryFile(max_size=settings.AGE_MAX_MEMORY_SIZE)
+        encrypt_io(original_file.file, encrypted_content, [self.recipient])
+        encrypted_content.seek(0)
+        encrypted_file = File(encrypted_content, name=original_file.name)
+        encrypted_file.content_type = getattr(original_file, "content_type", None)
+        return encrypted_file
+
+    def _decrypt(self, encrypted_content, name):
+        """Decrypt a readable stream chunk by chunk, the result being kept in memory only if small enough."""
+        decrypted_content = SpooledTemporaryFile(max_size=settings.AGE_MAX_MEMORY_SIZE)
+        decrypt_io(encrypted_content, decrypted_content, [self.identity])
+        decrypted_content.seek(0)
+        return File(decrypted_content, name=name)
+
+    def _encrypt_stream(self, original_file):
+        """Return a file encrypted in a background thread while it is read, without being stored anywhere."""
+        encrypted_file = File(
+            PipedReader(lambda encrypted_content: encrypt_io(original_file.file, encrypted_content, [self.recipient])),
+            name=original_file.name,
         )
+        encrypted_file.content_type = getattr(original_file, "content_type", None)
         return encrypted_file
 
-    def _decrypt(self, original_file):
-        file = original_file.read()
-        decryption_result = decrypt(file, [self.identity])
-        original_file.file._file = BytesIO(decryption_result)
-        return original_file
+    def _decrypt_stream(self, encrypted_content, encrypted_size, name, close):
+        """
+        Return a file decrypted in a background thread while it is read, without being stored anywhere.
+
+        The file can be sought forward and to its end, its size being computed from the size of the encrypted content.
+        close is called once the encrypted content is decrypted, or once decrypting it failed.
+        """
+        try:
+            header, payload_start = read_age_header(encrypted_content)
+        except Exception:
+            close()
+            raise
+        prefixed_content = PrefixedReader(header + payload_start, encrypted_content)
+
+        def decrypt(decrypted_content):
+            try:
+                decrypt_io(prefixed_content, decrypted_content, [self.identity])
+            finally:
+                close()
+
+        return File(PipedReader(decrypt, get_age_plain_size(encrypted_size - len(header))), name=name)
+
+    def _save(self, name, content):
+        encrypted_file = self._encrypt_stream(content)
+        try:
+            return super()._save(name, encrypted_file)
+        finally:
+            encrypted_file.close()
+
+    def save_content_addressed(self, directory, content):
+        """
+        Encrypt and store a file under a key derived from a keyed hash of its plain content.
+
+        The content is hashed while it is encrypted, and isn't stored again if an identical content already is.
+        The key is locked until the end of the current transaction, which must also save the reference to the file.
+        """
+        hashing_reader = HashingReader(content.file)
+        hashed_content = File(hashing_reader, name=content.name)
+        hashed_content.content_type = getattr(content, "content_type", None)
+        encrypted_file = self._encrypt(hashed_content)
+        try:
+            name = f"{directory}/{hashing_reader.hexdigest()}"
+            lock_content_addressed_files([name])
+            if not self.exists(name):
+                name = super()._save(name, encrypted_file)
+            return name
+        finally:
+            encrypted_file.close()
+
+
+class EncryptedPrivateFileStorage(AgeEncryptionMixin, PrivateFileStorage):
+    """Storage used for encrypted files."""
+
+    def _open(self, name, mode="rb"):
+        name = self._normalize_name(clean_name(name))
+        try:
+            encrypted_object = self.bucket.Object(name).get()
+        except ClientError as error:
+            if error.response["ResponseMetadata"]["HTTPStatusCode"] == 404:
+                raise FileNotFoundError(f"File does not exist: {name}") from error
+            raise
+        encrypted_body = encrypted_object["Body"]
+        return self._decrypt_stream(encrypted_body, encrypted_object["ContentLength"], name, encrypted_body.close)
+
+
+class LocalFileStorage(FileSystemStorage):
+    """Local filesystem storage used instead of S3 storages if USE_S3 is False."""
+
+    def update_acl(self, name, acl=None):
+        """Access to local files only depends on the web server configuration."""
+
+
+class LocalPublicFileStorage(LocalFileStorage):
+    """Local storage used for public files, stored in MEDIA_ROOT."""
+
+
+class LocalPrivateFileStorage(LocalFileStorage):
+    """Local storage used for private files, stored outside of MEDIA_ROOT."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("location", settings.PRIVATE_MEDIA_ROOT)
+        super().__init__(**kwargs)
+
+
+class LocalEncryptedPrivateFileStorage(AgeEncryptionMixin, LocalPrivateFileStorage):
+    """Local storage used for encrypted files, read through memory mapping."""
+
+    def _open(self, name, mode="rb"):
+        with open(self.path(name), "rb") as encrypted_file:
+            encrypted_content = mmap.mmap(encrypted_file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._decrypt_stream(encrypted_content, len(encrypted_content), name, encrypted_content.close)
+
+
+def get_storage(storage_class, **options):
+    """Return the instance of a storage class shared by the whole process for the given options."""
+    key = (storage_class, tuple(sorted(options.items())))
+    storage = _storages.get(key)
+    if storage is None:
+        with _storages_lock:
+            storage = _storages.get(key)
+            if storage is None:
+                storage = storage_class(**options)
+                _storages[key] = storage
+    return storage
+
+
+def get_instance_storage(instance, local=False, **private_options):
+    """Return the shared storage used for files of a model instance (encrypted if the model is private)."""
+    if instance.__class__.__name__ in PRIVATE_CLASSES_NAMES:
+        if local:
+            return get_storage(LocalEncryptedPrivateFileStorage)
+        return get_storage(EncryptedPrivateFileStorage, **private_options)
+    if local:
+        return get_storage(LocalPublicFileStorage)
+    return get_storage(PublicFileStorage)
+
+
+class FilesDeletionReport:
+    """Amount of deleted files, names of files that could not be deleted and duration of a files deletion."""
+
+    def __init__(self):
+        self.deleted = 0
+        self.failed = []
+        self.duration = 0
+
+    @property
+    def rate(self):
+        """Deleted files per second."""
+        if self.duration == 0:
+            return float(self.deleted)
+        return self.deleted / self.duration
+
+    def __str__(self):
+        return f"{self.deleted} files deleted ({self.rate:.1f} per second), {len(self.failed)} failed."
+
+
+def delete_s3_objects(client, bucket_name, keys):
+    """Delete up to 1000 S3 objects with a single request, retrying failed keys. Return deleted count and failed keys."""
+    deleted = 0
+    for attempt in range(settings.STORAGES_DELETION_RETRIES + 1):
+        if attempt > 0:
+            time.sleep(2 ** (attempt - 1))
+        try:
+            result = client.delete_objects(
+                Bucket=bucket_name,
+                Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
+            )
+        except (BotoCoreError, ClientError):
+            continue
+        failed_keys = [error["Key"] for error in result.get("Errors", [])]
+        deleted += len(keys) - len(failed_keys)
+        keys = failed_keys
+        if not keys:
+            break
+    return deleted, keys
+
+
+def lock_content_addressed_files(names, using="default"):
+    """
+    Lock names of content-addressed files until the end of the current transaction.
+
+    Storing a file and saving its reference, or checking a file isn't referenced anymore and deleting it, are done
+    while holding the lock, so a file cannot be deleted between the existence check of an identical upload and the
+    commit of its new reference.
+    """
+    with connections[using].cursor() as cursor:
+        for name in sorted(set(names)):
+            lock_id = int.from_bytes(hashlib.sha256(name.encode("utf-8")).digest()[:8], "big", signed=True)
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [lock_id])
+
+
+def get_unreferenced_files(instances, field_name):
+    """
+    Return files of model instances about to be deleted, except the ones still referenced by other instances.
+
+    Identical files of content-addressed models being stored once, they must only be deleted with their last reference.
+    Returned files are locked until the end of the current transaction, in which the instances must be deleted.
+    """
+    instances = list(instances)
+    if not instances:
+        return []
+    files = {}
+    for instance in instances:
+        file = getattr(instance, field_name)
+        if file:
+            files.setdefault(file.name, file)
+    model = instances[0].__class__
+    lock_content_addressed_files(files, using=router.db_for_write(model))
+    referenced_names = set(
+        model._default_manager.filter(**{f"{field_name}__in": list(files)})
+        .exclude(id__in=[instance.id for instance in instances if instance.id is not None])
+        .values_list(field_name, flat=True)
+    )
+    return [file for name, file in files.items() if name not in referenced_names]
+
+
+def delete_unreferenced_files(instances, field_name):
+    """
+    Delete files of deleted instances of a content-addressed model, except the ones still referenced by other instances.
+
+    Is used instead of django-cleanup for content-addressed models, as files are shared by several instances.
+    """
+    instances = list(instances)
+    if not instances:
+        return FilesDeletionReport()
+    with transaction.atomic(using=router.db_for_write(instances[0].__class__)):
+        return delete_files(get_unreferenced_files(instances, field_name))
+
+
+def get_file_fields(model):
+    """Return file fields of a model."""
+    return [field for field in model._meta.concrete_fields if isinstance(field, models.FileField)]
+
+
+def collect_deleted_instances(queryset):
+    """Return a collector of the instances of a queryset and of the ones deleted in cascade."""
+    collector = Collector(using=queryset.db, origin=queryset)
+    collector.collect(queryset.order_by())
+    return collector
+
+
+def get_deleted_files(collector):
+    """Return files of collected instances, except content-addressed files still referenced by other instances."""
+    files = []
+    for model, instances in collector.data.items():
+        for field in get_file_fields(model):
+            if model.__name__ in CONTENT_ADDRESSED_CLASSES_NAMES:
+                files.extend(get_unreferenced_files(instances, field.name))
+            else:
+                files.extend(getattr(instance, field.name) for instance in instances)
+    return files
+
+
+def delete_with_files(queryset):
+    """
+    Delete instances of a queryset (and the ones deleted in cascade) with their files, and return the deletion report.
+
+    Files are deleted with as few requests as possible before the instances, which don't delete them again one by one
+    (with django-cleanup or the signals of content-addressed models). Instances whose files (or files of instances
+    deleted in cascade) could not be deleted are kept, to be deleted again later.
+    """
+    with transaction.atomic(using=queryset.db):
+        collector = collect_deleted_instances(queryset)
+        report = delete_files(get_deleted_files(collector))
+        if report.failed:
+            failed_names = set(report.failed)
+            kept_ids = []
+            for instance in queryset.order_by():
+                instance_collector = collect_deleted_instances(queryset.filter(pk=instance.pk))
+                if any(
+                    getattr(collected_instance, field.name).name in failed_names
+                    for model, collected_instances in instance_collector.data.items()
+                    for field in get_file_fields(model)
+                    for collected_instance in collected_instances
+                ):
+                    kept_ids.append(instance.pk)
+            collector = collect_deleted_instances(queryset.exclude(pk__in=kept_ids))
+
+        # django-cleanup and signals of content-addressed models ignore deferred file fields.
+        for model, instances in collector.data.items():
+            for field in get_file_fields(model):
+                for instance in instances:
+                    instance.__dict__.pop(field.attname, None)
+        collector.delete()
+    return report
+
+
+def delete_files(files):
+    """
+    Delete stored files and their thumbnails with as few requests as possible.
+
+    Files stored on S3 are grouped in DeleteObjects requests sent concurrently, other files are deleted one by one.
+    """
+    report = FilesDeletionReport()
+    started = time.monotonic()
+    names_by_storage = {}
+    thumbnails_managers = []
+    for file in files:
+        if not file:
+            continue
+        names = names_by_storage.setdefault(file.storage, [])
+        names.append(file.name)
+        thumbnails = getattr(file, "thumbnails", None)
+        if thumbnails is not None:
+            names.extend(thumbnail.name for thumbnail in thumbnails.all().values())
+            thumbnails_managers.append(thumbnails)
+
+    for storage, names in names_by_storage.items():
+        if isinstance(storage, S3Boto3Storage):
+            names_by_key = {storage._normalize_name(clean_name(name)): name for name in names}
+            keys = list(names_by_key)
+            client = storage.connection.meta.client
+            with ThreadPoolExecutor(max_workers=settings.STORAGES_DELETION_WORKERS) as executor:
+                batches = [
+                    keys[index : index + S3_DELETE_OBJECTS_MAX_KEYS]
+                    for index in range(0, len(keys), S3_DELETE_OBJECTS_MAX_KEYS)
+                ]
+                results = executor.map(partial(delete_s3_objects, client, storage.bucket_name), batches)
+                for deleted, failed_keys in results:
+                    report.deleted += deleted
+                    report.failed.extend(names_by_key[key] for key in failed_keys)
+        else:
+            for name in names:
+                try:
+                    storage.delete(name)
+                    report.deleted += 1
+                except OSError:
+                    report.failed.append(name)
+
+    for thumbnails in thumbnails_managers:
+        thumbnails.metadata_backend.flush_thumbnails(thumbnails.source_image.name)
+
+    report.duration = time.monotonic() - started
+    return report
 
 
 class DynamicStorageFieldFile(FieldFile):
     """Override default Django FieldFile."""
 
+    local_storage = False
+
     def __init__(self, instance, field, name):
         super().__init__(instance, field, name)
-        self.storage = PublicFileStorage()
-        if instance.__class__.__name__ in PRIVATE_CLASSES_NAMES:
-            self.storage = EncryptedPrivateFileStorage()
-        else:
-            self.storage = PublicFileStorage()
+        self.storage = get_instance_storage(instance, self.local_storage)
+
+    def save(self, name, content, save=True):
+        """
+        Store files of content-addressed models once for identical contents, shared by all their instances.
+
+        The instance is saved in the transaction storing the file, callers using save=False must save it in theirs.
+        """
+        if self.instance.__class__.__name__ not in CONTENT_ADDRESSED_CLASSES_NAMES:
+            super().save(name, content, save)
+            return
+        with transaction.atomic(using=router.db_for_write(self.instance.__class__)):
+            self.name = self.storage.save_content_addressed(settings.S3_CONTENT_ADDRESSED_FILEPATH, content)
+            setattr(self.instance, self.field.attname, self.name)
+            self._committed = True
+
+            if save:
+                self.instance.save()
+
+    save.alters_data = True
 
     def update_acl(self):
         if not self:
@@ -133,14 +630,12 @@ class DynamicStorageFieldFile(FieldFile):
 class DynamicStorageThumbnailedFieldFile(ThumbnailedImageFile):
     """FieldFile used with django-thumbnails."""
 
+    local_storage = False
     querystring_expire = 60 * 60 * 24
 
     def __init__(self, instance, field, name, **kwargs):
         FieldFile.__init__(self, instance, field, name)
-        if instance.__class__.__name__ in PRIVATE_CLASSES_NAMES:
-            self.storage = EncryptedPrivateFileStorage(querystring_expire=self.querystring_expire)
-        else:
-            self.storage = PublicFileStorage()
+        self.storage = get_instance_storage(instance, self.local_storage, querystring_expire=self.querystring_expire)
 
         self.metadata_backend = field.metadata_backend
         self.thumbnails = ThumbnailManager(
@@ -172,13 +667,8 @@ class DynamicStorageFileField(models.FileField):
     attr_class = DynamicStorageFieldFile
 
     def pre_save(self, model_instance, add):
-        if model_instance.__class__.__name__ in PRIVATE_CLASSES_NAMES:
-            storage = EncryptedPrivateFileStorage()
-        else:
-            storage = PublicFileStorage()
-
         file = super().pre_save(model_instance, add)
-        file.storage = storage
+        file.storage = get_instance_storage(model_instance, self.attr_class.local_storage)
 
         if file and file._committed:
             # This update_acl method we have already defined
@@ -194,15 +684,55 @@ class DynamicThumbnailImageField(ThumbnailImageField):
     attr_class = DynamicStorageThumbnailedFieldFile
 
     def pre_save(self, model_instance, add):
-        if model_instance.__class__.__name__ in PRIVATE_CLASSES_NAMES:
-            storage = EncryptedPrivateFileStorage()
-        else:
-            storage = PublicFileStorage()
-
-        file = super().pre_save(model_instance, add)
-        file.storage = storage
+        """Store the uploaded image as is, its resizing and thumbnails being generated in the background once saved."""
+        file = getattr(model_instance, self.attname)
+        if file and not file._committed:
+            file.save(f"{shortuuid.uuid()}{os.path.splitext(file.name)[1]}", file.file, save=False)
+            transaction.on_commit(
+                partial(
+                    generate_thumbnails_in_background,
+                    file.storage,
+                    self.metadata_backend,
+                    file.name,
+                    self.resize_source_to,
+                    [size for size in self.pregenerated_sizes if size != self.resize_source_to],
+                )
+            )
+        file.storage = get_instance_storage(model_instance, self.attr_class.local_storage)
 
         if file and file._committed:
             file.update_acl()
 
         return file
+
+
+class LocalDynamicStorageFieldFile(DynamicStorageFieldFile):
+    """FieldFile storing files on the local filesystem."""
+
+    local_storage = True
+
+
+class LocalDynamicStorageThumbnailedFieldFile(DynamicStorageThumbnailedFieldFile):
+    """FieldFile used with django-thumbnails storing files on the local filesystem."""
+
+    local_storage = True
+
+
+class LocalDynamicStorageFileField(DynamicStorageFileField):
+    """FileField storing files on the local filesystem, used instead of DynamicStorageFileField if USE_S3 is False."""
+
+    attr_class = LocalDynamicStorageFieldFile
+
+    def deconstruct(self):
+        name, _path, args, kwargs = super().deconstruct()
+        return name, "plana.storages.DynamicStorageFileField", args, kwargs
+
+
+class LocalDynamicThumbnailImageField(DynamicThumbnailImageField):
+    """ImageField used with django-thumbnails storing files on the local filesystem, used if USE_S3 is False."""
+
+    attr_class = LocalDynamicStorageThumbnailedFieldFile
+
+    def deconstruct(self):
+        name, _path, args, kwargs = super().deconstruct()
+        return name, "plana.storages.DynamicThumbnailImageField", args, kwargs
@@ -0,0 +1,41 @@
+"""Tests for background generation of thumbnails."""
+
+import io
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import InMemoryStorage
+from django.test import TestCase
+from PIL import Image
+from thumbnails.backends.metadata import DatabaseBackend
+
+from plana.images import generate_thumbnails
+
+
+class GenerateThumbnailsTest(TestCase):
+    def setUp(self):
+        self.storage = InMemoryStorage()
+        self.metadata_backend = DatabaseBackend()
+        image_content = io.BytesIO()
+        Image.new("RGB", (1000, 500), "red").save(image_content, "PNG")
+        self.source_name = self.storage.save("logo.png", ContentFile(image_content.getvalue()))
+        self.metadata_backend.add_source(self.source_name)
+
+    def test_generate_thumbnails(self):
+        generate_thumbnails(self.storage, self.metadata_backend, self.source_name, "base", ["list", "detail"])
+
+        with self.storage.open(self.source_name) as source_file:
+            self.assertEqual(Image.open(source_file).size, (250, 250))
+        thumbnails = {
+            thumbnail.size: thumbnail for thumbnail in self.metadata_backend.get_thumbnails(self.source_name)
+        }
+        self.assertEqual(sorted(thumbnails), ["detail", "list"])
+        with self.storage.open(thumbnails["list"].name) as thumbnail_file:
+            self.assertEqual(Image.open(thumbnail_file).size, (100, 50))
+
+    def test_generate_thumbnails_again(self):
+        generate_thumbnails(self.storage, self.metadata_backend, self.source_name, sizes=["list"])
+        name = self.metadata_backend.get_thumbnail(self.source_name, "list").name
+
+        generate_thumbnails(self.storage, self.metadata_backend, self.source_name, sizes=["list"])
+        self.assertEqual(self.metadata_backend.get_thumbnail(self.source_name, "list").name, name)
+        self.assertEqual(len(self.metadata_backend.get_thumbnails(self.source_name)), 1)
@@ -4,16 +4,31 @@ Storage tests from octant.
 https://git.unistra.fr/di/cesar/octant/back/-/blob/develop/octant/apps/api/tests/test_storages.py
 """
 
-from unittest.mock import Mock
+import io
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from unittest.mock import Mock, PropertyMock, patch
 
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
-from django.test import TestCase
+from django.db.models.fields.files import FieldFile
+from django.test import TestCase, override_settings
+from pyrage import decrypt, encrypt
 
+from plana.apps.exports.models.export_job import ExportJob
 from plana.storages import (
     DynamicStorageFieldFile,
     EncryptedPrivateFileStorage,
+    LocalDynamicStorageFieldFile,
+    LocalEncryptedPrivateFileStorage,
+    LocalPublicFileStorage,
     PrivateFileStorage,
     PublicFileStorage,
+    delete_files,
+    delete_with_files,
+    get_storage,
 )
 
 
@@ -22,7 +37,7 @@ class UpdateACLStorageTest(TestCase):
         public_storage = PublicFileStorage()
         bucket = Mock()
         put = bucket.Object.return_value.Acl.return_value.put
-        public_storage._bucket = bucket
+        public_storage._connections.bucket = bucket
         public_storage.update_acl("name")
         put.assert_called_with(ACL=PublicFileStorage.default_acl)
         self.assertEqual(put.call_count, 1)
@@ -31,7 +46,7 @@ class UpdateACLStorageTest(TestCase):
         private_storage = PrivateFileStorage()
         bucket = Mock()
         put = bucket.Object.return_value.Acl.return_value.put
-        private_storage._bucket = bucket
+        private_storage._connections.bucket = bucket
         private_storage.update_acl("name")
         put.assert_called_with(ACL=PrivateFileStorage.default_acl)
         self.assertEqual(put.call_count, 1)
@@ -40,11 +55,22 @@ class UpdateACLStorageTest(TestCase):
         private_storage = EncryptedPrivateFileStorage()
         bucket = Mock()
         put = bucket.Object.return_value.Acl.return_value.put
-        private_storage._bucket = bucket
+        private_storage._connections.bucket = bucket
         private_storage.update_acl("name")
         put.assert_called_with(ACL=EncryptedPrivateFileStorage.default_acl)
         self.assertEqual(put.call_count, 1)
 
+    def test_bucket_is_kept_per_thread(self):
+        public_storage = PublicFileStorage()
+        with patch.object(PublicFileStorage, "connection", new_callable=PropertyMock) as connection:
+            connection.return_value.Bucket.side_effect = lambda name: Mock()
+            bucket = public_storage.bucket
+            self.assertIs(public_storage.bucket, bucket)
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                thread_bucket = executor.submit(lambda: public_storage.bucket).result()
+        self.assertIsNot(thread_bucket, bucket)
+        self.assertEqual(connection.return_value.Bucket.call_count, 2)
+
 
 class DynamicStorageFieldFileTest(TestCase):
     def test_file_field_is_initialized_with_correct_storage_class(self):
@@ -61,6 +87,38 @@ class DynamicStorageFieldFileTest(TestCase):
         file = DynamicStorageFieldFile(private_instance, field=field, name="Name")
         self.assertIsInstance(file.storage, EncryptedPrivateFileStorage)
 
+    def test_file_fields_share_storage_instances(self):
+        field = Mock()
+        field.storage = default_storage
+
+        public_instance = Mock()
+        public_instance.__class__.__name__ = "Document"
+        public_file = DynamicStorageFieldFile(public_instance, field=field, name="Name")
+        self.assertIs(public_file.storage, DynamicStorageFieldFile(public_instance, field=field, name="Other").storage)
+        self.assertIs(public_file.storage, get_storage(PublicFileStorage))
+
+        private_instance = Mock()
+        private_instance.__class__.__name__ = "DocumentUpload"
+        private_file = DynamicStorageFieldFile(private_instance, field=field, name="Name")
+        self.assertIs(
+            private_file.storage, DynamicStorageFieldFile(private_instance, field=field, name="Other").storage
+        )
+        self.assertIsNot(private_file.storage, get_storage(EncryptedPrivateFileStorage, querystring_expire=60))
+
+    def test_local_file_field_is_initialized_with_correct_storage_class(self):
+        field = Mock()
+        field.storage = default_storage
+
+        public_instance = Mock()
+        public_instance.__class__.__name__ = "Document"
+        file = LocalDynamicStorageFieldFile(public_instance, field=field, name="Name")
+        self.assertIsInstance(file.storage, LocalPublicFileStorage)
+
+        private_instance = Mock()
+        private_instance.__class__.__name__ = "DocumentUpload"
+        file = LocalDynamicStorageFieldFile(private_instance, field=field, name="Name")
+        self.assertIsInstance(file.storage, LocalEncryptedPrivateFileStorage)
+
     def test_file_field_update_acl_method_calls_update_acl_from_storage(self):
         field = Mock()
         field.storage = default_storage
@@ -70,3 +128,147 @@ class DynamicStorageFieldFileTest(TestCase):
         file.storage = Mock()
         file.update_acl()
         file.storage.update_acl.assert_called_once_with("filename.ext")
+
+
+@override_settings(AGE_MAX_MEMORY_SIZE=1024)
+class EncryptedPrivateFileStorageTest(TestCase):
+    def test_encrypted_file_is_decrypted(self):
+        private_storage = EncryptedPrivateFileStorage()
+        content = b"content" * 100000
+        encrypted_file = private_storage._encrypt(ContentFile(content, name="file.txt"))
+        self.assertEqual(encrypted_file.name, "file.txt")
+        self.assertNotIn(b"content", encrypted_file.read())
+        encrypted_file.seek(0)
+        decrypted_file = private_storage._decrypt(encrypted_file, "file.txt")
+        self.assertEqual(decrypted_file.read(), content)
+
+    def test_open_streams_previously_encrypted_file(self):
+        private_storage = EncryptedPrivateFileStorage()
+        bucket = Mock()
+        encrypted_content = encrypt(b"content", [private_storage.recipient])
+        bucket.Object.return_value.get.return_value = {
+            "Body": BytesIO(encrypted_content),
+            "ContentLength": len(encrypted_content),
+        }
+        private_storage._connections.bucket = bucket
+        file = private_storage.open("file.txt")
+        bucket.Object.assert_called_with("file.txt")
+        self.assertEqual(file.size, 7)
+        self.assertEqual(file.read(), b"content")
+
+    def test_open_decrypts_lazily(self):
+        private_storage = EncryptedPrivateFileStorage()
+        bucket = Mock()
+        content = bytes(range(256)) * 1000
+        encrypted_content = encrypt(content, [private_storage.recipient])
+        bucket.Object.return_value.get.return_value = {
+            "Body": BytesIO(encrypted_content),
+            "ContentLength": len(encrypted_content),
+        }
+        private_storage._connections.bucket = bucket
+        with private_storage.open("file.txt") as file:
+            self.assertEqual(file.size, len(content))
+            file.seek(100000)
+            self.assertEqual(file.read(10), content[100000:100010])
+            with self.assertRaises(io.UnsupportedOperation):
+                file.seek(0)
+
+        corrupted_content = encrypted_content[:-1] + bytes([encrypted_content[-1] ^ 1])
+        bucket.Object.return_value.get.return_value = {
+            "Body": BytesIO(corrupted_content),
+            "ContentLength": len(corrupted_content),
+        }
+        with private_storage.open("file.txt") as file:
+            with self.assertRaises(OSError):
+                file.read()
+
+    def test_save_streams_encrypted_file(self):
+        private_storage = EncryptedPrivateFileStorage()
+        bucket = Mock()
+        uploaded_contents = []
+        bucket.Object.return_value.upload_fileobj.side_effect = lambda content, **kwargs: uploaded_contents.append(
+            content.read()
+        )
+        private_storage._connections.bucket = bucket
+        private_storage._save("file.txt", ContentFile(b"content" * 100000, name="file.txt"))
+        self.assertEqual(decrypt(uploaded_contents[0], [private_storage.identity]), b"content" * 100000)
+
+    def test_local_file_is_stored_encrypted(self):
+        with tempfile.TemporaryDirectory() as location:
+            private_storage = LocalEncryptedPrivateFileStorage(location=location)
+            content = b"content" * 100000
+            name = private_storage.save("file.txt", ContentFile(content))
+            with open(private_storage.path(name), "rb") as stored_file:
+                self.assertNotIn(b"content", stored_file.read())
+            with private_storage.open(name) as file:
+                self.assertEqual(file.read(), content)
+
+    def test_identical_contents_are_stored_once(self):
+        with tempfile.TemporaryDirectory() as location:
+            private_storage = LocalEncryptedPrivateFileStorage(location=location)
+            name = private_storage.save_content_addressed("documents", ContentFile(b"content", name="file.txt"))
+            self.assertEqual(
+                private_storage.save_content_addressed("documents", ContentFile(b"content", name="other.txt")), name
+            )
+            self.assertNotEqual(
+                private_storage.save_content_addressed("documents", ContentFile(b"other", name="file.txt")), name
+            )
+            self.assertEqual(len(private_storage.listdir("documents")[1]), 2)
+            with private_storage.open(name) as file:
+                self.assertEqual(file.read(), b"content")
+
+
+class DeleteFilesTest(TestCase):
+    @override_settings(STORAGES_DELETION_RETRIES=1)
+    @patch("plana.storages.time.sleep")
+    def test_delete_files_in_batches(self, sleep):
+        private_storage = PrivateFileStorage()
+        private_storage._connections.connection = Mock()
+        client = private_storage.connection.meta.client
+        failed_once_keys = set()
+
+        def delete_objects(Bucket, Delete):
+            keys = [s3_object["Key"] for s3_object in Delete["Objects"]]
+            errors = [{"Key": "file-1", "Code": "InternalError"}] if "file-1" in keys else []
+            if "file-0" in keys and "file-0" not in failed_once_keys:
+                failed_once_keys.add("file-0")
+                errors.append({"Key": "file-0", "Code": "InternalError"})
+            return {"Errors": errors}
+
+        client.delete_objects.side_effect = delete_objects
+        files = [FieldFile(None, Mock(storage=private_storage), f"file-{index}") for index in range(2500)]
+        files.append(None)
+        report = delete_files(files)
+
+        self.assertEqual(client.delete_objects.call_count, 4)
+        self.assertEqual(
+            max(len(call.kwargs["Delete"]["Objects"]) for call in client.delete_objects.call_args_list), 1000
+        )
+        self.assertEqual(report.deleted, 2499)
+        self.assertEqual(report.failed, ["file-1"])
+        self.assertEqual(sleep.call_count, 1)
+
+    @patch("django.core.files.storage.FileSystemStorage.delete")
+    @patch("plana.storages.delete_files")
+    def test_delete_with_files(self, delete_files_mock, storage_delete):
+        users = [get_user_model().objects.create_user(f"user-{index}") for index in range(2)]
+        for user in users:
+            ExportJob.objects.create(
+                path="/projects/export",
+                base_url="http://testserver/",
+                user=user,
+                user_scope="",
+                path_file=f"exports/{user.username}.csv",
+            )
+        delete_files_mock.return_value.failed = ["exports/user-1.csv"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            report = delete_with_files(get_user_model().objects.filter(id__in=[user.id for user in users]))
+
+        self.assertEqual(report, delete_files_mock.return_value)
+        self.assertEqual(
+            sorted(file.name for file in delete_files_mock.call_args.args[0]),
+            ["exports/user-0.csv", "exports/user-1.csv"],
+        )
+        self.assertEqual(list(ExportJob.objects.values_list("user__username", flat=True)), ["user-1"])
+        storage_delete.assert_not_called()
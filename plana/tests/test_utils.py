@@ -1,8 +1,25 @@
 """Tests for generic functions."""
 
-from django.test import TestCase
+import datetime
+import io
+import zipfile
+from unittest.mock import Mock, patch
 
-from plana.utils import to_bool, valid_date_format
+from botocore.exceptions import ClientError
+from django.core.files.base import ContentFile
+from django.core.files.storage import InMemoryStorage
+from django.db.models.fields.files import FieldFile
+from django.test import RequestFactory, TestCase, override_settings
+
+from plana.pdf import RenderingPool, render_pdf
+from plana.utils import (
+    PDFTemplatesCache,
+    generate_file_response,
+    generate_zip_response,
+    notification_attachments_cache,
+    to_bool,
+    valid_date_format,
+)
 
 
 class PlanAUtilsTests(TestCase):
@@ -26,3 +43,154 @@ class PlanAUtilsTests(TestCase):
 
         date_wrong = valid_date_format("29-06-2023")
         self.assertFalse(date_wrong)
+
+    @override_settings(EXPORTS_ZIP_PREFETCH_SIZE=2)
+    def test_generate_zip_response(self):
+        """Files are streamed in a ZIP archive keeping the given order."""
+        contents = {f"file-{index}.txt": f"content {index}".encode() for index in range(5, 0, -1)}
+        response = generate_zip_response(
+            "documents", [(name, ContentFile(content)) for name, content in contents.items()]
+        )
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Disposition"], "attachment; filename=documents.zip")
+
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+        self.assertEqual(archive.namelist(), list(contents))
+        for name, content in contents.items():
+            self.assertEqual(archive.read(name), content)
+
+    def test_generate_file_response_range(self):
+        """Stored files are streamed, entirely or partially if a range is asked."""
+        storage = InMemoryStorage()
+        file = FieldFile(None, Mock(storage=storage), storage.save("file.txt", ContentFile(b"0123456789")))
+
+        response = generate_file_response(RequestFactory().get("/"), file, "file.txt")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(b"".join(response.streaming_content), b"0123456789")
+
+        ranges = {"bytes=2-5": b"2345", "bytes=7-": b"789", "bytes=-3": b"789", "bytes=8-20": b"89"}
+        for byte_range, content in ranges.items():
+            response = generate_file_response(RequestFactory().get("/", HTTP_RANGE=byte_range), file, "file.txt")
+            self.assertEqual(response.status_code, 206)
+            self.assertEqual(response["Content-Length"], str(len(content)))
+            self.assertEqual(b"".join(response.streaming_content), content)
+        self.assertEqual(response["Content-Range"], "bytes 8-9/10")
+
+        response = generate_file_response(RequestFactory().get("/", HTTP_RANGE="bytes=20-"), file, "file.txt")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */10")
+
+    @override_settings(STORAGES_DOWNLOAD_MODES={"InMemoryStorage": "redirect"})
+    def test_generate_file_response_redirect(self):
+        """Stored files are redirected to their storage URL if the storage download mode asks it."""
+        storage = InMemoryStorage()
+        file = FieldFile(None, Mock(storage=storage), storage.save("file.txt", ContentFile(b"content")))
+        response = generate_file_response(RequestFactory().get("/"), file, "file.txt")
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response["Location"], storage.url(file.name))
+
+    @override_settings(TEMPLATES_PDF_CACHE_SIZE=1, TEMPLATES_PDF_CACHE_REVALIDATE_INTERVAL=60)
+    @patch("plana.utils.get_s3_client")
+    def test_pdf_templates_cache(self, get_s3_client):
+        """Compiled PDF templates are cached, revalidated on their ETag, and fetched again once invalidated."""
+        s3_client = get_s3_client.return_value
+        s3_client.get_object.side_effect = lambda **kwargs: {
+            "Body": io.BytesIO(f"{kwargs['Key']} {{{{ value }}}}".encode()),
+            "ETag": '"etag"',
+        }
+        cache = PDFTemplatesCache()
+
+        template = cache.get("summary.html")
+        self.assertEqual(template.render({"value": 1}), "summary.html 1")
+        self.assertIs(cache.get("summary.html"), template)
+        self.assertEqual(s3_client.get_object.call_count, 1)
+
+        with override_settings(TEMPLATES_PDF_CACHE_REVALIDATE_INTERVAL=0):
+            s3_client.get_object.side_effect = ClientError(
+                {"Error": {"Code": "304"}, "ResponseMetadata": {"HTTPStatusCode": 304}}, "GetObject"
+            )
+            self.assertIs(cache.get("summary.html"), template)
+            self.assertEqual(s3_client.get_object.call_args.kwargs["IfNoneMatch"], '"etag"')
+
+        cache.invalidate("summary.html")
+        with self.assertRaises(ClientError):
+            cache.get("summary.html")
+        self.assertNotIn("IfNoneMatch", s3_client.get_object.call_args.kwargs)
+
+        s3_client.get_object.side_effect = lambda **kwargs: {"Body": io.BytesIO(b"list"), "ETag": '"etag"'}
+        cache.get("summary.html")
+        cache.get("list.html")
+        self.assertEqual(list(cache.templates), ["list.html"])
+        self.assertEqual(
+            {key: value for key, value in cache.get_stats().items() if key != "fetch_duration"},
+            {"hits": 1, "misses": 3, "revalidations": 1, "fetches": 4, "size": 1},
+        )
+
+    def test_render_pdf(self):
+        """PDF files are rendered by the pool of rendering processes, or in the current process if disabled."""
+        html = "<h1>PlanA</h1>"
+        self.assertTrue(render_pdf(html, "http://testserver/").startswith(b"%PDF"))
+        with override_settings(PDF_RENDERING_WORKERS=0):
+            self.assertTrue(render_pdf(html, "http://testserver/").startswith(b"%PDF"))
+
+    @patch("plana.pdf.RenderingProcess")
+    def test_rendering_pool_replaces_processes(self, rendering_process):
+        """Rendering processes are replaced after a timeout or their maximum amount of renders."""
+        rendering_process.return_value.renders = 0
+        rendering_process.return_value.render.side_effect = TimeoutError
+        pool = RenderingPool(
+            max_workers=1, max_renders_per_process=2, max_fetched_resources=0, fetched_resources_timeout=0
+        )
+        with self.assertRaises(TimeoutError):
+            pool.render("<h1>PlanA</h1>", "http://testserver/", 1)
+        rendering_process.return_value.stop.assert_called_once()
+
+        rendering_process.return_value.render.side_effect = None
+        rendering_process.return_value.render.return_value = b"%PDF"
+        self.assertEqual(pool.render("<h1>PlanA</h1>", "http://testserver/", 1), b"%PDF")
+        self.assertEqual(rendering_process.call_count, 2)
+        rendering_process.return_value.renders = 2
+        pool.render("<h1>PlanA</h1>", "http://testserver/", 1)
+        self.assertEqual(rendering_process.return_value.stop.call_count, 2)
+
+    @patch("plana.utils.generate_pdf_binary", return_value=b"%PDF")
+    def test_notification_attachments_cache(self, generate_pdf_binary):
+        """Identical PDF notifications are rendered and stored once, then read from the stored file."""
+        storage = InMemoryStorage()
+        pcf_obj = Mock()
+        pcf_obj.last_notification_file.name = ""
+        pcf_obj.last_notification_file.storage = storage
+        pcf_obj.last_notification_file.save.side_effect = lambda name, content, save: setattr(
+            pcf_obj.last_notification_file, "name", storage.save(name, content)
+        )
+        temp_attachment = {
+            "template_name": "notification.html",
+            "context_attach": {"project_name": "Project", "date": datetime.date(2024, 1, 1)},
+            "request": None,
+            "pcf_obj": pcf_obj,
+        }
+
+        with notification_attachments_cache() as attachments_cache:
+            self.assertEqual(attachments_cache.get_binary(temp_attachment), b"%PDF")
+            with notification_attachments_cache() as nested_attachments_cache:
+                self.assertIs(nested_attachments_cache, attachments_cache)
+                identical_attachment = dict(temp_attachment, context_attach=dict(temp_attachment["context_attach"]))
+                self.assertEqual(nested_attachments_cache.get_binary(identical_attachment), b"%PDF")
+            self.assertEqual(generate_pdf_binary.call_count, 1)
+            pcf_obj.last_notification_file.save.assert_called_once()
+
+            other_attachment = dict(temp_attachment, context_attach={"project_name": "Other project"}, pcf_obj=None)
+            attachments_cache.get_binary(other_attachment)
+            attachments_cache.get_binary(other_attachment)
+            self.assertEqual(generate_pdf_binary.call_count, 2)
+
+        with notification_attachments_cache() as attachments_cache:
+            self.assertEqual(attachments_cache.get_binary(temp_attachment), b"%PDF")
+            self.assertEqual(generate_pdf_binary.call_count, 2)
+            pcf_obj.last_notification_file.save.assert_called_once()
+
+            changed_attachment = dict(temp_attachment, context_attach={"project_name": "Project", "date": None})
+            attachments_cache.get_binary(changed_attachment)
+            self.assertEqual(generate_pdf_binary.call_count, 3)
+            self.assertEqual(pcf_obj.last_notification_file.save.call_count, 2)
@@ -27,6 +27,7 @@ urlpatterns = [
     path("commissions/", include("plana.apps.commissions.urls")),
     path("contents/", include("plana.apps.contents.urls")),
     path("documents/", include("plana.apps.documents.urls")),
+    path("exports/", include("plana.apps.exports.urls")),
     path("groups/", include("plana.apps.groups.urls")),
     path("institutions/", include("plana.apps.institutions.urls")),
     path("projects/", include("plana.apps.projects.urls")),
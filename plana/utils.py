@@ -1,21 +1,46 @@
 """Generic functions to send emails, and convert "true" and "false" to real booleans."""
 
 import ast
+import contextlib
+import contextvars
+import csv
 import datetime
+import hashlib
+import itertools
+import json
 import logging
+import os
+import re
+import threading
+import time
+import zipfile
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
 
 import boto3
-import weasyprint
+from botocore.exceptions import ClientError
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.mail import EmailMultiAlternatives
-from django.http import HttpResponse
-from django.template import Context, Template
-from django.template.loader import get_template, render_to_string
+from django.db import models
+from django.http import (
+    FileResponse,
+    HttpResponse,
+    HttpResponseRedirect,
+    StreamingHttpResponse,
+)
+from django.template import engines
+from django.template.loader import get_template
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
+from openpyxl import Workbook
+from storages.backends.s3boto3 import S3Boto3Storage
 from zxcvbn import zxcvbn
 
+from plana.pdf import render_pdf
+from plana.storages import AgeEncryptionMixin
+
 
 def check_valid_password(password):
     """Check password standard rules and zxcvbn rules."""
@@ -37,6 +62,91 @@ def _listify(x):
     return list(filter(None, set(x if isinstance(x, (list, tuple, set)) else [x])))
 
 
+def get_notification_key(template_name, context):
+    """Return a key identifying a PDF notification by its template name and a stable hash of its context."""
+
+    def serialize(value):
+        if isinstance(value, models.Model):
+            return [value._meta.label, value.pk]
+        return str(value)
+
+    context_json = json.dumps(context, sort_keys=True, default=serialize)
+    return template_name, hashlib.sha256(context_json.encode("utf-8")).hexdigest()
+
+
+class NotificationAttachmentsCache:
+    """
+    PDF notifications attached by the send_mail calls of an operation, rendered once for all recipients.
+
+    A notification is stored (encrypted) once in last_notification_file of its project commission fund, named after
+    the hash of its context, identical attachments being read from the stored file afterwards (by later operations
+    too, while it is still the current file of that project commission fund).
+    """
+
+    def __init__(self):
+        self.binaries = {}
+        self.stored_files = {}
+
+    def get_binary(self, temp_attachment):
+        """Return the content of a PDF notification, storing it in its project commission fund if given."""
+        key = get_notification_key(temp_attachment["template_name"], temp_attachment["context_attach"])
+        pcf_obj = temp_attachment.get("pcf_obj")
+        file_suffix = f"_{key[1][:16]}"
+        if pcf_obj is not None and file_suffix in os.path.basename(pcf_obj.last_notification_file.name or ""):
+            self.stored_files[key] = (pcf_obj, pcf_obj.last_notification_file.name)
+        stored_pcf, stored_name = self.stored_files.get(key, (None, None))
+        if (
+            stored_pcf is not None
+            and stored_pcf.last_notification_file.name == stored_name
+            and (pcf_obj is None or pcf_obj.pk == stored_pcf.pk)
+        ):
+            with stored_pcf.last_notification_file.storage.open(stored_name, "rb") as file:
+                return file.read()
+
+        binary = self.binaries.get(key)
+        if binary is None:
+            binary = generate_pdf_binary(
+                temp_attachment["context_attach"],
+                temp_attachment["request"],
+                temp_attachment["template_name"],
+            )
+        if pcf_obj is None:
+            self.binaries[key] = binary
+            return binary
+
+        filename = f"notification_{temp_attachment['context_attach']['project_name']}{file_suffix}.pdf"
+        pcf_obj.last_notification_file.save(
+            filename,
+            SimpleUploadedFile(filename, binary, content_type="application/pdf"),
+            save=True,
+        )
+        self.stored_files[key] = (pcf_obj, pcf_obj.last_notification_file.name)
+        self.binaries.pop(key, None)
+        return binary
+
+
+_notification_attachments_cache = contextvars.ContextVar("notification_attachments_cache", default=None)
+
+
+@contextlib.contextmanager
+def notification_attachments_cache():
+    """
+    Share PDF notifications between send_mail calls done in the block (or decorated function).
+
+    The cache of an enclosing block is used if any, so nested operations render each notification once.
+    """
+    cache = _notification_attachments_cache.get()
+    if cache is not None:
+        yield cache
+        return
+    cache = NotificationAttachmentsCache()
+    token = _notification_attachments_cache.set(cache)
+    try:
+        yield cache
+    finally:
+        _notification_attachments_cache.reset(token)
+
+
 def send_mail(
     to_,
     subject,
@@ -67,25 +177,14 @@ def send_mail(
 
     # Attachments for generated files
     if temp_attachments is not None:
-        for temp_attachment in temp_attachments:
-            if temp_attachment is not None:
-                binary = generate_pdf_binary(
-                        temp_attachment["context_attach"],
-                        temp_attachment["request"],
-                        temp_attachment["template_name"],
-                )
-                if "pcf_obj" in temp_attachment:
-                    filename = f"notification_{temp_attachment['context_attach']['project_name']}.pdf"
-                    temp_attachment["pcf_obj"].last_notification_file.save(
-                        filename,
-                        SimpleUploadedFile(filename, binary, content_type="application/pdf"),
-                        save=True
+        with notification_attachments_cache() as attachments_cache:
+            for temp_attachment in temp_attachments:
+                if temp_attachment is not None:
+                    mail.attach(
+                        temp_attachment["filename"],
+                        attachments_cache.get_binary(temp_attachment),
+                        temp_attachment["mimetype"],
                     )
-                mail.attach(
-                    temp_attachment["filename"],
-                    binary,
-                    temp_attachment["mimetype"],
-                )
 
     logger = logging.getLogger(__name__)
     try:
@@ -117,42 +216,271 @@ def valid_date_format(date):
     return True
 
 
+_s3_client = None
+_s3_client_lock = threading.Lock()
+
+
 def get_s3_client():
-    return boto3.client(
-        "s3",
-        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-        endpoint_url=settings.AWS_S3_ENDPOINT_URL,
+    """Return the S3 client shared by the whole process (boto3 clients are thread-safe), created on first use."""
+    global _s3_client
+    if _s3_client is None:
+        with _s3_client_lock:
+            if _s3_client is None:
+                _s3_client = boto3.client(
+                    "s3",
+                    aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                    aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+                    endpoint_url=settings.AWS_S3_ENDPOINT_URL,
+                )
+    return _s3_client
+
+
+class CSVBuffer:
+    """File-like object returning written CSV lines instead of storing them."""
+
+    def write(self, value):
+        return value
+
+
+def generate_csv_response(filename, fields, rows):
+    """Generate a CSV file as a streamed HTTP response (rows can be a generator, each row is sent once produced)."""
+    writer = csv.writer(CSVBuffer(), delimiter=";")
+
+    def stream():
+        yield writer.writerow(fields)
+        for row in rows:
+            yield writer.writerow(row)
+
+    csv_response = StreamingHttpResponse(stream(), content_type="application/csv")
+    csv_response["Content-Disposition"] = f"Content-Disposition: attachment; filename={filename}.csv"
+    return csv_response
+
+
+class ZIPBuffer:
+    """File-like object keeping written ZIP bytes only until they are sent."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, value):
+        self.chunks.append(bytes(value))
+        return len(value)
+
+    def flush(self):
+        pass
+
+    def pop(self):
+        value = b"".join(self.chunks)
+        self.chunks = []
+        return value
+
+
+def read_file(file):
+    """Read the whole content of a stored file."""
+    with file.open("rb") as opened_file:
+        return opened_file.read()
+
+
+def get_byte_range(range_header, size):
+    """Parse a single bytes range from a Range header, returning (start, end) or None if no range is asked."""
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", (range_header or "").strip())
+    if match is None or match.groups() == ("", ""):
+        return None
+    start, end = match.groups()
+    if start == "":
+        return max(size - int(end), 0), size - 1
+    if end == "":
+        return int(start), size - 1
+    return int(start), min(int(end), size - 1)
+
+
+def iter_file_range(file, start, length):
+    """Read a part of an opened file by blocks."""
+    file.seek(start)
+    while length > 0:
+        block = file.read(min(FileResponse.block_size, length))
+        if not block:
+            break
+        length -= len(block)
+        yield block
+
+
+def generate_file_response(request, file, filename):
+    """
+    Generate a HTTP response to download a stored file, depending on the download mode of its storage.
+
+    Non-encrypted files can be redirected to a short-lived presigned URL,
+    others are decrypted and streamed by the API with support of range requests.
+    """
+    if settings.STORAGES_DOWNLOAD_MODES.get(file.storage.__class__.__name__) == "redirect" and not isinstance(
+        file.storage, AgeEncryptionMixin
+    ):
+        if isinstance(file.storage, S3Boto3Storage):
+            return HttpResponseRedirect(file.storage.url(file.name, expire=settings.STORAGES_PRESIGNED_URL_EXPIRE))
+        return HttpResponseRedirect(file.storage.url(file.name))
+
+    opened_file = file.open("rb")
+    file_response = FileResponse(opened_file, as_attachment=False, filename=filename)
+    file_response["Accept-Ranges"] = "bytes"
+    size = int(file_response["Content-Length"])
+    byte_range = get_byte_range(request.headers.get("Range"), size)
+    if byte_range is None:
+        return file_response
+
+    start, end = byte_range
+    if start >= size or start > end:
+        file_response.close()
+        range_response = HttpResponse(status=416)
+        range_response["Content-Range"] = f"bytes */{size}"
+        return range_response
+
+    file_response.status_code = 206
+    file_response.streaming_content = iter_file_range(opened_file, start, end - start + 1)
+    file_response["Content-Length"] = end - start + 1
+    file_response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return file_response
+
+
+def generate_zip_response(filename, files):
+    """
+    Generate a ZIP archive as a streamed HTTP response.
+
+    files is a list of (name, file) tuples, a few files being fetched concurrently
+    while entries are written in the given order.
+    """
+    prefetch_size = settings.EXPORTS_ZIP_PREFETCH_SIZE
+
+    def stream():
+        buffer = ZIPBuffer()
+        files_iterator = iter(files)
+        with ThreadPoolExecutor(max_workers=prefetch_size) as executor:
+            pending_files = deque(
+                (name, executor.submit(read_file, file))
+                for name, file in itertools.islice(files_iterator, prefetch_size)
+            )
+            with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+                while pending_files:
+                    name, future = pending_files.popleft()
+                    content = future.result()
+                    for next_name, next_file in itertools.islice(files_iterator, 1):
+                        pending_files.append((next_name, executor.submit(read_file, next_file)))
+                    archive.writestr(name, content)
+                    del content
+                    yield buffer.pop()
+            yield buffer.pop()
+
+    zip_response = StreamingHttpResponse(stream(), content_type="application/x-zip-compressed")
+    zip_response["Content-Disposition"] = f"attachment; filename={filename}.zip"
+    return zip_response
+
+
+def generate_xlsx_response(filename, fields, rows):
+    """Generate a XLSX file as a HTTP response, rows being appended to a write-only sheet spooled to disk if large."""
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet()
+    worksheet.append(fields)
+    for row in rows:
+        worksheet.append(row)
+    xlsx_file = SpooledTemporaryFile(max_size=settings.EXPORTS_XLSX_MAX_MEMORY_SIZE)
+    workbook.save(xlsx_file)
+    xlsx_file.seek(0)
+    xlsx_response = FileResponse(
+        xlsx_file,
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
     )
+    xlsx_response["Content-Disposition"] = f"Content-Disposition: attachment; filename={filename}.xlsx"
+    return xlsx_response
+
+
+class PDFTemplatesCache:
+    """
+    Process-level LRU cache of PDF templates compiled from the S3 bucket.
+
+    A cached template is used without any S3 request for TEMPLATES_PDF_CACHE_REVALIDATE_INTERVAL seconds,
+    then revalidated with a GET conditional on its ETag (only downloaded and compiled again if it was replaced).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.templates = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "revalidations": 0, "fetches": 0, "fetch_duration": 0.0}
+
+    def get(self, template_path):
+        """Return a compiled template, fetching it from the bucket only if needed."""
+        now = time.monotonic()
+        with self.lock:
+            cached_template = self.templates.get(template_path)
+            if cached_template is not None:
+                self.templates.move_to_end(template_path)
+                if now - cached_template["checked_at"] < settings.TEMPLATES_PDF_CACHE_REVALIDATE_INTERVAL:
+                    self.stats["hits"] += 1
+                    return cached_template["template"]
+
+        request_params = {"Bucket": settings.AWS_STORAGE_BUCKET_NAME, "Key": template_path}
+        if cached_template is not None:
+            request_params["IfNoneMatch"] = cached_template["etag"]
+        fetch_start = time.monotonic()
+        try:
+            data = get_s3_client().get_object(**request_params)
+            content = data["Body"].read().decode("utf-8")
+        except ClientError as error:
+            if cached_template is None or error.response["ResponseMetadata"]["HTTPStatusCode"] != 304:
+                raise
+            data = None
+        fetch_duration = time.monotonic() - fetch_start
+
+        if data is None:
+            template = cached_template["template"]
+        else:
+            template = engines["django"].from_string(content)
+        with self.lock:
+            self.stats["fetches"] += 1
+            self.stats["fetch_duration"] += fetch_duration
+            if data is None:
+                self.stats["revalidations"] += 1
+                cached_template = {**cached_template, "checked_at": now}
+            else:
+                self.stats["misses"] += 1
+                cached_template = {"template": template, "etag": data["ETag"], "checked_at": now}
+            self.templates[template_path] = cached_template
+            self.templates.move_to_end(template_path)
+            while len(self.templates) > settings.TEMPLATES_PDF_CACHE_SIZE:
+                self.templates.popitem(last=False)
+        return template
+
+    def invalidate(self, template_path=None):
+        """Remove a template from the cache (all templates if no path is given), to use it as soon as it's replaced."""
+        with self.lock:
+            if template_path is None:
+                self.templates.clear()
+            else:
+                self.templates.pop(template_path, None)
+
+    def get_stats(self):
+        """Return cache hits, misses, revalidations, and the amount and total duration of S3 fetches."""
+        with self.lock:
+            return {**self.stats, "size": len(self.templates)}
+
+
+pdf_templates_cache = PDFTemplatesCache()
+
+
+def get_pdf_template(template_path):
+    """Load a PDF template from the S3 bucket (cached), or from the TEMPLATES directories if USE_S3 is False."""
+    if settings.USE_S3 is True:
+        return pdf_templates_cache.get(template_path)
+    return get_template(template_path)
 
 
 def generate_pdf_response(filename, dict_data, type_doc, base_url):
     """Generate a PDF file as a HTTP response (used for all PDF exports returned in API routes)."""
-    if settings.USE_S3 == True:
-        s3 = get_s3_client()
-        data = s3.get_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=settings.TEMPLATES_PDF_FILEPATHS[type_doc])
-        template = Template(data['Body'].read().decode('utf-8'))
-        context = Context(dict_data)
-        html = template.render(context)
-    else:
-        # May not work anymore since S3 PDF refactoring.
-        html = render_to_string(settings.TEMPLATES_PDF_FILEPATHS[type_doc], dict_data)
-    pdf_response = HttpResponse(content_type="application/pdf")
+    html = get_pdf_template(settings.TEMPLATES_PDF_FILEPATHS[type_doc]).render(dict_data)
+    pdf_response = HttpResponse(render_pdf(html, base_url), content_type="application/pdf")
     pdf_response["Content-Disposition"] = f'Content-Disposition: attachment; filename="{slugify(filename)}.pdf"'
-    weasyprint.HTML(string=html, base_url=base_url).write_pdf(pdf_response)
     return pdf_response
 
 
 def generate_pdf_binary(context, request, template_name):
     """Generate a PDF file as a binary (used for all PDF notifications attached in emails)."""
-    if settings.USE_S3 == True:
-        s3 = get_s3_client()
-        data = s3.get_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=template_name)
-        template = Template(data['Body'].read().decode('utf-8'))
-        context = Context(context)
-    else:
-        # May not work anymore since S3 PDF refactoring.
-        template = get_template(template_name)
-    html = template.render(context)
-    pdf_binary = weasyprint.HTML(string=html, base_url=request.build_absolute_uri('/')).write_pdf()
-    return pdf_binary
+    html = get_pdf_template(template_name).render(context)
+    return render_pdf(html, request.build_absolute_uri('/'))